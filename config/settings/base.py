@@ -60,6 +60,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "trail_status.middleware.CompressionMiddleware",  # 公開ページの brotli / gzip 圧縮（圧縮後の内容はキャッシュ）
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # CORS対応（CommonMiddlewareの前に配置）
     "django.middleware.common.CommonMiddleware",
@@ -67,6 +68,9 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # 事前レンダリングした公開ページ（STATIC_PAGES_DIR 設定時のみ）
+    # Django のビューと同じヘッダー（X-Frame-Options 等）になるよう、他のミドルウェアの後に配置
+    "trail_status.middleware.StaticPageMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -89,6 +93,39 @@ STORAGES = {
     },
 }
 
+# キャッシュ（サイドバー等の表示用データ）
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# DJANGO_CACHE_DIR を設定するとファイルキャッシュ（同じホストの複数プロセスで共有）、未設定ならローカルメモリ
+# 一覧の行ごとのキャッシュ（テンプレートの断片キャッシュ）を含むため、上限は既定の300件より多くする
+CACHE_MAX_ENTRIES = 5000
+if cache_dir := os.environ.get("DJANGO_CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": cache_dir,
+            "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES},
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "trail-status",
+            "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES},
+        }
+    }
+
+# 公開ページのHTTPキャッシュ（Cloudflare等の共有キャッシュの保持秒数）
+# 同期後は Cloudflare のキャッシュを削除する（CLOUDFLARE_ZONE_ID / CLOUDFLARE_API_TOKEN 未設定なら削除しない）
+HTTP_CACHE_S_MAXAGE = int(os.environ.get("HTTP_CACHE_S_MAXAGE", "600"))
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get("HTTP_CACHE_STALE_WHILE_REVALIDATE", "3600"))
+CLOUDFLARE_ZONE_ID = os.environ.get("CLOUDFLARE_ZONE_ID", "")
+CLOUDFLARE_API_TOKEN = os.environ.get("CLOUDFLARE_API_TOKEN", "")
+
+# 公開ページの事前レンダリングの出力先（同期後に render_static で出力し、StaticPageMiddleware が返す）
+# 複数インスタンスで共有する場合は Cloud Storage のボリュームマウント先を指定。未設定なら事前レンダリングしない
+STATIC_PAGES_DIR = os.environ.get("STATIC_PAGES_DIR", "")
+
 # プライマリーキーのフィールドタイプ(デフォルト；BigAutoField)
 # https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
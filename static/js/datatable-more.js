@@ -0,0 +1,49 @@
+// 一覧の続きの追加読み込み（キーセットページ送り）
+// 「さらに読み込む」のクリック、または表の最終ページ表示時に続きの行を取得して表に追加する
+// JavaScriptが無効な場合はリンク先（次のページ）へ移動する
+var loadingMore = false;
+
+function loadMoreRows() {
+  var link = $("#load-more");
+  if (!link.length || loadingMore) return;
+
+  var cursor = link.data("next-cursor") || new URL(link.attr("href"), location.href).searchParams.get("cursor");
+  if (!cursor) return;
+
+  var query = link.data("filter-query");
+  var url = link.data("rows-url") + "?" + (query ? query + "&" : "") + "cursor=" + encodeURIComponent(cursor);
+
+  loadingMore = true;
+  link.text("読み込み中…");
+  $.get(url)
+    .done(function (html) {
+      var tbody = $($.parseHTML(html.trim())).filter("tbody");
+      var rows = tbody.children("tr");
+      if (window.innerWidth >= 1024) rows.css("cursor", "pointer");
+      table.rows.add(rows).draw(false);
+
+      var nextCursor = tbody.data("next-cursor");
+      if (nextCursor) {
+        link.data("next-cursor", nextCursor).text("さらに読み込む");
+      } else {
+        link.parent().remove();
+      }
+    })
+    .fail(function () {
+      link.text("さらに読み込む");
+    })
+    .always(function () {
+      loadingMore = false;
+    });
+}
+
+$(document).on("click", "#load-more", function (e) {
+  e.preventDefault();
+  loadMoreRows();
+});
+
+// 表の最終ページを表示したら続きを読み込む
+$("#trail-table").on("page.dt", function () {
+  var info = table.page.info();
+  if (info.page >= info.pages - 1) loadMoreRows();
+});
@@ -1,4 +1,4 @@
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 import pytest
 from django.core.management import call_command
@@ -8,6 +8,7 @@ from trail_status.management.commands.trail_sync import Command
 from trail_status.models import DataSource
 from trail_status.services.llm_client import DeepseekClient, GeminiClient, GptClient
 from trail_status.services.prompt_utils import PromptFile
+from trail_status.services.run_writer import RunWriter
 from trail_status.services.types import ResultSingle, SourceSchemaSingle
 
 DATASOURCE_TEST_DATA_1 = {
@@ -45,6 +46,7 @@ DATASOURCE_TEST_DATA_BLOG = {
     "content_hash": "dummy3",
 }
 
+
 class SimpleSetup(SimpleTestCase):
     def setUp(self):
         self.command = Command()
@@ -58,11 +60,12 @@ class DbSetup(TestCase):
         self.command = Command()
 
 
+@patch("trail_status.management.commands.trail_sync.SyncLock")
 @patch("trail_status.management.commands.trail_sync.Command.print_summary")
 @patch("trail_status.management.commands.trail_sync.Command.generate_summary")
-@patch("trail_status.management.commands.trail_sync.Command.process_result")
+@patch("trail_status.management.commands.trail_sync.Command.aprocess_result")
 @patch("trail_status.management.commands.trail_sync.AiPipeline")
-@patch("trail_status.management.commands.trail_sync.Command.setup_data_source")
+@patch("trail_status.management.commands.trail_sync.Command.asetup_data_source")
 class TestHandle(SimpleSetup):
     def setUp(self):
         super().setUp()
@@ -72,25 +75,35 @@ class TestHandle(SimpleSetup):
 
         self.pipeline_results = list(zip(self.mock_data_sources, self.ai_results))
 
-    def test_main(self, mock_setup, MockPipeline, mock_process, mock_generate, mock_print):
+    def mock_iter_results(self, MockPipeline):
+        """AiPipeline.iter_results を完了順に結果を返す非同期ジェネレータとしてモック"""
+
+        async def iter_results():
+            for item in self.pipeline_results:
+                yield item
+
+        MockPipeline.return_value.iter_results = iter_results
+
+    def test_main(self, mock_setup, MockPipeline, mock_process, mock_generate, mock_print, MockLock):
         """正常な処理"""
         mock_setup.return_value = self.mock_data_sources
-        mock_pipeline = MockPipeline.return_value
-        mock_pipeline.run = AsyncMock(return_value=self.pipeline_results)
+        self.mock_iter_results(MockPipeline)
 
         self.command.handle(**self.options)
 
         mock_setup.assert_called_once_with(None)
-        mock_pipeline.run.assert_called_once()
-        mock_process.assert_called_once_with(*self.pipeline_results[0], new_hash_mode=False)
+        MockPipeline.assert_called_once()
+        # 情報源1件のためプロセスプールは使わない
+        mock_process.assert_awaited_once_with(
+            *self.pipeline_results[0], new_hash_mode=False, run_writer=ANY, executor=None
+        )
         mock_generate.assert_called_once_with(self.pipeline_results)
         mock_print.assert_called_once()
 
-    def test_main_dry_run(self, mock_setup, MockPipeline, mock_process, mock_generate, mock_print):
+    def test_main_dry_run(self, mock_setup, MockPipeline, mock_process, mock_generate, mock_print, MockLock):
         """DBに保存しないドライランモードのテスト"""
         mock_setup.return_value = self.mock_data_sources
-        mock_pipeline = MockPipeline.return_value
-        mock_pipeline.run = AsyncMock(return_value=self.pipeline_results)
+        self.mock_iter_results(MockPipeline)
 
         # dry_runのフラグをオン
         self.options["dry_run"] = True
@@ -100,17 +113,39 @@ class TestHandle(SimpleSetup):
         mock_process.assert_not_called()
         # それ以外は通常処理
         mock_setup.assert_called_once_with(None)
-        mock_pipeline.run.assert_called_once()
+        MockPipeline.assert_called_once()
         mock_generate.assert_called_once_with(self.pipeline_results)
         mock_print.assert_called_once()
 
+    def test_main_run_locked(self, mock_setup, MockPipeline, mock_process, mock_generate, mock_print, MockLock):
+        """別のtrail_sync実行中は処理を中断"""
+        MockLock.for_run.return_value.acquire.return_value = False
+
+        self.command.handle(**self.options)
+
+        mock_setup.assert_not_called()
+        MockPipeline.assert_not_called()
+        mock_process.assert_not_called()
+
+    def test_main_source_locked(self, mock_setup, MockPipeline, mock_process, mock_generate, mock_print, MockLock):
+        """他の実行で処理中の情報源はパイプラインから除外"""
+        mock_setup.return_value = self.mock_data_sources
+        MockLock.for_source.return_value.acquire.return_value = False
+
+        self.command.handle(**self.options)
+
+        MockPipeline.assert_not_called()
+        mock_process.assert_not_called()
+        # 実行単位のロックは解放される
+        MockLock.for_run.return_value.release.assert_called_once()
+
 
 @patch("trail_status.management.commands.trail_sync.PromptFile")
 class TestSetupDataSource(DbSetup):
-    def test_setup_datasource(self, MockPromptFile):
+    async def test_setup_datasource(self, MockPromptFile):
         """情報源のDBからの通常取得"""
         MockPromptFile.load_merged_config = MagicMock(return_value=PromptFile())
-        result = self.command.setup_data_source(source_id=None)
+        result = await self.command.asetup_data_source(source_id=None)
 
         result_1, result_2 = result
 
@@ -125,10 +160,10 @@ class TestSetupDataSource(DbSetup):
 
         assert result_2.name == DATASOURCE_TEST_DATA_2["name"]
 
-    def test_setup_datasource_source_id_set(self, MockPromptFile):
+    async def test_setup_datasource_source_id_set(self, MockPromptFile):
         """単一情報源の取得の処理（コマンドライン引数指定）"""
         MockPromptFile.load_merged_config = MagicMock(return_value=PromptFile())
-        result = self.command.setup_data_source(source_id=1)
+        result = await self.command.asetup_data_source(source_id=1)
 
         result = result.pop()
 
@@ -139,18 +174,18 @@ class TestSetupDataSource(DbSetup):
         assert result.url1 == DATASOURCE_TEST_DATA_1["url1"]
         assert result.content_hash == DATASOURCE_TEST_DATA_1["content_hash"]
 
-    def test_setup_datasource_source_data_format_is_not_WEB(self, MockPromptFile):
+    async def test_setup_datasource_source_data_format_is_not_WEB(self, MockPromptFile):
         """単一情報源のdata_format != 'WEB'時の挙動"""
         MockPromptFile.load_merged_config = MagicMock(return_value=PromptFile())
-        result = self.command.setup_data_source(source_id=3)
+        result = await self.command.asetup_data_source(source_id=3)
 
         assert result is None
         MockPromptFile.load_merged_config.assert_not_called()
 
-    def test_setup_datasource_source_data_not_exists(self, MockPromptFile):
+    async def test_setup_datasource_source_data_not_exists(self, MockPromptFile):
         """単一情報源の指定IDが存在しなかったときの挙動"""
         MockPromptFile.load_merged_config = MagicMock(return_value=PromptFile())
-        result = self.command.setup_data_source(source_id=1000)
+        result = await self.command.asetup_data_source(source_id=1000)
 
         assert result is None
         MockPromptFile.load_merged_config.assert_not_called()
@@ -165,56 +200,98 @@ class TestProcessResult(SimpleSetup):
         self.source_schema = SourceSchemaSingle(id=1, name="dummy", url1="http://dummy.com/", prompt_file=PromptFile())
         self.result_by_source = ResultSingle(success=True, message="success", content_changed=True)
 
-    def test_success_cases(self, MockWriter, MockNotifier):
+    async def test_success_cases(self, MockWriter, MockNotifier):
         """サイト変更あり・パイプライン正常終了時の挙動"""
-        mock_writer, mock_notifier = MockWriter.return_value, MockNotifier.return_value
-        mock_writer.save_to_source = MagicMock()
-        mock_writer.persist_condition_and_usage = MagicMock(return_value=self.db_result_1)
-        mock_notifier.send_update_notification = MagicMock()
+        mock_writer, run_writer = MockWriter.return_value, MagicMock(spec=RunWriter)
+        mock_writer.areconcile = AsyncMock(return_value=(["update"], ["create"], 2))
 
-        self.command.process_result(self.source_schema, self.result_by_source, new_hash_mode=None)
+        await self.command.aprocess_result(
+            self.source_schema, self.result_by_source, new_hash_mode=None, run_writer=run_writer
+        )
 
-        # 保存呼び出し+スラック通知
-        mock_writer.save_to_source.assert_called_once()
-        mock_writer.persist_condition_and_usage.assert_called_once()
-        mock_notifier.send_update_notification.assert_called_once()
+        # 照合結果を実行単位の保存に追加（DB保存・通知は acommit_run でまとめて行う）
+        mock_writer.areconcile.assert_awaited_once()
+        run_writer.add.assert_called_once_with(mock_writer, ["update"], ["create"], 2)
+        MockNotifier.assert_not_called()
 
-    def test_content_not_changed(self, MockWriter, MockNotifier):
+    async def test_content_not_changed(self, MockWriter, MockNotifier):
         """サイト変更なし時の挙動"""
         self.result_by_source.content_changed = False
+        mock_writer, run_writer = MockWriter.return_value, MagicMock(spec=RunWriter)
+        mock_writer.areconcile = AsyncMock()
 
-        mock_writer, mock_notifier = MockWriter.return_value, MockNotifier.return_value
-        mock_writer.save_to_source = MagicMock()
-        mock_writer.persist_condition_and_usage = MagicMock()
-        mock_notifier.send_update_notification = MagicMock()
-        mock_notifier.send_error_notification = MagicMock()
-
-        self.command.process_result(self.source_schema, self.result_by_source, new_hash_mode=None)
+        await self.command.aprocess_result(
+            self.source_schema, self.result_by_source, new_hash_mode=None, run_writer=run_writer
+        )
 
-        mock_writer.save_to_source.assert_called_once()
-        # 登山道状態更新なし+スラック通知なし
-        mock_writer.persist_condition_and_usage.assert_not_called()
-        mock_notifier.send_update_notification.assert_not_called()
-        mock_notifier.send_error_notification.assert_not_called()
+        # 巡回記録のみ追加・照合なし+スラック通知なし
+        run_writer.add.assert_called_once_with(mock_writer)
+        mock_writer.areconcile.assert_not_called()
+        MockNotifier.assert_not_called()
 
-    def test_pipeline_failure(self, MockWriter, MockNotifier):
+    async def test_pipeline_failure(self, MockWriter, MockNotifier):
         """パイプライン処理失敗時の挙動"""
         self.result_by_source.success = False
-
-        mock_writer, mock_notifier = MockWriter.return_value, MockNotifier.return_value
-        mock_writer.save_to_source = MagicMock()
-        mock_writer.persist_condition_and_usage = MagicMock()
-        mock_notifier.send_update_notification = MagicMock()
+        mock_notifier, run_writer = MockNotifier.return_value, MagicMock(spec=RunWriter)
         mock_notifier.send_error_notification = MagicMock()
 
-        self.command.process_result(self.source_schema, self.result_by_source, new_hash_mode=None)
+        await self.command.aprocess_result(
+            self.source_schema, self.result_by_source, new_hash_mode=None, run_writer=run_writer
+        )
 
         # エラー通知
         mock_notifier.send_error_notification.assert_called_once()
-        # 情報源テープル更新なし・登山道状態更新なし
-        mock_writer.save_to_source.assert_not_called()
-        mock_writer.persist_condition_and_usage.assert_not_called()
-        mock_notifier.send_update_notification.assert_not_called()
+        # 情報源テーブル更新なし・登山道状態更新なし
+        run_writer.add.assert_not_called()
+        MockWriter.assert_not_called()
+
+    async def test_deferred(self, MockWriter, MockNotifier):
+        """時間予算超過で持ち越された情報源はDB更新・通知をしない"""
+        result_by_source = ResultSingle(success=False, deferred=True, message="持ち越し")
+        run_writer = MagicMock(spec=RunWriter)
+
+        await self.command.aprocess_result(
+            self.source_schema, result_by_source, new_hash_mode=None, run_writer=run_writer
+        )
+
+        MockWriter.assert_not_called()
+        MockNotifier.assert_not_called()
+        run_writer.add.assert_not_called()
+
+
+@patch("trail_status.management.commands.trail_sync.SlackNotifier")
+class TestCommitRun(SimpleSetup):
+    async def test_commit_run(self, MockNotifier):
+        """実行単位の保存結果ごとに、更新・新規作成があれば更新通知、失敗はエラー通知"""
+        run_writer = MagicMock(spec=RunWriter)
+        run_writer.acommit = AsyncMock(
+            return_value=[
+                {"name": "source_1", "updated": 1, "created": 1, "count": 2, "cost": 0.11111},
+                {"name": "source_2", "updated": 0, "created": 0, "count": 2, "cost": 0.1},
+                {"name": "source_3", "error": "DataError"},
+            ]
+        )
+
+        await self.command.acommit_run(run_writer)
+
+        MockNotifier.return_value.send_update_notification.assert_called_once()
+        MockNotifier.return_value.send_error_notification.assert_called_once()
+
+
+class TestGenerateSummary(SimpleSetup):
+    def test_deferred_count(self):
+        """持ち越しはエラーとは別に集計"""
+        source = SourceSchemaSingle(id=1, name="dummy", url1="http://dummy.com/", prompt_file=PromptFile())
+        results = [
+            (source, ResultSingle(success=False, deferred=True, message="持ち越し")),
+            (source, ResultSingle(success=False, message="エラー")),
+        ]
+
+        summary = self.command.generate_summary(results)
+
+        assert summary["deferred_count"] == 1
+        assert summary["error_count"] == 1
+        assert summary["results"][0]["status"] == "deferred"
 
 
 @pytest.mark.parametrize(
@@ -237,7 +314,17 @@ def test_client_factory(model, expected_client):
 
 def test_parser(capsys):
     """引数定義のテスト"""
-    expected_args = ["--source", "--model", "--dry-run", "--new-hash"]
+    expected_args = [
+        "--source",
+        "--model",
+        "--dry-run",
+        "--new-hash",
+        "--lock-wait",
+        "--time-budget",
+        "--deadline",
+        "--source-timeout",
+        "--reconcile-workers",
+    ]
 
     with pytest.raises(SystemExit) as exc_info:
         call_command("trail_sync", "--help")
@@ -246,3 +333,22 @@ def test_parser(capsys):
 
     assert exc_info.value.code == 0
     assert all(a in out for a in expected_args)
+
+
+@pytest.mark.parametrize(
+    "source_count, workers, expected_workers",
+    [
+        (1, None, None),  # 情報源1件はスレッドで照合
+        (3, 0, None),  # 0指定でプロセスを使わない
+        (3, 2, 2),
+    ],
+)
+def test_create_reconcile_executor(source_count, workers, expected_workers):
+    """照合用プロセスプールの作成"""
+    executor = Command.create_reconcile_executor(source_count, workers)
+
+    if expected_workers is None:
+        assert executor is None
+    else:
+        with executor:
+            assert executor._max_workers == expected_workers
@@ -4,19 +4,25 @@ pytest設定とテスト共通フィクスチャ
 
 import os
 from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock
 
 import httpx
 import pytest
 import yaml
+from django.core.cache import cache
 
+from trail_status.models import AreaName, DataSource, OrganizationType, StatusType, TrailCondition
 from trail_status.services import prompt_utils
 from trail_status.services.prompt_utils import PromptFile
 
+JST = timezone(timedelta(hours=+9), "JST")
+
 
 @pytest.fixture(autouse=True)
 def clear_cache():
     PromptFile.load_template.cache_clear()
+    cache.clear()
     yield
 
 
@@ -189,3 +195,61 @@ def event_loop_policy():
     import asyncio
 
     return asyncio.WindowsProactorEventLoopPolicy() if os.name == "nt" else asyncio.DefaultEventLoopPolicy()
+
+
+def create_sample_data_source(n: int | str = "", **kwargs) -> DataSource:
+    defaults = dict(
+        name=f"テスト機関{n}",
+        organization_type=OrganizationType.MUNICIPALITY,
+        prefecture_code=13,
+        prompt_key=f"test_org_{n}",
+        url1=f"https://sample{n}.com/",
+        url2=f"https://sample{n}.com/data/",
+        description=f"サンプル詳細説明{n}",
+        data_format="WEB",
+        area_name=AreaName.OKUTAMA,
+        content_hash="",
+        last_scraped_at=datetime.now(tz=JST) - timedelta(days=2),
+        last_checked_at=datetime.now(tz=JST),
+    )
+    defaults.update(kwargs)
+    return DataSource.objects.create(**defaults)
+
+
+def create_sample_condition(n: int | str = "", data_source=None, **kwargs) -> TrailCondition:
+    data_source = data_source or create_sample_data_source(n)
+
+    defaults = dict(
+        source=data_source,
+        url1=f"https://sample{n}.com/",
+        trail_name=f"テスト道{n}",
+        mountain_name_raw=f"テスト山{n}",
+        title=f"テスト通行止め{n}",
+        description=f"テスト詳細説明{n}",
+        reported_at=date.today() - timedelta(days=2),
+        resolved_at=None,
+        status=StatusType.CLOSURE,
+        area=AreaName.OKUTAMA,
+        reference_url=f"https://sample{n}.com/ref",
+        comment="テストコメント",
+        mountain_group=None,
+        ai_model="gemini-3-flash",
+        prompt_file=f"{data_source.id:0>3}_{data_source.prompt_key}.yaml",
+        ai_config={},
+        disabled=False,
+    )
+
+    defaults.update(kwargs)
+    return TrailCondition.objects.create(**defaults)
+
+
+@pytest.fixture
+def data_source_factory():
+    """DataSourceの作成関数"""
+    return create_sample_data_source
+
+
+@pytest.fixture
+def condition_factory():
+    """TrailConditionの作成関数"""
+    return create_sample_condition
@@ -1,4 +1,18 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
 import pytest
+from django.test import TestCase
+
+from trail_status.models import AreaName, DataSource, LlmUsage, StatusType, TrailCondition
+from trail_status.services.db_writer import DbWriter
+from trail_status.services.reconcile_worker import init_reconcile_worker
+from trail_status.services.llm_client import LlmConfig
+from trail_status.services.llm_stats import LlmStats, TokenStats
+from trail_status.services.prompt_utils import PromptFile
+from trail_status.services.run_writer import RunWriter
+from trail_status.services.types import ConditionSchemaAi, ConditionSchemaAiList, ResultSingle, SourceSchemaSingle
 
 pytestmark = pytest.mark.django_db
 
@@ -8,3 +22,95 @@ class TestTrailCondition:
     pytestmark = pytest.mark.django_db
 
     def test_condition_creation(self): ...
+
+
+class TestAsyncDbWriter(TestCase):
+    """DbWriterの照合結果の保存処理（async）"""
+
+    def setUp(self):
+        self.source = DataSource.objects.create(name="テスト機関", prompt_key="test_org", url1="https://sample.com/")
+        TrailCondition.objects.create(
+            source=self.source,
+            url1="https://sample.com/",
+            mountain_name_raw="テスト山",
+            trail_name="テスト道",
+            title="通行止め",
+            description="崩落のため通行止め",
+            status=StatusType.CLOSURE,
+            area=AreaName.OKUTAMA,
+            ai_config={},
+        )
+
+        records = [
+            ConditionSchemaAi(
+                mountain_name_raw="テスト山",
+                trail_name="テスト道",
+                title="通行止め解除",
+                description="崩落のため通行止め",
+                status=StatusType.CLEAR,
+                resolved_at=date.today(),
+                area=AreaName.OKUTAMA,
+            ),
+            ConditionSchemaAi(
+                mountain_name_raw="サンプル岳",
+                trail_name="北尾根",
+                title="倒木",
+                description="倒木あり注意",
+                status=StatusType.HAZARD,
+                area=AreaName.OKUTAMA,
+            ),
+        ]
+        self.source_schema = SourceSchemaSingle(
+            id=self.source.id, name=self.source.name, url1=self.source.url1, prompt_file=PromptFile()
+        )
+        self.result = ResultSingle(
+            success=True,
+            message="OK",
+            new_hash="a" * 64,
+            content_changed=True,
+            extracted_trail_conditions=ConditionSchemaAiList(trail_condition_records=records),
+            stats=LlmStats(TokenStats(1000, 0, 100, 2000, 200, "gemini-2.5-flash")),
+            config=LlmConfig(data="", model="gemini-2.5-flash", prompt="テスト", prompt_filename="001_test_org.yaml"),
+        )
+
+    async def persist(self, executor=None) -> dict:
+        """照合して実行単位の保存（trail_sync と同じ経路）"""
+        writer = DbWriter(self.source_schema, self.result)
+        to_update, to_create, count = await writer.areconcile(executor)
+        run_writer = RunWriter()
+        run_writer.add(writer, to_update, to_create, count)
+        [db_result] = await run_writer.acommit()
+        return db_result
+
+    async def test_source_status(self):
+        await self.persist()
+
+        source = await DataSource.objects.aget(id=self.source.id)
+        assert source.content_hash == "a" * 64
+        assert source.last_checked_at is not None
+        assert source.last_scraped_at is not None
+
+    async def test_persist_condition_and_usage(self):
+        db_result = await self.persist()
+
+        assert db_result["updated"] == 1
+        assert db_result["created"] == 1
+        assert db_result["count"] == 2
+        assert await TrailCondition.objects.filter(source=self.source).acount() == 2
+        assert await TrailCondition.objects.filter(source=self.source, status=StatusType.CLEAR).aexists()
+        assert await LlmUsage.objects.filter(source=self.source, conditions_extracted=2).aexists()
+
+    async def test_persist_condition_and_usage_process_pool(self):
+        """照合をプロセスプール（spawn）で実行しても結果は同じ"""
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn"), initializer=init_reconcile_worker
+        ) as executor:
+            db_result = await self.persist(executor)
+
+        assert db_result["updated"] == 1
+        assert db_result["created"] == 1
+        updated = await TrailCondition.objects.aget(source=self.source, trail_name="テスト道")
+        assert updated.status == StatusType.CLEAR
+        # 照合キーはワーカー側で生成済み
+        assert updated.trail_name_norm == "テスト道"
+        assert await TrailCondition.objects.filter(source=self.source, mountain_name_norm="サンプル岳").aexists()
@@ -1,13 +1,15 @@
 from datetime import date, datetime, timedelta, timezone
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 
+from trail_status.services.reconcile_dataset import build_reconcile_inputs, load_sample_pairs
 from trail_status.models import AreaName, StatusType, TrailCondition
 from trail_status.services.db_writer import DbWriter
 from trail_status.services.types import ConditionSchemaAiInternal, ResultSingle, SourceSchemaSingle
 from trail_status.services.prompt_utils import PromptFile
 
+
 @pytest.fixture
 def mock_DbWriter(sample_llm_config):
     """DBライターのモック"""
@@ -32,6 +34,9 @@ def mock_existing_record():
         status=StatusType.CLEAR,
         resolved_at=date.today(),
         created_at=datetime.now(tz=timezone.utc) - timedelta(days=2),
+        # 照合キー未生成
+        has_match_keys=False,
+        **dict.fromkeys(TrailCondition.MATCH_KEY_FIELDS, ""),
     )
     return sample_existing_record
 
@@ -126,6 +131,42 @@ def test_reconcile_records_new_source(mock_ai_result_no_change, mock_DbWriter):
     assert to_create[0].disabled
 
 
+def test_reconcile_records_exact_match(mock_DbWriter, mock_ai_result_update):
+    """照合キーが完全一致するレコードは類似度計算せずに対応付ける（表記揺れは正規化で吸収）"""
+    existing = TrailCondition(
+        id=1,
+        source_id=100,
+        mountain_name_raw="テスト山",
+        trail_name="テスト道",
+        title="通行止め",
+        description="詳細：通行止め解除",
+        status=StatusType.CLEAR,
+    )
+    DbWriter.fill_match_keys(existing)
+    mock_ai_result_update.trail_name = "テスト 道"
+
+    with patch.object(mock_DbWriter, "_similarity_matrix", wraps=mock_DbWriter._similarity_matrix) as matrix:
+        to_update, to_create = mock_DbWriter._reconcile_records([existing], [mock_ai_result_update])
+
+    assert to_update == [existing]
+    assert to_create == []
+    # 類似度計算は残り（0件 × 0件）のみ
+    matrix.assert_called_once_with([], [])
+
+
+def test_fill_match_keys():
+    record = TrailCondition(mountain_name_raw="ＴＥＳＴ 山", trail_name="テスト道", title="通行止め", description="")
+    DbWriter.fill_match_keys(record)
+
+    assert record.has_match_keys
+    assert record.mountain_name_norm == "TEST山"
+    assert record.trail_name_tokens == DbWriter.decompose_text("テスト道")
+    assert record.description_digest == ""
+
+    record.clear_match_keys()
+    assert not record.has_match_keys
+
+
 ### _calculate_simitarity
 def test_calculate_similarity_same_data(mock_existing_record, mock_ai_result_no_change, mock_DbWriter):
     """類似度照合ロジック 同一データ"""
@@ -145,3 +186,77 @@ def test_calculate_similarity_similar_data(mock_existing_record, mock_ai_result_
     similarity = mock_DbWriter._calculate_similarity(mock_existing_record, mock_ai_result_update)
     print("類似度（similar data）:", similarity)
     assert similarity >= 0.7
+
+
+### _similarity_matrix
+def test_similarity_matrix_equivalence(mock_DbWriter):
+    """類似度行列は _calculate_similarity の総当りと完全に一致する（サンプルAI出力で検証）"""
+    pairs = load_sample_pairs()
+    assert pairs
+
+    for source_id, (_, previous, latest) in enumerate(pairs, start=1):
+        _, existing_records, ai_records = build_reconcile_inputs(source_id, previous, latest)
+        # 短い詳細説明・日付近接のケースも含める
+        ai_records[0].reported_at = date.today()
+
+        matrix = mock_DbWriter._similarity_matrix(existing_records, ai_records)
+
+        assert matrix.shape == (len(ai_records), len(existing_records))
+        for ai_idx, ai_record in enumerate(ai_records):
+            for candidate_idx, candidate in enumerate(existing_records):
+                assert matrix[ai_idx, candidate_idx] == mock_DbWriter._calculate_similarity(candidate, ai_record)
+
+
+def test_similarity_matrix_stored_tokens(mock_DbWriter):
+    """保存済みの照合キーを使っても類似度行列は変わらない"""
+    _, previous, latest = load_sample_pairs()[0]
+    _, existing_records, ai_records = build_reconcile_inputs(1, previous, latest)
+    expected = mock_DbWriter._similarity_matrix(existing_records, ai_records)
+
+    for record in existing_records:
+        DbWriter.fill_match_keys(record)
+    with patch.object(DbWriter, "decompose_text", wraps=DbWriter.decompose_text) as decompose:
+        matrix = mock_DbWriter._similarity_matrix(existing_records, ai_records)
+
+    assert (matrix == expected).all()
+    # 分かち書きはAI出力側のみ（山名・登山道名・タイトル + 詳細説明はスコアラー2種分）
+    assert decompose.call_count == 5 * len(ai_records)
+
+
+def test_similarity_matrix_empty(mock_ai_result_create, mock_DbWriter):
+    assert mock_DbWriter._similarity_matrix([], [mock_ai_result_create]).shape == (1, 0)
+
+
+### 照合パラメータ（情報源ごとの上書き）
+def test_matching_params_override(sample_llm_config):
+    source = SourceSchemaSingle(
+        id=100,
+        name="sample",
+        url1="http://url1.com",
+        prompt_file=PromptFile(prompt="test"),
+        matching_params={"similarity_threshold": 0.8, "desc_compare_length": 100, "unknown_param": 1},
+    )
+    writer = DbWriter(source, ResultSingle(success=True, message="OK", config=sample_llm_config))
+
+    assert writer.SIMILARITY_THRESHOLD == 0.8
+    assert writer.DESC_COMPARE_LENGTH == 100
+    assert not hasattr(writer, "UNKNOWN_PARAM")
+    # クラス定数（他の情報源）は変わらない
+    assert DbWriter.SIMILARITY_THRESHOLD == 0.7
+    assert writer.effective_matching_params() == DbWriter.default_matching_params() | {
+        "similarity_threshold": 0.8,
+        "desc_compare_length": 100,
+    }
+
+
+def test_similarity_matrix_desc_length_override(mock_DbWriter):
+    """比較文字数を上書きした場合、保存済みの詳細説明の分かち書き（既定の文字数）は使わない"""
+    _, previous, latest = load_sample_pairs()[0]
+    _, existing_records, ai_records = build_reconcile_inputs(1, previous, latest)
+    mock_DbWriter.DESC_COMPARE_LENGTH = 30
+    expected = mock_DbWriter._similarity_matrix(existing_records, ai_records)
+
+    for record in existing_records:
+        DbWriter.fill_match_keys(record)
+
+    assert (mock_DbWriter._similarity_matrix(existing_records, ai_records) == expected).all()
@@ -0,0 +1,97 @@
+from datetime import date
+from unittest.mock import patch
+
+from django.db import DataError
+from django.test import TestCase
+
+from trail_status.models import AreaName, DataSource, LlmUsage, StatusType, TrailCondition
+from trail_status.services.db_writer import DbWriter
+from trail_status.services.llm_client import LlmConfig
+from trail_status.services.llm_stats import LlmStats, TokenStats
+from trail_status.services.prompt_utils import PromptFile
+from trail_status.services.run_writer import RunWriter
+from trail_status.services.types import ConditionSchemaAi, ConditionSchemaAiList, ResultSingle, SourceSchemaSingle
+
+
+class TestRunWriter(TestCase):
+    """実行単位のDB保存"""
+
+    def setUp(self):
+        self.sources = [
+            DataSource.objects.create(name=f"テスト機関{i}", prompt_key=f"test_org{i}", url1=f"https://sample{i}.com/")
+            for i in range(3)
+        ]
+
+    def make_writer(self, source: DataSource, content_changed: bool = True) -> DbWriter:
+        record = ConditionSchemaAi(
+            mountain_name_raw="テスト山",
+            trail_name=f"{source.name}の道",
+            title="通行止め",
+            status=StatusType.CLOSURE,
+            area=AreaName.OKUTAMA,
+            resolved_at=date.today(),
+        )
+        source_schema = SourceSchemaSingle(id=source.id, name=source.name, url1=source.url1, prompt_file=PromptFile())
+        result = ResultSingle(
+            success=True,
+            message="OK",
+            new_hash=f"{source.id}".zfill(64),
+            content_changed=content_changed,
+            extracted_trail_conditions=ConditionSchemaAiList(trail_condition_records=[record]),
+            stats=LlmStats(TokenStats(1000, 0, 100, 2000, 200, "gemini-2.5-flash")),
+            config=LlmConfig(data="", model="gemini-2.5-flash", prompt="テスト", prompt_filename="001_test_org.yaml"),
+        )
+        return DbWriter(source_schema, result)
+
+    def add_reconciled(self, run_writer: RunWriter, writer: DbWriter) -> None:
+        internal_data_list = writer._convert_to_internal_schema()
+        to_update, to_create = writer._reconcile_records([], internal_data_list)
+        run_writer.add(writer, to_update, to_create, len(internal_data_list))
+
+    def test_commit(self):
+        run_writer = RunWriter()
+        self.add_reconciled(run_writer, self.make_writer(self.sources[0]))
+        self.add_reconciled(run_writer, self.make_writer(self.sources[1]))
+        run_writer.add(self.make_writer(self.sources[2], content_changed=False))
+
+        # 外側のatomic（TestCase内ではセーブポイント）2 + DataSource取得1 + 山グループ・別名の読み込み2
+        # + 照合ありの情報源2件 ×（セーブポイント・bulk_create・更新状況の再集計3・解放）6
+        # + DataSource bulk_update 1 + LlmUsage bulk_create 1
+        with self.assertNumQueries(2 + 1 + 2 + 2 * 6 + 1 + 1):
+            results = run_writer.commit()
+
+        assert [r["created"] for r in results] == [1, 1]
+        assert TrailCondition.objects.filter(source__in=self.sources[:2]).count() == 2
+        assert LlmUsage.objects.filter(source__in=self.sources).count() == 2
+
+        changed, _, unchanged = (DataSource.objects.get(id=s.id) for s in self.sources)
+        assert changed.content_hash == f"{changed.id}".zfill(64)
+        assert changed.last_scraped_at is not None
+        # コンテンツ変更なしは巡回日時のみ
+        assert unchanged.last_checked_at is not None
+        assert unchanged.last_scraped_at is None
+        assert not run_writer.pending
+
+    def test_commit_failure_isolated(self):
+        """登山道状況の保存に失敗した情報源のみ取り消し、巡回記録も更新しない"""
+        run_writer = RunWriter()
+        failing_writer = self.make_writer(self.sources[0])
+        self.add_reconciled(run_writer, failing_writer)
+        self.add_reconciled(run_writer, self.make_writer(self.sources[1]))
+
+        original = DbWriter._commit_trail_condition
+
+        def commit_trail_condition(writer, to_update, to_create, resolver=None):
+            if writer is failing_writer:
+                raise DataError("value too long")
+            return original(writer, to_update, to_create, resolver)
+
+        with patch.object(DbWriter, "_commit_trail_condition", commit_trail_condition):
+            failed, succeeded = run_writer.commit()
+
+        assert "error" in failed
+        assert succeeded["created"] == 1
+        assert not TrailCondition.objects.filter(source=self.sources[0]).exists()
+        assert not LlmUsage.objects.filter(source=self.sources[0]).exists()
+        assert DataSource.objects.get(id=self.sources[0].id).last_checked_at is None
+        assert LlmUsage.objects.filter(source=self.sources[1]).exists()
@@ -6,6 +6,7 @@ from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
+from trail_status.services.deadline import Deadline, DeadlineExceeded
 from trail_status.services.llm_client import DeepseekClient, GeminiClient, LlmConfig
 
 
@@ -59,3 +60,13 @@ async def test_deepseek_generate_success(config, monkeypatch, mock_openai_respon
     assert len(validated_data.trail_condition_records) == 0
     assert token_stats.input_tokens == 100
     assert token_stats.pure_output_tokens == 50
+
+
+@pytest.mark.asyncio
+async def test_server_error_retry_respects_deadline(config):
+    """リトライ待機が期限を越える場合は待たずに DeadlineExceeded を送出"""
+    client = DeepseekClient(config)
+    client.deadline = Deadline.after(1)
+
+    with pytest.raises(DeadlineExceeded):
+        await client.handle_server_error(Exception("503"), 0, client.MAX_RETRIES)
@@ -0,0 +1,57 @@
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from trail_status.services import assignment
+from trail_status.services.assignment import _hungarian_maximize, greedy_assignment, optimal_assignment
+
+THRESHOLD = 0.7
+
+
+def brute_force_best(weights: np.ndarray) -> float:
+    """総当りによる重み最大の割当（検証用）"""
+    n, m = weights.shape
+    if n > m:
+        return brute_force_best(weights.T)
+    return max(sum(weights[i, j] for i, j in enumerate(cols)) for cols in permutations(range(m), n))
+
+
+def test_greedy_vs_optimal():
+    """貪欲法では最高スコアの組を先に取るため、他方が閾値未満の組しか残らない"""
+    scores = np.array(
+        [
+            [0.90, 0.85],
+            [0.80, 0.10],
+        ]
+    )
+
+    assert greedy_assignment(scores, THRESHOLD) == [(0, 0)]
+    assert sorted(optimal_assignment(scores, THRESHOLD)) == [(0, 1), (1, 0)]
+
+
+def test_optimal_respects_threshold():
+    scores = np.array([[0.5, 0.6], [0.69, 0.2]])
+
+    assert optimal_assignment(scores, THRESHOLD) == []
+    assert greedy_assignment(scores, THRESHOLD) == []
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (3, 3), (2, 5), (5, 2), (4, 6)])
+def test_hungarian_fallback_matches_brute_force(shape):
+    rng = np.random.default_rng(sum(shape))
+    for _ in range(20):
+        weights = rng.random(shape)
+        rows, cols = _hungarian_maximize(weights)
+
+        assert len(set(rows.tolist())) == len(rows) == min(shape)
+        assert len(set(cols.tolist())) == len(cols)
+        assert weights[rows, cols].sum() == pytest.approx(brute_force_best(weights))
+
+
+def test_optimal_without_scipy(monkeypatch):
+    """scipy未導入でもNumPy実装で同じ結果になる"""
+    monkeypatch.setattr(assignment, "linear_sum_assignment", None)
+    scores = np.array([[0.90, 0.85, 0.1], [0.80, 0.10, 0.72]])
+
+    assert sorted(optimal_assignment(scores, THRESHOLD)) == [(0, 1), (1, 0)]
@@ -0,0 +1,60 @@
+import numpy as np
+
+from trail_status.services.reconcile_dataset import build_reconcile_inputs, load_sample_pairs
+from trail_status.services.blocking import CandidateIndex, block_keys
+from trail_status.services.db_writer import DbWriter
+
+
+def test_block_keys():
+    keys = block_keys("OKUTAMA", "大岳山", ["大岳山 登山道", "通行止め"])
+
+    assert ("area", "OKUTAMA") in keys
+    assert ("mountain", "大岳山") in keys
+    assert ("token", ("大岳山", "登山道")) in keys
+    assert ("token", ("通行止め",)) in keys
+    # フィールドをまたぐn-gramは作らない
+    assert ("token", ("登山道", "通行止め")) not in keys
+
+
+def test_candidate_index_top_candidates():
+    """共有するキーが多く、希少なキーを共有する候補ほど上位"""
+    index = CandidateIndex(
+        [
+            block_keys("OKUTAMA", "大岳山", ["鋸尾根", "通行止め"]),
+            block_keys("OKUTAMA", "御岳山", ["ケーブルカー", "通行止め"]),
+            block_keys("OKUTAMA", "大岳山", ["馬頭刈尾根", "通行止め"]),
+            block_keys("TANZAWA", "丹沢山", ["表尾根", "通行可"]),
+        ]
+    )
+    query = block_keys("OKUTAMA", "大岳山", ["鋸尾根", "通行止め"])
+
+    assert index.top_candidates(query, top_k=10) == [0, 2, 1]
+    assert index.top_candidates(query, top_k=1) == [0]
+    assert index.top_candidates(block_keys("HAKONE", "", ["芦ノ湖"]), top_k=10) == []
+
+
+def test_blocked_similarity_matrix():
+    """ブロッキング後の行列は、残った組が総当りと一致し、それ以外は0"""
+    _, previous, latest = load_sample_pairs()[0]
+    writer, existing_records, ai_records = build_reconcile_inputs(1, previous, latest)
+    writer.BLOCKING_MIN_CANDIDATES = 0
+    writer.BLOCKING_TOP_K = 3
+
+    full = writer._similarity_matrix(existing_records, ai_records)
+    pruned = writer._blocked_similarity_matrix(existing_records, ai_records)
+
+    kept = pruned > 0
+    assert (kept.sum(axis=1) <= 3).all()
+    assert np.array_equal(pruned[kept], full[kept])
+
+
+def test_blocked_similarity_matrix_below_min_candidates():
+    """候補が少ない場合は総当り"""
+    _, previous, latest = load_sample_pairs()[0]
+    writer, existing_records, ai_records = build_reconcile_inputs(1, previous, latest)
+    assert len(existing_records) < DbWriter.BLOCKING_MIN_CANDIDATES
+
+    assert np.array_equal(
+        writer._blocked_similarity_matrix(existing_records, ai_records),
+        writer._similarity_matrix(existing_records, ai_records),
+    )
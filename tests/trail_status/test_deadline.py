@@ -0,0 +1,31 @@
+import pytest
+
+from trail_status.services.deadline import Deadline, DeadlineExceeded
+
+
+def test_no_deadline():
+    deadline = Deadline.after(None)
+
+    assert deadline.remaining() is None
+    assert deadline.expired is False
+    assert deadline.clamp(30) == 30
+    deadline.check_sleep(1000)  # 期限なしなら送出しない
+
+
+def test_clamp_and_check_sleep():
+    deadline = Deadline.after(5)
+
+    assert deadline.clamp(30) <= 5
+    assert deadline.clamp(1) == 1
+    deadline.check_sleep(1)
+    with pytest.raises(DeadlineExceeded):
+        deadline.check_sleep(27)
+
+
+def test_earliest():
+    run_deadline = Deadline.after(100)
+
+    assert run_deadline.earliest(None) is run_deadline
+    assert run_deadline.earliest(1).remaining() <= 1
+    assert Deadline().earliest(1).remaining() <= 1
+    assert Deadline.after(0).expired is True
@@ -3,7 +3,7 @@ from unittest.mock import AsyncMock, MagicMock
 import httpx
 import pytest
 
-from trail_status.services.fetcher import DataFetcher
+from trail_status.services.fetcher import DataFetcher, combine_content_hashes, join_page_texts
 
 
 class SetUp:
@@ -107,3 +107,21 @@ class TestFetcher(SetUp):
         has_changed, hash3 = self.fetcher.has_content_changed(html2, hash1)
         assert has_changed is True
         assert hash3 != hash1
+
+
+def test_combine_content_hashes():
+    """複数ページのハッシュ統合（1ページなら従来のハッシュ値を維持）"""
+    assert combine_content_hashes(["a" * 64]) == "a" * 64
+
+    combined = combine_content_hashes(["a" * 64, "b" * 64])
+    assert len(combined) == 64
+    assert combined != combine_content_hashes(["b" * 64, "a" * 64])
+
+
+def test_join_page_texts():
+    """複数ページのテキストは区切り付きで連結"""
+    assert join_page_texts([("https://example.com/1", "本文1")]) == "本文1"
+
+    text = join_page_texts([("https://example.com/1", "本文1"), ("https://example.com/2", "本文2")])
+    assert "===== ページ1/2: https://example.com/1 =====\n本文1" in text
+    assert "===== ページ2/2: https://example.com/2 =====\n本文2" in text
@@ -0,0 +1,143 @@
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from trail_status.management.commands import tune_matching
+from trail_status.models import DataSource
+from trail_status.services.db_writer import DbWriter
+from trail_status.services.matching_tuner import WEIGHT_PARAMS_DESC, MatchingTuner, boundary_params, weight_grid
+from trail_status.services.reconcile_dataset import (
+    Accuracy,
+    build_reconcile_inputs,
+    build_sample_dataset,
+    evaluate,
+    save_dataset,
+)
+
+# 既定の閾値では誤って対応付ける（新規が正解）AI出力を含むケース
+MISMATCH_CASE = "003_kanagawa_tanzawa/gpt-5-mini_20260114_023012"
+
+
+@pytest.fixture(scope="module")
+def sample_cases():
+    return build_sample_dataset()
+
+
+def test_weight_grid():
+    grid = weight_grid(3, 0.5)
+
+    assert grid == [
+        (0.0, 0.0, 1.0),
+        (0.0, 0.5, 0.5),
+        (0.0, 1.0, 0.0),
+        (0.5, 0.0, 0.5),
+        (0.5, 0.5, 0.0),
+        (1.0, 0.0, 0.0),
+    ]
+    assert all(sum(weights) == pytest.approx(1) for weights in weight_grid(4, 0.1))
+    assert len(weight_grid(4, 0.1)) == 286
+
+
+def test_evaluate_matches_reconcile(sample_cases):
+    """事前計算したスコアでの評価は、DbWriter._match_records による対応付けの評価と一致"""
+    cases = [case for case in sample_cases if case.source_id == 1 and case.labels][:5]
+    tuner = MatchingTuner(cases)
+
+    expected = Accuracy()
+    for i, case in enumerate(cases, start=1):
+        writer, existing_records, ai_records = build_reconcile_inputs(i, case.previous, case.latest)
+        for record in existing_records:
+            DbWriter.fill_match_keys(record)
+        expected.add(evaluate(writer._match_records(existing_records, ai_records).matches, case.labels))
+
+    assert tuner.evaluate({}) == expected
+
+
+def test_boundary_params():
+    candidates = {"similarity_threshold": [0.6, 0.7, 0.8], "desc_compare_length": [200]}
+
+    assert boundary_params({"similarity_threshold": 0.8, "desc_compare_length": 200}, candidates) == [
+        "similarity_threshold"
+    ]
+    # 候補の内側、および候補が1つだけのパラメータは対象外
+    assert boundary_params({"similarity_threshold": 0.7, "desc_compare_length": 200}, candidates) == []
+
+
+def test_search_improves_f1(sample_cases):
+    tuner = MatchingTuner([case for case in sample_cases if case.name == MISMATCH_CASE])
+
+    result = tuner.search([0.7, 0.8], weight_step=0.5, rounds=1)
+
+    assert result.baseline.f1 < 1.0
+    assert result.accuracy.f1 == 1.0
+    assert result.evaluated == 1 + (len(weight_grid(4, 0.5)) + len(weight_grid(3, 0.5))) * 2
+    assert sum(result.params[name] for name in WEIGHT_PARAMS_DESC) == 1
+    # 探索後は現在の設定に戻す
+    assert tuner.writer.effective_matching_params() == tuner.base_params
+
+
+@pytest.mark.django_db
+def test_tune_matching_command(sample_cases, tmp_path: Path):
+    """改善した照合パラメータを既定値との差分で情報源に保存"""
+    source = DataSource.objects.create(name="テスト機関", prompt_key="test_org", url1="https://sample.com/")
+    case = next(case for case in sample_cases if case.name == MISMATCH_CASE)
+    case.source_id = source.id
+    dataset = tmp_path / "dataset.json"
+    save_dataset([case], dataset)
+
+    out = StringIO()
+    call_command(
+        "tune_matching",
+        "--dataset",
+        str(dataset),
+        "--thresholds",
+        "0.7",
+        "0.8",
+        "--desc-lengths",
+        "200",
+        "--weight-step",
+        "0.5",
+        "--rounds",
+        "1",
+        "--min-labels",
+        "1",
+        stdout=out,
+    )
+
+    source.refresh_from_db()
+    assert source.matching_params
+    assert "similarity_threshold が探索範囲の端" in out.getvalue()
+    assert set(source.matching_params) <= {name.lower() for name in DbWriter.TUNABLE_PARAMS}
+    assert "desc_compare_length" not in source.matching_params  # 既定値のままのものは保存しない
+
+
+@pytest.mark.django_db
+def test_tune_matching_command_auto_labels(sample_cases, monkeypatch):
+    """自動ラベルでの探索結果は保存しない"""
+    source = DataSource.objects.create(name="テスト機関", prompt_key="test_org", url1="https://sample.com/")
+    case = next(case for case in sample_cases if case.name == MISMATCH_CASE)
+    case.source_id = source.id
+    monkeypatch.setattr(tune_matching, "build_sample_dataset", lambda: [case])
+
+    out = StringIO()
+    call_command(
+        "tune_matching",
+        "--thresholds",
+        "0.7",
+        "0.8",
+        "--desc-lengths",
+        "200",
+        "--weight-step",
+        "0.5",
+        "--rounds",
+        "1",
+        "--min-labels",
+        "1",
+        stdout=out,
+    )
+
+    source.refresh_from_db()
+    assert source.matching_params == {}
+    assert "自動ラベルのため照合パラメータは保存しません" in out.getvalue()
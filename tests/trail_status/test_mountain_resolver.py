@@ -0,0 +1,123 @@
+import pytest
+from django.core.management import call_command
+from django.test import TestCase
+
+from trail_status.models import AreaName, DataSource, MountainAlias, MountainGroup, StatusType, TrailCondition
+from trail_status.services.db_writer import DbWriter
+from trail_status.services.mountain_resolver import AhoCorasick, MountainKey, MountainResolver
+from trail_status.services.prompt_utils import PromptFile
+from trail_status.services.types import ResultSingle, SourceSchemaSingle
+
+OKUTAMA, TANZAWA = AreaName.OKUTAMA, AreaName.TANZAWA
+
+
+@pytest.fixture
+def resolver():
+    return MountainResolver(
+        {
+            "大岳山": MountainKey(1, OKUTAMA),
+            "鋸山": MountainKey(2, OKUTAMA),
+            "御岳山": MountainKey(3, OKUTAMA),
+            "岳山": MountainKey(7, OKUTAMA),
+            "大山": MountainKey(4, TANZAWA),
+            "おおやま": MountainKey(4, TANZAWA),
+            "山": MountainKey(5, OKUTAMA),  # 1文字のキーは完全一致のみ
+        }
+    )
+
+
+def test_aho_corasick_find_all():
+    """入れ子・重なりを含めて全てのキーを見つける"""
+    automaton = AhoCorasick({key: MountainKey(i, OKUTAMA) for i, key in enumerate(["he", "she", "his", "hers"])})
+
+    assert sorted(automaton.find_all("ushers")) == [
+        (1, "she", MountainKey(1, OKUTAMA)),
+        (2, "he", MountainKey(0, OKUTAMA)),
+        (2, "hers", MountainKey(3, OKUTAMA)),
+    ]
+
+
+@pytest.mark.parametrize(
+    "mountain_name, area, expected",
+    [
+        ("大岳山", OKUTAMA, 1),
+        ("大岳山 ", OKUTAMA, 1),  # 正規化して完全一致
+        ("大岳山・鋸山", OKUTAMA, None),  # 複数の山グループ（同じ山域）
+        ("奥多摩 大岳山周辺", OKUTAMA, 1),  # 部分一致
+        ("奥の御岳山", OKUTAMA, 3),  # 含まれる「岳山」は除く
+        ("山", OKUTAMA, 5),
+        ("高水山", OKUTAMA, None),  # 1文字キーでは部分一致しない
+        ("", OKUTAMA, None),
+    ],
+)
+def test_resolve(resolver, mountain_name, area, expected):
+    assert resolver.resolve(mountain_name, area) == expected
+
+
+def test_resolve_prefers_same_area():
+    """複数の山グループに一致する場合は山域が同じものを優先"""
+    resolver = MountainResolver({"大山": MountainKey(4, TANZAWA), "丸山": MountainKey(6, OKUTAMA)})
+
+    assert resolver.resolve("大山・丸山", OKUTAMA) == 6
+    assert resolver.resolve("大山・丸山", TANZAWA) == 4
+
+
+class TestMountainGroupLinking(TestCase):
+    def setUp(self):
+        self.group = MountainGroup.objects.create(name="大岳山", area=OKUTAMA)
+        MountainAlias.objects.create(mountain_group=self.group, alias_name="大岳")
+        self.source = DataSource.objects.create(name="テスト機関", prompt_key="test_org", url1="https://sample.com/")
+
+    def create_condition(self, mountain_name: str, **kwargs) -> TrailCondition:
+        return TrailCondition.objects.create(
+            source=self.source,
+            url1="https://sample.com/",
+            mountain_name_raw=mountain_name,
+            trail_name="テスト道",
+            title="通行止め",
+            status=StatusType.CLOSURE,
+            area=OKUTAMA,
+            ai_config={},
+            **kwargs,
+        )
+
+    def test_load(self):
+        resolver = MountainResolver.load()
+
+        assert resolver.resolve("大岳") == self.group.id
+        assert resolver.resolve("大岳山（鋸尾根）") == self.group.id
+
+    def test_commit_trail_condition_links_group(self):
+        """DbWriterの保存時に山グループを紐付け"""
+        writer = DbWriter(
+            SourceSchemaSingle(id=self.source.id, name=self.source.name, url1="", prompt_file=PromptFile()),
+            ResultSingle(success=True, message="OK"),
+        )
+        record = TrailCondition(
+            source=self.source,
+            mountain_name_raw="大岳",
+            trail_name="鋸尾根",
+            title="通行止め",
+            area=OKUTAMA,
+            ai_config={},
+        )
+
+        writer._commit_trail_condition([], [record])
+
+        assert TrailCondition.objects.get(trail_name="鋸尾根").mountain_group == self.group
+
+    def test_link_mountain_groups(self):
+        """未紐付けのレコードのみ紐付け（手動設定は維持）"""
+        other_group = MountainGroup.objects.create(name="御岳山", area=OKUTAMA)
+        unlinked = self.create_condition("大岳山・馬頭刈尾根")
+        manual = self.create_condition("大岳山", mountain_group=other_group)
+        unknown = self.create_condition("不明山")
+
+        call_command("link_mountain_groups", "--chunk-size", "1")
+
+        unlinked.refresh_from_db()
+        manual.refresh_from_db()
+        unknown.refresh_from_db()
+        assert unlinked.mountain_group == self.group
+        assert manual.mountain_group == other_group
+        assert unknown.mountain_group is None
@@ -1,8 +1,11 @@
+import asyncio
 from types import SimpleNamespace
 from unittest.mock import MagicMock
 
+import httpx
 import pytest
 
+from trail_status.services.fetcher import DataFetcher
 from trail_status.services.llm_client import ConversationalAi, LlmConfig
 from trail_status.services.llm_stats import TokenStats
 from trail_status.services.pipeline import AiPipeline
@@ -91,3 +94,123 @@ class TestPipeline:
         assert result.content_changed is True
         assert result.stats is not None
         assert result.extracted_trail_conditions is not None
+
+    @pytest.mark.asyncio
+    async def test_priority_order_and_time_budget(self, mock_async_client):
+        """優先度順に並べ替え、時間予算超過後の情報源は持ち越し"""
+        source_data_list = [
+            SourceSchemaSingle(
+                id=i, name=f"情報源{i}", url1="https://example.com/", prompt_file=PromptFile(), priority=p
+            )
+            for i, p in [(1, 0.5), (2, 9.0), (3, 3.0)]
+        ]
+
+        pipeline = AiPipeline(source_data_list, client_factory=MagicMock(), time_budget=0)
+        results = await pipeline.run()
+
+        assert [source.id for source, _ in results] == [2, 3, 1]
+        assert all(result.deferred and not result.success for _, result in results)
+        mock_async_client.get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_source_timeout_defers(self, monkeypatch, mock_async_client):
+        """情報源ごとの期限を超えたLLM呼び出しは取り消され、持ち越しになる"""
+        mock_config = LlmConfig(data="テスト", model="gemini-2.5-flash", prompt="テストプロンプト")
+        monkeypatch.setattr("trail_status.services.pipeline.LlmConfig.from_file", MagicMock(return_value=mock_config))
+
+        class SlowClient(FakeGeminiClient):
+            async def _call_api(self):
+                await asyncio.sleep(10)
+
+        source_data_list = [
+            SourceSchemaSingle(id=1, name="遅い山", url1="https://example.com/", prompt_file=PromptFile(prompt="test"))
+        ]
+        pipeline = AiPipeline(source_data_list, client_factory=lambda config: SlowClient(config), source_timeout=0.1)
+        results = await pipeline.run()
+
+        _, result = results[0]
+        assert result.deferred is True
+        assert result.success is False
+        assert result.new_hash is None  # ハッシュは保存されず次回に再処理
+
+    @pytest.mark.asyncio
+    async def test_source_timeout_excludes_llm_queue(self, monkeypatch, mock_async_client):
+        """LLMの同時実行数の上限による待ち時間は情報源ごとの期限に含めない"""
+        mock_config = LlmConfig(data="テスト", model="gemini-2.5-flash", prompt="テストプロンプト")
+        monkeypatch.setattr("trail_status.services.pipeline.LlmConfig.from_file", MagicMock(return_value=mock_config))
+        monkeypatch.setattr(AiPipeline, "LLM_CONCURRENCY", 1)
+
+        class SlowClient(FakeGeminiClient):
+            async def _call_api(self):
+                await asyncio.sleep(0.3)
+                return await super()._call_api()
+
+        source_data_list = [
+            SourceSchemaSingle(
+                id=i, name=f"情報源{i}", url1="https://example.com/", prompt_file=PromptFile(prompt="test")
+            )
+            for i in (1, 2)
+        ]
+        # 2件目は1件目のLLM呼び出し（0.3秒）を待つため、待ち時間を含めると期限（0.5秒）を超える
+        pipeline = AiPipeline(source_data_list, client_factory=lambda config: SlowClient(config), source_timeout=0.5)
+        results = await pipeline.run()
+
+        assert all(result.success and not result.deferred for _, result in results)
+
+    @pytest.mark.asyncio
+    async def test_fetch_multiple_urls(self, monkeypatch, mock_async_client):
+        """url2も並行取得し、連結テキストでLLMを1回だけ呼び出す"""
+        mock_async_client.get.side_effect = [
+            MagicMock(text="<html><body><p>ページ1の通行止め情報です。</p></body></html>"),
+            MagicMock(text="<html><body><p>ページ2の通行止め情報です。</p></body></html>"),
+        ]
+        from_file = MagicMock(return_value=LlmConfig(data="", model="gemini-2.5-flash", prompt="テストプロンプト"))
+        monkeypatch.setattr("trail_status.services.pipeline.LlmConfig.from_file", from_file)
+
+        source_data_list = [
+            SourceSchemaSingle(
+                id=1,
+                name="テスト山",
+                url1="https://example.com/1",
+                url2="https://example.com/2",
+                prompt_file=PromptFile(prompt="test"),
+            )
+        ]
+        pipeline = AiPipeline(source_data_list, client_factory=lambda config: FakeGeminiClient(config))
+        results = await pipeline.run()
+
+        _, result = results[0]
+        assert result.success is True
+        assert mock_async_client.get.call_count == 2
+        from_file.assert_called_once()
+        data = from_file.call_args.kwargs["data"]
+        assert "https://example.com/1" in data and "https://example.com/2" in data
+
+    @pytest.mark.asyncio
+    async def test_secondary_url_failure(self, monkeypatch, mock_async_client):
+        """url2の取得に失敗しても取得できたページで続行（url1の失敗は情報源の失敗）"""
+        html = "<html><body><p>ページ1の通行止め情報です。</p></body></html>"
+        mock_async_client.get.side_effect = [MagicMock(text=html), httpx.ConnectError("接続失敗")]
+        from_file = MagicMock(return_value=LlmConfig(data="", model="gemini-2.5-flash", prompt="テストプロンプト"))
+        monkeypatch.setattr("trail_status.services.pipeline.LlmConfig.from_file", from_file)
+
+        source_data = SourceSchemaSingle(
+            id=1,
+            name="テスト山",
+            url1="https://example.com/1",
+            url2="https://example.com/2",
+            prompt_file=PromptFile(prompt="test"),
+        )
+        pipeline = AiPipeline([source_data], client_factory=lambda config: FakeGeminiClient(config))
+        _, result = (await pipeline.run())[0]
+
+        assert result.success is True
+        assert result.new_hash == DataFetcher(source_data.url1).calculate_content_hash(html)
+        assert "https://example.com/2" not in from_file.call_args.kwargs["data"]
+
+        # url1の取得に失敗
+        mock_async_client.get.side_effect = [httpx.ConnectError("接続失敗"), MagicMock(text=html)]
+        _, result = (await pipeline.run())[0]
+
+        assert result.success is False
+        assert result.deferred is False
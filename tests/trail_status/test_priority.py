@@ -0,0 +1,66 @@
+import math
+from datetime import date, timedelta
+
+import pytest
+from django.utils import timezone
+
+from trail_status.models import LlmUsage, StatusType
+from trail_status.services.priority import compute_source_priorities
+
+
+@pytest.mark.django_db
+class TestSourcePriority:
+    def test_active_closure_ranks_higher(self, data_source_factory, condition_factory):
+        """有効な通行止めがある情報源ほど優先度が高い"""
+        quiet = data_source_factory(1)
+        busy = data_source_factory(2)
+        condition_factory(2, data_source=busy, status=StatusType.CLOSURE)
+        condition_factory(3, data_source=busy, status=StatusType.CLOSURE)
+
+        priorities = compute_source_priorities([quiet, busy])
+
+        assert priorities[busy.id] > priorities[quiet.id]
+
+    def test_resolved_closure_is_ignored(self, data_source_factory, condition_factory):
+        """解消済みの通行止め・他の状況種別は加点されない"""
+        source = data_source_factory(1, last_checked_at=timezone.now())
+        condition_factory(1, data_source=source, resolved_at=date.today() - timedelta(days=1))
+        condition_factory(2, data_source=source, status=StatusType.HAZARD)
+
+        priorities = compute_source_priorities([source])
+
+        assert priorities[source.id] == pytest.approx(0, abs=0.01)
+
+    def test_recent_changes_and_page_size(self, data_source_factory, condition_factory):
+        """変更頻度が高いと加点、ページが大きいと割引"""
+        now = timezone.now()
+        small = data_source_factory(1, last_checked_at=now)
+        large = data_source_factory(2, last_checked_at=now)
+        for source, tokens in [(small, 1000), (large, 60000)]:
+            for _ in range(3):
+                LlmUsage.objects.create(source=source, model="gemini-3-flash-preview", prompt_tokens=tokens)
+
+        priorities = compute_source_priorities([small, large])
+
+        assert priorities[small.id] > priorities[large.id] > 0
+
+    def test_staleness(self, data_source_factory, condition_factory):
+        """最終巡回から時間が経つほど優先度が上がる"""
+        fresh = data_source_factory(1, last_checked_at=timezone.now())
+        stale = data_source_factory(2, last_checked_at=timezone.now() - timedelta(days=3))
+
+        priorities = compute_source_priorities([fresh, stale])
+
+        assert priorities[stale.id] == pytest.approx(3, abs=0.01)
+        assert priorities[stale.id] > priorities[fresh.id]
+
+    def test_never_checked_ranks_first(self, data_source_factory, condition_factory):
+        """一度も巡回していない情報源は最優先（時間予算で持ち越され続けないように）"""
+        busy = data_source_factory(1, last_checked_at=timezone.now() - timedelta(days=30))
+        condition_factory(1, data_source=busy, status=StatusType.CLOSURE)
+        never = data_source_factory(2, last_checked_at=None)
+
+        priorities = compute_source_priorities([busy, never])
+
+        assert priorities[never.id] == math.inf
+        assert priorities[never.id] > priorities[busy.id]
@@ -0,0 +1,160 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from trail_status.services.reconcile_dataset import (
+    Accuracy,
+    GoldenCase,
+    auto_labels,
+    build_existing_dataset,
+    build_reconcile_inputs,
+    evaluate,
+    load_dataset,
+    load_db_records,
+    load_fixture_records,
+    load_sample_pairs,
+    save_dataset,
+)
+
+
+def _record(mountain: str, trail: str, description: str = "") -> dict:
+    return {
+        "mountain_name_raw": mountain,
+        "trail_name": trail,
+        "title": f"{trail} 通行止め",
+        "description": description,
+        "status": "CLOSURE",
+        "area": "OKUTAMA",
+    }
+
+
+def test_evaluate():
+    labels = {0: 0, 1: 1, 2: None, 3: None, 4: 2}
+    matches = [
+        (0, 0, 1.0, "完全一致"),  # 正解
+        (1, 2, 0.8, "類似度同定"),  # 誤った既存レコード（FP + FN）
+        (2, 3, 0.7, "類似度同定"),  # 新規が正解（FP）
+        (5, 4, 0.9, "類似度同定"),  # ラベルなしは対象外
+    ]
+    # 3: 新規が正解で対応付けなし（正解、数えない） / 4: 対応付けなし（FN）
+
+    accuracy = evaluate(matches, labels)
+
+    assert (accuracy.tp, accuracy.fp, accuracy.fn) == (1, 2, 2)
+    assert accuracy.precision == 1 / 3
+    assert accuracy.recall == 1 / 3
+    assert accuracy.to_dict()["f1"] == 0.3333
+
+
+def test_accuracy_empty():
+    assert Accuracy().to_dict() == {"tp": 0, "fp": 0, "fn": 0, "precision": 0.0, "recall": 0.0, "f1": 0.0}
+
+
+def test_auto_labels():
+    previous = [_record("大岳山", "鋸尾根"), _record("酉谷山／雲取山", "富田新道"), _record("御岳山", "七代の滝")]
+    latest = [
+        _record("大岳山", "鋸尾根"),  # 一意に一致
+        _record("雲取山", "富田新道"),  # 山名の粒度違い（ラベルなし）
+        _record("高尾山", "稲荷山コース"),  # 山名・登山道名とも既存になし（新規）
+        _record("御岳山", "ロックガーデン"),  # 同じ山の別の登山道（ラベルなし）
+    ]
+    _, existing_records, ai_records = build_reconcile_inputs(1, previous, latest)
+
+    assert auto_labels(existing_records, ai_records) == {0: 0, 2: None}
+
+
+def test_save_and_load_dataset(tmp_path):
+    cases = [GoldenCase("case", [_record("大岳山", "鋸尾根")], [_record("大岳山", "鋸尾根")], {0: 0, 1: None})]
+    path = tmp_path / "dataset.json"
+
+    save_dataset(cases, path)
+
+    assert load_dataset(path) == cases
+
+
+@pytest.fixture
+def sample_base_dir(tmp_path):
+    """情報源ID 7 の最新のサンプル出力"""
+    sample_dir = tmp_path / "sample" / "007_test_org"
+    sample_dir.mkdir(parents=True)
+    latest = [_record("大岳山", "鋸尾根"), _record("高尾山", "稲荷山コース")]
+    (sample_dir / "model_20260101_000000.json").write_text(
+        json.dumps({"trail_condition_records": latest}, ensure_ascii=False), encoding="utf-8"
+    )
+    return sample_dir.parent
+
+
+@pytest.mark.django_db
+def test_build_existing_dataset_from_db(sample_base_dir, data_source_factory, condition_factory):
+    """DBの既存レコードと最新のサンプル出力の組（サンプル出力のない情報源は対象外）"""
+    source = data_source_factory(7, id=7)
+    condition_factory(1, data_source=source, mountain_name_raw="大岳山", trail_name="鋸尾根")
+    condition_factory(2, data_source=source, mountain_name_raw="御岳山", trail_name="七代の滝", disabled=True)
+    condition_factory(3)
+
+    cases = build_existing_dataset(load_db_records(), "db", sample_base_dir)
+
+    assert len(cases) == 1
+    case = cases[0]
+    assert (case.name, case.source_id) == ("db/007_test_org/model_20260101_000000", 7)
+    assert [r["trail_name"] for r in case.previous] == ["鋸尾根"]
+    assert case.labels == {0: 0, 1: None}
+    # JSONに書き出して読み込める
+    save_dataset(cases, sample_base_dir / "dataset.json")
+    assert load_dataset(sample_base_dir / "dataset.json") == cases
+
+
+def test_build_existing_dataset_from_fixture(sample_base_dir, tmp_path):
+    fixture = tmp_path / "conditions.json"
+    fields = _record("大岳山", "鋸尾根") | {"source": 7, "reported_at": "2026-01-01", "disabled": False}
+    fixture.write_text(
+        json.dumps(
+            [
+                {"model": "trail_status.trailcondition", "pk": 1, "fields": fields},
+                {"model": "trail_status.trailcondition", "pk": 2, "fields": fields | {"disabled": True}},
+                {"model": "trail_status.datasource", "pk": 7, "fields": {"name": "テスト機関"}},
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    records = load_fixture_records(fixture)
+    cases = build_existing_dataset(records, "fixture", sample_base_dir)
+
+    assert records == {7: [_record("大岳山", "鋸尾根") | {"reported_at": "2026-01-01"}]}
+    assert [case.labels for case in cases] == [{0: 0, 1: None}]
+
+
+def test_bench_reconcile_command(tmp_path):
+    """データセットを読み込み、照合方式ごとの精度・速度・メモリをJSONで出力"""
+    name, previous, latest = load_sample_pairs()[0]
+    _, existing_records, ai_records = build_reconcile_inputs(1, previous, latest)
+    dataset = tmp_path / "dataset.json"
+    save_dataset([GoldenCase(name, previous, latest, auto_labels(existing_records, ai_records))], dataset)
+    output = tmp_path / "result.json"
+
+    call_command(
+        "bench_reconcile",
+        "--dataset",
+        str(dataset),
+        "--output",
+        str(output),
+        "--repeat",
+        "1",
+        "--variants",
+        "greedy",
+        "no_exact",
+        stderr=StringIO(),
+    )
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["dataset"]["cases"] == 1
+    assert report["dataset"]["pairs"] == len(previous) * len(latest)
+    assert set(report["variants"]) == {"greedy", "no_exact"}
+    for result in report["variants"].values():
+        assert result["tp"] > 0
+        assert 0 < result["f1"] <= 1
+        assert result["pairs_per_sec"] > 0
+        assert result["peak_memory_bytes"] > 0
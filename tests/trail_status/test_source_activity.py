@@ -0,0 +1,92 @@
+import pytest
+from django.contrib.admin.sites import site
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from trail_status.admin import enable_disabled
+from trail_status.models import AreaName, BlogFeed, SourceActivity, StatusType, TrailCondition
+from trail_status.services.source_activity import refresh_source_activity
+
+
+@pytest.fixture
+def sources(data_source_factory, condition_factory):
+    source_1, source_2 = data_source_factory(1), data_source_factory(2)
+    condition_factory(1, data_source=source_1)
+    condition_factory(2, data_source=source_1, area=AreaName.TANZAWA, status=StatusType.CLEAR)
+    condition_factory(3, data_source=source_2, disabled=True)
+    return source_1, source_2
+
+
+@pytest.mark.django_db
+class TestRefreshSourceActivity:
+    def test_counts(self, sources):
+        source_1, source_2 = sources
+        SourceActivity.objects.all().delete()
+
+        assert refresh_source_activity() == SourceActivity.objects.count()
+
+        activity = SourceActivity.objects.get(source=source_1)
+        assert activity.condition_count == 2
+        assert activity.status_counts == {StatusType.CLOSURE: 1, StatusType.CLEAR: 1}
+        assert activity.area_counts == {AreaName.OKUTAMA: 1, AreaName.TANZAWA: 1}
+        latest = TrailCondition.objects.filter(source=source_1).latest("updated_at")
+        assert activity.latest_changed_at == latest.updated_at
+        assert activity.latest_feed_at is None
+
+        # 無効化された登山道状況は集計しない
+        disabled = SourceActivity.objects.get(source=source_2)
+        assert disabled.condition_count == 0
+        assert disabled.status_counts == {}
+        assert disabled.latest_changed_at is None
+
+    def test_only_given_sources(self, sources, django_assert_num_queries):
+        source_1, source_2 = sources
+        SourceActivity.objects.all().delete()
+
+        # 登山道状況・巡視ブログの集計 + 保存
+        with django_assert_num_queries(3):
+            assert refresh_source_activity([source_1.id, source_1.id]) == 1
+
+        assert list(SourceActivity.objects.values_list("source_id", flat=True)) == [source_1.id]
+
+    def test_updated_on_save(self, sources, condition_factory):
+        """1件ずつの保存・削除（管理画面等）はシグナルで再集計"""
+        source_1, _ = sources
+        condition = condition_factory(4, data_source=source_1, area=AreaName.TANZAWA)
+        assert SourceActivity.objects.get(source=source_1).area_counts[AreaName.TANZAWA] == 2
+
+        condition.delete()
+        assert SourceActivity.objects.get(source=source_1).area_counts[AreaName.TANZAWA] == 1
+
+        feed = BlogFeed.objects.create(
+            title="記事", url="https://b.com/1", source=source_1, published_at=timezone.now()
+        )
+        assert SourceActivity.objects.get(source=source_1).latest_feed_at == feed.created_at
+
+    def test_admin_action(self, sources):
+        source_1, _ = sources
+        queryset = TrailCondition.objects.filter(source=source_1, disabled=False)
+
+        enable_disabled(site._registry[TrailCondition], RequestFactory().post("/"), queryset)
+
+        activity = SourceActivity.objects.get(source=source_1)
+        assert activity.condition_count == 0
+        assert activity.refreshed_at <= timezone.now()
+
+    def test_admin_bulk_delete(self, sources, condition_factory):
+        """一括削除は情報源ごとに1回だけ再集計"""
+        source_1, _ = sources
+        for i in range(4, 8):
+            condition_factory(i, data_source=source_1)
+        queryset = TrailCondition.objects.filter(source=source_1)
+
+        with CaptureQueriesContext(connection) as queries:
+            site._registry[TrailCondition].delete_queryset(RequestFactory().post("/"), queryset)
+
+        upserts = [
+            q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "trail_status_sourceactivity"')
+        ]
+        assert len(upserts) == 1
+        assert SourceActivity.objects.get(source=source_1).condition_count == 0
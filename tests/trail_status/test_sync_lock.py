@@ -0,0 +1,60 @@
+import pytest
+from django.db import connections
+
+from trail_status.services import sync_lock
+from trail_status.services.sync_lock import SyncLock
+
+
+@pytest.fixture
+def file_lock(monkeypatch):
+    """advisory lockを使わずファイルロックにフォールバック"""
+    monkeypatch.setattr(SyncLock, "use_advisory_lock", property(lambda self: False))
+
+
+class TestFileLock:
+    def test_acquire_and_release(self, file_lock, tmp_path):
+        """同一キーは解放されるまで二重に取得できない"""
+        first = SyncLock.for_run(lock_dir=tmp_path)
+        second = SyncLock.for_run(lock_dir=tmp_path)
+
+        assert first.acquire() is True
+        assert second.acquire() is False
+
+        first.release()
+        assert second.acquire() is True
+        second.release()
+
+    def test_different_keys(self, file_lock, tmp_path):
+        """情報源ごとのロックは独立している"""
+        with SyncLock.for_source(1, lock_dir=tmp_path) as lock_1:
+            lock_2 = SyncLock.for_source(2, lock_dir=tmp_path)
+            assert lock_1.acquired
+            assert lock_2.acquire() is True
+            lock_2.release()
+
+    def test_wait_timeout(self, file_lock, tmp_path, monkeypatch):
+        """待機時間内に取得できなければFalse"""
+        monkeypatch.setattr(SyncLock, "POLL_INTERVAL", 0.01)
+        with SyncLock.for_run(lock_dir=tmp_path):
+            assert SyncLock.for_run(lock_dir=tmp_path).acquire(timeout=0.05) is False
+
+
+@pytest.mark.django_db
+class TestAdvisoryLock:
+    def test_locked_by_other_session(self):
+        """別のDBセッションが保持するadvisory lockは取得できない"""
+        other = connections.create_connection("default")
+        try:
+            with other.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [sync_lock.LOCK_NAMESPACE, 12345])
+
+            lock = SyncLock.for_source(12345)
+            assert lock.acquire() is False
+
+            with other.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [sync_lock.LOCK_NAMESPACE, 12345])
+
+            assert lock.acquire() is True
+            lock.release()
+        finally:
+            other.close()
@@ -0,0 +1,21 @@
+from trail_status.services import tokenizer
+from trail_status.services.db_writer import DbWriter
+
+
+def test_decompose_text():
+    assert tokenizer.decompose_text("雲取山の登山道") == "雲取 山 の 登山 道"
+    assert "の" not in tokenizer.decompose_text("雲取山の登山道", noun_only=True).split()
+
+
+def test_cache_shared_across_writers():
+    """キャッシュは正規化後のテキストをキーに、DbWriterのインスタンス間で共有される"""
+    tokenizer.cache_clear()
+    writer_1 = DbWriter.__new__(DbWriter)
+    writer_2 = DbWriter.__new__(DbWriter)
+
+    writer_1.decompose_text("雲取山　登山道")
+    writer_2.decompose_text("雲取山登山道")  # 全角空白の有無は正規化で吸収
+
+    info = tokenizer.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
@@ -0,0 +1,117 @@
+import gzip
+from unittest.mock import MagicMock
+
+import brotli
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from trail_status.services import compression
+from trail_status.services.compression import accepted_encodings, negotiate
+
+
+@pytest.fixture
+def conditions(data_source_factory, condition_factory):
+    source = data_source_factory(1)
+    return [condition_factory(i, data_source=source) for i in range(20)]
+
+
+class TestNegotiate:
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            ("gzip, deflate, br", ["br", "gzip"]),
+            ("gzip;q=1.0, br;q=0.5", ["gzip", "br"]),
+            ("br;q=0, gzip", ["gzip"]),
+            ("*", ["br", "gzip"]),
+            ("identity", []),
+            ("", []),
+        ],
+    )
+    def test_accepted_encodings(self, header, expected):
+        assert accepted_encodings(header) == expected
+
+    def test_negotiate(self):
+        assert negotiate("gzip, br") == "br"
+        assert negotiate("gzip") == "gzip"
+        assert negotiate("identity") is None
+
+
+@pytest.mark.django_db
+class TestCompressionMiddleware:
+    def test_brotli(self, conditions, client):
+        url = reverse("trail_status:trail-list")
+        identity = client.get(url)
+        response = client.get(url, headers={"Accept-Encoding": "gzip, deflate, br"})
+
+        assert "Content-Encoding" not in identity.headers
+        assert response.headers["Content-Encoding"] == "br"
+        assert brotli.decompress(response.content) == identity.content
+        assert response.headers["Content-Length"] == str(len(response.content))
+        assert response.headers["ETag"] == f"W/{identity.headers['ETag']}"
+        assert "Accept-Encoding" in response.headers["Vary"]
+
+        # 弱い ETag でも再検証できる
+        not_modified = client.get(url, headers={"Accept-Encoding": "br", "If-None-Match": response.headers["ETag"]})
+        assert not_modified.status_code == 304
+
+    def test_gzip(self, conditions, client):
+        url = reverse("trail_status:trail-list")
+        identity = client.get(url)
+        response = client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.content) == identity.content
+
+    def test_not_modified_after_compressed(self, conditions, client):
+        """圧縮した200応答の後の304応答も同じ検証子（弱い ETag）"""
+        url = reverse("trail_status:trail-list")
+        response = client.get(url, headers={"Accept-Encoding": "br"})
+
+        not_modified = client.get(url, headers={"Accept-Encoding": "br", "If-None-Match": response.headers["ETag"]})
+
+        assert not_modified.status_code == 304
+        assert not_modified.headers["ETag"] == response.headers["ETag"]
+        assert "Accept-Encoding" in not_modified.headers["Vary"]
+
+        # 圧縮しないクライアントには強い ETag
+        identity = client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+        assert identity.status_code == 304
+        assert identity.headers["ETag"] == response.headers["ETag"].removeprefix("W/")
+
+    def test_compressed_once(self, conditions, client, monkeypatch):
+        """同じ内容は再圧縮せずキャッシュを使う"""
+        compress = MagicMock(wraps=compression.compress)
+        monkeypatch.setattr(compression, "compress", compress)
+        url = reverse("trail_status:trail-list")
+
+        for _ in range(3):
+            client.get(url, headers={"Accept-Encoding": "gzip"})
+
+        assert compress.call_count == 1
+
+    def test_not_compressed(self, conditions, client, admin_client):
+        # 非公開のページ（管理画面）
+        response = admin_client.get(reverse("admin:index"), headers={"Accept-Encoding": "br"})
+        assert "Content-Encoding" not in response.headers
+
+        # 304
+        url = reverse("trail_status:trail-list")
+        etag = client.get(url).headers["ETag"]
+        response = client.get(url, headers={"Accept-Encoding": "br", "If-None-Match": etag})
+        assert response.status_code == 304
+        assert "Content-Encoding" not in response.headers
+
+
+@pytest.mark.django_db
+def test_static_page_brotli(conditions, settings, tmp_path, client):
+    settings.STATIC_PAGES_DIR = str(tmp_path)
+    call_command("render_static")
+    client.get("/")  # 検証子をキャッシュ
+
+    response = client.get("/", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.content == (tmp_path / "index.html.br").read_bytes()
+    assert brotli.decompress(response.content) == (tmp_path / "index.html").read_bytes()
+    assert response.headers["ETag"].startswith("W/")
@@ -0,0 +1,82 @@
+import pytest
+from django.urls import reverse
+
+from trail_status.models import AreaName, StatusType, TrailCondition
+from trail_status.services import facets
+from trail_status.services.facets import facet_counts
+from trail_status.views import _get_sidebar_context
+
+
+@pytest.fixture
+def conditions(data_source_factory, condition_factory):
+    source_1, source_2 = data_source_factory(1), data_source_factory(2)
+    condition_factory(1, data_source=source_1)
+    condition_factory(2, data_source=source_1, area=AreaName.TANZAWA, status=StatusType.CLEAR)
+    condition_factory(3, data_source=source_2, area=AreaName.TANZAWA)
+    condition_factory(4, data_source=source_2, disabled=True)
+    return source_1, source_2
+
+
+@pytest.mark.django_db
+class TestFacetCounts:
+    def test_counts(self, conditions, django_assert_num_queries):
+        source_1, source_2 = conditions
+
+        with django_assert_num_queries(1):
+            counts = facet_counts(TrailCondition.objects.filter(disabled=False))
+
+        assert counts == {
+            "area": {AreaName.OKUTAMA: 1, AreaName.TANZAWA: 2},
+            "status": {StatusType.CLOSURE: 2, StatusType.CLEAR: 1},
+            "source": {source_1.id: 2, source_2.id: 1},
+        }
+
+    def test_portable_fallback(self, conditions, django_assert_num_queries):
+        """GROUPING SETS を使わない集計（SQLite等）も同じ結果"""
+        queryset = TrailCondition.objects.filter(area=AreaName.TANZAWA)
+        columns = ["area", "status", "source_id"]
+
+        with django_assert_num_queries(1):
+            fallback = sorted(facets._combined_group_by(queryset, columns))
+
+        assert fallback == sorted(facets._grouping_sets(queryset, columns))
+
+    def test_empty(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            counts = facet_counts(TrailCondition.objects.filter(disabled=True))
+
+        assert counts == {"area": {}, "status": {}, "source": {}}
+
+
+@pytest.mark.django_db
+class TestFacetQueryCount:
+    """クエリ数の回帰テスト"""
+
+    def test_sidebar_context(self, conditions, django_assert_num_queries):
+        # 情報源と更新状況の集計（SourceActivity）のみ
+        with django_assert_num_queries(1):
+            sidebar = _get_sidebar_context()
+
+        assert sidebar["status_choices"] == [
+            (StatusType.CLOSURE, StatusType.CLOSURE.label, 2),
+            (StatusType.CLEAR, StatusType.CLEAR.label, 1),
+        ]
+
+    def test_trail_list_filtered_counts(self, conditions, client, django_assert_max_num_queries):
+        source_1, _ = conditions
+        url = reverse("trail_status:trail-list")
+        client.get(url)  # サイドバーをキャッシュ
+
+        with django_assert_max_num_queries(10) as queries:
+            response = client.get(url, {"area": AreaName.TANZAWA})
+
+        # 件数集計は絞り込み結果に対する1回のみ
+        group_by_queries = [q["sql"] for q in queries.captured_queries if "GROUP BY" in q["sql"]]
+        assert len(group_by_queries) == 1
+        assert "GROUPING SETS" in group_by_queries[0]
+
+        assert response.context["area_choices"] == [
+            (AreaName.OKUTAMA, AreaName.OKUTAMA.label, 0),
+            (AreaName.TANZAWA, AreaName.TANZAWA.label, 2),
+        ]
+        assert (source_1.id, source_1.name, 1) in response.context["source_choices"]
@@ -0,0 +1,93 @@
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from django.urls import reverse
+
+from trail_status.models import TrailCondition
+from trail_status.services import http_cache, site_cache
+
+
+@pytest.mark.django_db
+class TestConditionalResponse:
+    def test_headers(self, condition_factory, client):
+        condition_factory(1)
+
+        response = client.get(reverse("trail_status:trail-list"))
+
+        assert response.status_code == 200
+        assert response.headers["ETag"]
+        assert response.headers["Last-Modified"]
+        cache_control = {value.strip() for value in response.headers["Cache-Control"].split(",")}
+        assert cache_control == {"public", "max-age=0", "s-maxage=600", "stale-while-revalidate=3600"}
+
+    @pytest.mark.parametrize(
+        "url_name", ["trail_status:trail-list", "trail_status:source-list", "trail_status:blog-list"]
+    )
+    def test_not_modified_without_queries(self, url_name, condition_factory, client, django_assert_num_queries):
+        condition_factory(1)
+        etag = client.get(reverse(url_name)).headers["ETag"]
+
+        with django_assert_num_queries(0):
+            response = client.get(reverse(url_name), headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert "s-maxage=600" in response.headers["Cache-Control"]
+
+    def test_if_modified_since(self, condition_factory, client):
+        condition_factory(1)
+        last_modified = client.get(reverse("trail_status:source-list")).headers["Last-Modified"]
+
+        response = client.get(reverse("trail_status:source-list"), headers={"If-Modified-Since": last_modified})
+
+        assert response.status_code == 304
+
+    def test_changed_after_sync(self, condition_factory, client):
+        condition = condition_factory(1)
+        etag = client.get(reverse("trail_status:trail-list")).headers["ETag"]
+
+        # 管理画面の一括操作（updated_at は変わらない）でも件数の変化で検証子が変わる
+        TrailCondition.objects.filter(id=condition.id).update(disabled=True)
+        site_cache.bump_content_version()
+        response = client.get(reverse("trail_status:trail-list"), headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_not_found_not_shared(self, client):
+        response = client.get(reverse("trail_status:trail-detail", args=[999999]))
+
+        assert response.status_code == 404
+        assert "s-maxage" not in response.headers.get("Cache-Control", "")
+
+
+class TestPurgeCdn:
+    def test_disabled(self, settings, monkeypatch):
+        settings.CLOUDFLARE_ZONE_ID = ""
+        post = MagicMock()
+        monkeypatch.setattr(httpx, "post", post)
+
+        assert http_cache.purge_cdn() is False
+        post.assert_not_called()
+
+    def test_purge_everything(self, settings, monkeypatch):
+        settings.CLOUDFLARE_ZONE_ID = "zone"
+        settings.CLOUDFLARE_API_TOKEN = "token"
+        post = MagicMock()
+        monkeypatch.setattr(httpx, "post", post)
+
+        assert http_cache.purge_cdn() is True
+        post.assert_called_once_with(
+            "https://api.cloudflare.com/client/v4/zones/zone/purge_cache",
+            headers={"Authorization": "Bearer token"},
+            json={"purge_everything": True},
+            timeout=10,
+        )
+
+    def test_failure(self, settings, monkeypatch):
+        settings.CLOUDFLARE_ZONE_ID = "zone"
+        settings.CLOUDFLARE_API_TOKEN = "token"
+        monkeypatch.setattr(httpx, "post", MagicMock(side_effect=httpx.ConnectError("接続エラー")))
+
+        assert http_cache.purge_cdn() is False
@@ -0,0 +1,82 @@
+"""
+公開ページのクエリ数の上限（件数によらず一定であること）
+
+サイドバー・HTTPキャッシュの検証子はキャッシュ済み（2回目以降の表示）のクエリ数を検証する
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from trail_status.models import AreaName, BlogFeed, MountainGroup
+
+# (URL名, クエリパラメータ, クエリ数)
+BUDGETS = [
+    # 1ページ分の行（情報源はJOIN） + 上部の更新情報
+    ("trail_status:trail-list", {}, 2),
+    # + 絞り込み結果の件数集計
+    ("trail_status:trail-list", {"area": AreaName.OKUTAMA}, 3),
+    ("trail_status:trail-list", {"q": "テスト"}, 3),
+    ("trail_status:trail-rows", {}, 1),
+    # 登山道状況（情報源・山グループはJOIN）
+    ("trail_status:trail-detail", None, 1),
+    ("trail_status:source-list", {}, 1),
+    # 情報源 + 情報源ごとの最新4件のブログ（ウィンドウ関数）
+    ("trail_status:blog-list", {}, 2),
+]
+
+
+def _create_data(size: int, data_source_factory, condition_factory):
+    group = MountainGroup.objects.get_or_create(name="テスト山", area=AreaName.OKUTAMA)[0]
+    conditions = []
+    for n in range(size):
+        source = data_source_factory(f"web{size}_{n}")
+        conditions.append(condition_factory(f"{size}_{n}", data_source=source, mountain_group=group))
+
+        blog = data_source_factory(f"blog{size}_{n}", data_format="BLOG")
+        for i in range(6):
+            BlogFeed.objects.create(
+                title=f"記事{i}",
+                summary="概要",
+                url=f"https://blog{n}.com/{i}",
+                source=blog,
+                published_at=timezone.now(),
+            )
+    return conditions
+
+
+def _count_queries(client, url_name, params, condition) -> tuple[int, list[str]]:
+    url = reverse(url_name, args=[condition.id]) if params is None else reverse(url_name)
+    client.get(url, params)  # サイドバー・検証子をキャッシュ
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    assert response.status_code == 200
+    return len(queries), [query["sql"] for query in queries.captured_queries]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(("url_name", "params", "budget"), BUDGETS)
+def test_query_budget(url_name, params, budget, client, data_source_factory, condition_factory):
+    small = _create_data(1, data_source_factory, condition_factory)
+    count, _ = _count_queries(client, url_name, params, small[0])
+    assert count == budget
+
+    # 件数が増えてもクエリ数は変わらない
+    large = _create_data(5, data_source_factory, condition_factory)
+    count, queries = _count_queries(client, url_name, params, large[-1])
+    assert count == budget, "\n".join(queries)
+
+
+@pytest.mark.django_db
+def test_blog_feeds_window(client, data_source_factory, condition_factory):
+    _create_data(2, data_source_factory, condition_factory)
+    client.get(reverse("trail_status:blog-list"))
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("trail_status:blog-list"))
+
+    assert any("ROW_NUMBER() OVER" in query["sql"] for query in queries.captured_queries)
+    assert all(len(source.recent_feeds) == 4 for source in response.context["object_list"])
@@ -0,0 +1,59 @@
+import pytest
+from django.template import Context, Template
+from django.urls import reverse
+
+from trail_status.models import StatusType, TrailCondition
+
+
+class TestStatusPresentation:
+    def test_all_choices(self):
+        presentations = [StatusType.get_presentation(status) for status in StatusType]
+
+        assert [p.label for p in presentations] == StatusType.labels
+        assert sorted(p.sort_order for p in presentations) == list(range(1, len(StatusType) + 1))
+        assert StatusType.get_presentation("CLOSURE").badge_class == "bg-red-100 text-red-700"
+
+    def test_unknown(self):
+        presentation = StatusType.get_presentation("UNKNOWN")
+
+        assert presentation.label == "UNKNOWN"
+        assert presentation.badge_class == "bg-blue-100 text-blue-700"
+        assert presentation.sort_order == 9
+
+    def test_template_tag(self):
+        template = Template(
+            "{% load trail_status_tags %}{% status_presentation code as s %}{{ s.sort_order }}|{{ s.badge_class }}"
+        )
+
+        assert template.render(Context({"code": StatusType.SNOW})) == "8|bg-cyan-100 text-cyan-700"
+
+
+@pytest.mark.django_db
+class TestRowFragmentCache:
+    def test_rows_cached_until_updated(self, condition_factory, client):
+        condition = condition_factory(1, status=StatusType.CLEAR)
+        url = reverse("trail_status:trail-rows")
+
+        response = client.get(url)
+        assert 'data-order="3"' in response.text
+        assert "bg-green-100 text-green-700" in response.text
+
+        # updated_at が変わらない更新は行のキャッシュを使う
+        TrailCondition.objects.filter(id=condition.id).update(title="キャッシュされない変更")
+        assert "キャッシュされない変更" not in client.get(url).text
+
+        condition.refresh_from_db()
+        condition.title = "保存による変更"
+        condition.save()
+        assert "保存による変更" in client.get(url).text
+
+    def test_source_rename_invalidates(self, condition_factory, client):
+        condition = condition_factory(1)
+        url = reverse("trail_status:trail-rows")
+        client.get(url)
+
+        source = condition.source
+        source.name = "名称変更後の機関"
+        source.save()
+
+        assert "名称変更後の機関" in client.get(url).text
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import pytest
+from django.urls import reverse
+
+from trail_status.models import AreaName, TrailCondition
+from trail_status.services import search
+from trail_status.services.db_writer import DbWriter
+from trail_status.services.search import search_conditions, search_terms
+
+
+@pytest.fixture
+def conditions(data_source_factory, condition_factory):
+    source = data_source_factory(1)
+    rows = [
+        condition_factory(1, data_source=source, mountain_name_raw="雲取山", trail_name="鴨沢ルート"),
+        condition_factory(2, data_source=source, mountain_name_raw="雲取山", title="倒木", area=AreaName.TANZAWA),
+        condition_factory(3, data_source=source, mountain_name_raw="大岳山", description="ABC林道は通行止め"),
+        condition_factory(4, data_source=source, mountain_name_raw="雲取山", disabled=True),
+    ]
+    # 照合キー（分かち書き）は DbWriter が保存時に生成する
+    for row in rows:
+        DbWriter.fill_match_keys(row)
+        row.save()
+    return rows
+
+
+def _search(query: str) -> set[int]:
+    return set(search_conditions(TrailCondition.objects.filter(disabled=False), query).values_list("id", flat=True))
+
+
+def test_search_terms():
+    assert search_terms(" 雲取山　倒木 ") == ["雲取山", "倒木"]
+    assert search_terms("") == []
+    assert len(search_terms("あ " * 10)) == search.MAX_TERMS
+
+
+@pytest.mark.django_db
+class TestSearchConditions:
+    def test_partial_match(self, conditions):
+        first, second, third, _ = conditions
+
+        assert _search("雲取") == {first.id, second.id}
+        assert _search("鴨沢") == {first.id}
+        assert _search("abc") == {third.id}
+        # 複数語は全ての語に一致する行
+        assert _search("雲取山 倒木") == {second.id}
+        assert _search("") == {row.id for row in conditions[:3]}
+
+    def test_normalized_tokens(self, conditions):
+        """全角の検索語も分かち書き（NFKC正規化済み）の全文検索で一致"""
+        assert _search("ＡＢＣ") == {conditions[2].id}
+
+    def test_fallback_without_postgres(self, conditions, monkeypatch):
+        """PostgreSQL以外は部分一致のみ"""
+        monkeypatch.setattr(search, "connections", {"default": SimpleNamespace(vendor="sqlite")})
+
+        assert _search("雲取山 倒木") == {conditions[1].id}
+        assert _search("ＡＢＣ") == set()
+
+    def test_fallback_without_sudachi(self, conditions, monkeypatch):
+        """Sudachiのない環境（サーバー用の依存関係）は部分一致のみ"""
+        monkeypatch.setattr(search, "decompose_text", None)
+
+        assert _search("雲取") == {conditions[0].id, conditions[1].id}
+        assert _search("ＡＢＣ") == set()
+
+
+@pytest.mark.django_db
+class TestTrailListSearch:
+    def test_filtered_list(self, conditions, client):
+        first, second, _, _ = conditions
+        response = client.get(reverse("trail_status:trail-list"), {"q": "雲取山"})
+
+        assert [c.id for c in response.context["conditions"]] == [second.id, first.id]
+        assert response.context["current_query"] == "雲取山"
+        assert response.context["filter_query"] == "q=%E9%9B%B2%E5%8F%96%E5%B1%B1"
+        # サイドバーの件数は検索結果の件数
+        assert (AreaName.TANZAWA, AreaName.TANZAWA.label, 1) in response.context["area_choices"]
+        assert 'content="noindex, follow"' in response.text
+
+    def test_rows_endpoint(self, conditions, client):
+        response = client.get(reverse("trail_status:trail-rows"), {"q": "倒木"})
+
+        assert [c.id for c in response.context["conditions"]] == [conditions[1].id]
@@ -0,0 +1,108 @@
+import pytest
+from django.contrib.admin.sites import site
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from trail_status.models import AreaName, MountainAlias, MountainGroup, StatusType, TrailCondition
+from trail_status.services import http_cache, site_cache
+from trail_status.services.db_writer import DbWriter
+from trail_status.services.prompt_utils import PromptFile
+from trail_status.services.types import ResultSingle, SourceSchemaSingle
+from trail_status.views import _get_sidebar_context
+
+
+def _sidebar():
+    return site_cache.get_or_build(site_cache.SIDEBAR_CACHE_KEY, _get_sidebar_context)
+
+
+@pytest.mark.django_db
+class TestSidebarCache:
+    def test_cached_until_bump(self, condition_factory):
+        condition_factory(1)
+        with CaptureQueriesContext(connection) as first:
+            sidebar = _sidebar()
+        assert len(first) > 0
+        assert sidebar["area_choices"] == [(AreaName.OKUTAMA, AreaName.OKUTAMA.label, 1)]
+
+        # 同期前の書き込みはキャッシュに反映されない（クエリなし）
+        condition_factory(2, area=AreaName.TANZAWA)
+        with CaptureQueriesContext(connection) as second:
+            assert _sidebar() == sidebar
+        assert len(second) == 0
+
+        site_cache.bump_content_version()
+        assert (AreaName.TANZAWA, AreaName.TANZAWA.label, 1) in _sidebar()["area_choices"]
+
+    def test_bump_in_other_process(self, condition_factory, monkeypatch):
+        """別プロセス（バッチの同期）のキャッシュでバージョンを上げても、DBの検証子の変化で再計算"""
+        condition_factory(1)
+        sidebar = _sidebar()
+        version = site_cache.get_content_version()
+
+        # バッチ側のキャッシュで書き込み・バージョン更新（このプロセスのバージョンは変わらない）
+        with monkeypatch.context() as m:
+            m.setattr(site_cache, "cache", LocMemCache("batch", {}))
+            condition_factory(2, area=AreaName.TANZAWA)
+            site_cache.bump_content_version()
+        assert site_cache.get_content_version() == version
+
+        # 検証子のキャッシュの有効期限（VALIDATOR_CACHE_TIMEOUT）が切れた後を再現
+        cache.delete(http_cache.VALIDATOR_CACHE_KEY, version=version)
+        assert _sidebar() != sidebar
+        assert (AreaName.TANZAWA, AreaName.TANZAWA.label, 1) in _sidebar()["area_choices"]
+
+    def test_bump_without_version(self):
+        """バージョン未設定（キャッシュ消去後）でも上げられる"""
+        version = site_cache.bump_content_version()
+
+        assert site_cache.get_content_version() == version
+        assert site_cache.bump_content_version() == version + 1
+
+    def test_page_views_share_cache(self, condition_factory, client):
+        """サイドバーは各ページで共有され、2回目以降の表示ではサイドバー分のクエリが発生しない"""
+        condition = condition_factory(1)
+        client.get(reverse("trail_status:trail-list"))
+
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("trail_status:source-list"))
+        assert not any("GROUP BY" in query["sql"] for query in queries.captured_queries)
+
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("trail_status:trail-detail", args=[condition.id]))
+        assert not any("GROUP BY" in query["sql"] for query in queries.captured_queries)
+
+    def test_db_writer_commit_bumps_version(self, condition_factory, django_capture_on_commit_callbacks):
+        condition = condition_factory(1)
+        source = condition.source
+        writer = DbWriter(
+            SourceSchemaSingle(id=source.id, name=source.name, url1=source.url1, prompt_file=PromptFile()),
+            ResultSingle(success=True, message="OK"),
+        )
+        version = site_cache.get_content_version()
+
+        # 変更なしでは無効化しない
+        with django_capture_on_commit_callbacks(execute=True):
+            writer._commit_trail_condition([], [])
+        assert site_cache.get_content_version() == version
+
+        condition.status = StatusType.CLEAR
+        with django_capture_on_commit_callbacks(execute=True):
+            writer._commit_trail_condition([condition], [])
+        assert site_cache.get_content_version() == version + 1
+
+    @pytest.mark.parametrize("model", [TrailCondition, MountainAlias])
+    def test_admin_bulk_delete_bumps_version(self, model, condition_factory, rf, django_capture_on_commit_callbacks):
+        """管理画面の一括削除（山の別名を含む）でも無効化"""
+        condition_factory(1)
+        group = MountainGroup.objects.create(name="テスト山", area=AreaName.OKUTAMA)
+        MountainAlias.objects.create(alias_name="テスト山1", mountain_group=group)
+        version = site_cache.get_content_version()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            site._registry[model].delete_queryset(rf.post("/"), model.objects.all())
+
+        assert not model.objects.exists()
+        assert site_cache.get_content_version() == version + 1
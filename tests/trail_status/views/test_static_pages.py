@@ -0,0 +1,141 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+from trail_status.models import AreaName
+from trail_status.services import site_cache
+from trail_status.services.static_pages import MANIFEST_FILE, StaticPageRenderer, page_file_name
+
+
+@pytest.fixture
+def conditions(data_source_factory, condition_factory):
+    source = data_source_factory(1)
+    return [
+        condition_factory(1, data_source=source),
+        condition_factory(2, data_source=source, area=AreaName.TANZAWA),
+    ]
+
+
+@pytest.fixture
+def static_dir(settings, tmp_path):
+    settings.STATIC_PAGES_DIR = str(tmp_path)
+    return tmp_path
+
+
+def test_page_file_name():
+    assert page_file_name("/") == "index.html"
+    assert page_file_name("/?area=OKUTAMA") == "index@area-OKUTAMA.html"
+    assert page_file_name("/trails/12/") == "trails_12.html"
+
+
+@pytest.mark.django_db
+class TestRenderStatic:
+    def test_render_all_pages(self, conditions, static_dir):
+        call_command("render_static")
+
+        manifest = json.loads((static_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+        source = conditions[0].source
+        assert set(manifest["pages"]) == {
+            "/",
+            f"/?area={AreaName.OKUTAMA}",
+            f"/?area={AreaName.TANZAWA}",
+            "/?status=CLOSURE",
+            f"/?source={source.id}",
+            "/sources/",
+            "/blogs/",
+            *(f"/trails/{condition.id}/" for condition in conditions),
+        }
+        html = (static_dir / "index.html").read_bytes()
+        assert "テスト通行止め1".encode() in html
+        assert gzip.decompress((static_dir / "index.html.gz").read_bytes()) == html
+
+    def test_only_changed_pages(self, conditions, static_dir):
+        renderer = StaticPageRenderer(static_dir)
+        renderer.run()
+
+        # 変更なし
+        assert renderer.run().rendered == []
+
+        # 詳細の変更は一覧と該当の詳細ページのみ再出力（サイドバーの件数は不変）
+        changed, unchanged = conditions
+        changed.title = "変更後のタイトル"
+        changed.save()
+        result = renderer.run()
+
+        assert f"/trails/{changed.id}/" in result.rendered
+        assert f"/trails/{unchanged.id}/" in result.skipped
+        assert "/" in result.rendered
+        assert "変更後のタイトル".encode() in (static_dir / f"trails_{changed.id}.html").read_bytes()
+
+    def test_disabled_page_removed(self, conditions, static_dir):
+        renderer = StaticPageRenderer(static_dir)
+        renderer.run()
+        disabled = conditions[1]
+        disabled.disabled = True
+        disabled.save()
+
+        result = renderer.run()
+
+        assert f"/trails/{disabled.id}/" in result.removed
+        assert f"/?area={AreaName.TANZAWA}" in result.removed
+        assert not (static_dir / f"trails_{disabled.id}.html").exists()
+        assert not (static_dir / f"trails_{disabled.id}.html.gz").exists()
+
+
+@pytest.mark.django_db
+class TestStaticPageMiddleware:
+    def test_serves_prerendered_page(self, conditions, static_dir, client, django_assert_num_queries):
+        call_command("render_static")
+        client.get("/", headers={"Accept-Encoding": "gzip"})  # 検証子をキャッシュ
+
+        with django_assert_num_queries(0):
+            response = client.get("/", {"area": AreaName.TANZAWA}, headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.content == (static_dir / f"index@area-{AreaName.TANZAWA}.html.gz").read_bytes()
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert "s-maxage" in response.headers["Cache-Control"]
+
+        not_modified = client.get("/", {"area": AreaName.TANZAWA}, headers={"If-None-Match": response.headers["ETag"]})
+        assert not_modified.status_code == 304
+
+    def test_same_headers_as_django(self, conditions, static_dir, settings):
+        """事前レンダリングしたページと Django のビューで応答ヘッダー（X-Frame-Options 等）が同じ"""
+        call_command("render_static")
+        static_response = Client().get("/")
+        settings.STATIC_PAGES_DIR = ""
+        django_response = Client().get("/")
+
+        assert not static_response.templates
+        assert django_response.templates
+        static_headers, django_headers = dict(static_response.headers), dict(django_response.headers)
+        # Vary は追加の順序が異なり、事前レンダリングしたページは圧縮版の選択のため Accept-Encoding を含む
+        assert set(static_headers.pop("Vary").split(", ")) >= set(django_headers.pop("Vary").split(", "))
+        assert static_headers == django_headers
+        assert static_response.headers["X-Frame-Options"] == "DENY"
+
+    def test_fallback_to_django(self, conditions, static_dir, client):
+        call_command("render_static")
+
+        # 絞り込み以外のクエリ（ページ送り）は Django が表示
+        response = client.get(reverse("trail_status:trail-list"), {"cursor": "x"})
+        assert response.status_code == 404
+
+        # 事前レンダリング後に内容が変わった場合は Django が表示
+        conditions[0].title = "管理画面で変更"
+        conditions[0].save()
+        site_cache.bump_content_version()
+        response = client.get(reverse("trail_status:trail-detail", args=[conditions[0].id]))
+        assert response.templates
+        assert "管理画面で変更" in response.text
+
+    def test_not_used_without_setting(self, conditions, client):
+        response = client.get("/")
+
+        assert response.templates
+        assert "Content-Encoding" not in response.headers
@@ -1,8 +1,36 @@
+from datetime import timedelta
+
+import pytest
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
+
+from trail_status.models import DataSource
+from trail_status.views import _get_list_header_context
 
 
 class TestTrailListView(TestCase):
     def test_NO_DATA(self):
         response = self.client.get(reverse("trail_status:trail-list"))
-        self.assertEqual(response.status_code, 200)
\ No newline at end of file
+        self.assertEqual(response.status_code, 200)
+
+
+@pytest.mark.django_db
+class TestListHeader:
+    def test_recent_updated_sources(self, data_source_factory, condition_factory):
+        now = timezone.now()
+        old_source = data_source_factory(1)
+        DataSource.objects.filter(id=old_source.id).update(created_at=now - timedelta(days=30))
+        new_source = data_source_factory(2)  # 新規追加情報源（作成直後の同期）は除外
+        stale_source = data_source_factory(3)
+        DataSource.objects.filter(id=stale_source.id).update(created_at=now - timedelta(days=60))
+        condition_factory(1, data_source=old_source, synced_at=now - timedelta(days=1))
+        condition_factory(2, data_source=new_source, synced_at=now)
+        condition_factory(3, data_source=stale_source, synced_at=now - timedelta(days=20))
+        condition_factory(4, data_source=stale_source, synced_at=now, disabled=True)  # 無効化済みは対象外
+
+        header = _get_list_header_context()
+
+        assert [source["name"] for source in header["recent_updated_sources"]] == [old_source.name]
+        assert header["latest_sync_date"] == now
+        assert header["last_checked_at"] == max(DataSource.web.values_list("last_checked_at", flat=True))
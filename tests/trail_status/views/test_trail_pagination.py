@@ -0,0 +1,110 @@
+from datetime import date, timedelta
+
+import pytest
+from django.urls import reverse
+
+from trail_status.models import AreaName, TrailCondition
+from trail_status.services import keyset
+from trail_status.services.keyset import Cursor, InvalidCursor, keyset_page
+from trail_status.views import TrailFilterMixin
+
+
+@pytest.fixture
+def conditions(data_source_factory, condition_factory):
+    """報告日の重複・未設定を含む登山道状況"""
+    source = data_source_factory(1)
+    today = date.today()
+    reported = [today, today, None, today - timedelta(days=1), None, today - timedelta(days=3), today]
+    for i, reported_at in enumerate(reported):
+        condition_factory(i, data_source=source, reported_at=reported_at)
+    condition_factory(99, data_source=source, disabled=True)
+    return source
+
+
+def _all_pages(queryset, page_size):
+    ids, cursor = [], None
+    while True:
+        page = keyset_page(queryset, cursor, page_size)
+        ids.extend(condition.id for condition in page.object_list)
+        if not page.has_next:
+            return ids
+        cursor = Cursor.decode(page.next_cursor.encode())
+
+
+@pytest.mark.django_db
+class TestKeysetPage:
+    @pytest.mark.parametrize("page_size", [1, 2, 3, 7, 10])
+    def test_pages_cover_all_rows_in_order(self, conditions, page_size):
+        queryset = TrailCondition.objects.filter(disabled=False)
+        expected = list(queryset.order_by(*keyset.KEYSET_ORDERING).values_list("id", flat=True))
+
+        assert _all_pages(queryset, page_size) == expected
+        # 報告日なしは末尾
+        assert [c.reported_at for c in TrailCondition.objects.filter(id__in=expected[-2:])] == [None, None]
+
+    def test_one_query_per_page(self, conditions, django_assert_num_queries):
+        queryset = TrailCondition.objects.filter(disabled=False)
+        first = keyset_page(queryset, page_size=3)
+
+        with django_assert_num_queries(1) as queries:
+            keyset_page(queryset, first.next_cursor, page_size=3)
+        # OFFSET・件数集計を使わない
+        sql = queries.captured_queries[0]["sql"]
+        assert "OFFSET" not in sql and "COUNT" not in sql
+
+    @pytest.mark.parametrize("value", ["", "abc", "e30", "WzEsMl0"])
+    def test_invalid_cursor(self, value):
+        with pytest.raises(InvalidCursor):
+            Cursor.decode(value)
+
+
+@pytest.mark.django_db
+class TestTrailListPagination:
+    def test_first_page_and_rows_fragment(self, conditions, client, monkeypatch):
+        monkeypatch.setattr(TrailFilterMixin, "page_size", 4)
+
+        response = client.get(reverse("trail_status:trail-list"))
+        first = response.context["conditions"]
+        assert len(first) == 4
+        assert response.context["next_cursor"]
+        assert 'id="load-more"' in response.text
+
+        response = client.get(reverse("trail_status:trail-rows"), {"cursor": response.context["next_cursor"]})
+        assert response.status_code == 200
+        assert response.templates[0].name == "trail_status/trail_rows.html"
+        rest = response.context["conditions"]
+        assert len(rest) == 3
+        assert response.context["next_cursor"] == ""
+        assert response.text.strip().startswith('<tbody data-next-cursor="">')
+        assert not {c.id for c in first} & {c.id for c in rest}
+
+    def test_filter_kept_in_next_link(self, data_source_factory, condition_factory, client, monkeypatch):
+        monkeypatch.setattr(TrailFilterMixin, "page_size", 1)
+        source = data_source_factory(1)
+        for i in range(3):
+            condition_factory(i, data_source=source, area=AreaName.TANZAWA)
+        condition_factory(9, data_source=source)
+
+        response = client.get(reverse("trail_status:trail-list"), {"area": AreaName.TANZAWA})
+
+        assert response.context["filter_query"] == f"area={AreaName.TANZAWA}"
+        assert f'data-filter-query="area={AreaName.TANZAWA}"' in response.text
+
+        response = client.get(
+            reverse("trail_status:trail-rows"), {"area": AreaName.TANZAWA, "cursor": response.context["next_cursor"]}
+        )
+        assert [c.area for c in response.context["conditions"]] == [AreaName.TANZAWA]
+
+    def test_cursor_page_not_indexed(self, conditions, client, monkeypatch):
+        monkeypatch.setattr(TrailFilterMixin, "page_size", 4)
+        first = client.get(reverse("trail_status:trail-list"))
+
+        response = client.get(reverse("trail_status:trail-list"), {"cursor": first.context["next_cursor"]})
+
+        assert response.status_code == 200
+        assert len(response.context["conditions"]) == 3
+        assert '<meta name="robots" content="noindex, follow">' in response.text
+
+    def test_invalid_cursor_404(self, client):
+        response = client.get(reverse("trail_status:trail-rows"), {"cursor": "invalid"})
+        assert response.status_code == 404
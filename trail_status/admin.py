@@ -1,21 +1,64 @@
 from django.contrib import admin
-
-from .models import BlogFeed, DataSource, LlmUsage, MountainAlias, MountainGroup, PromptBackup, TrailCondition
+from django.db import transaction
+
+from .models import (
+    BlogFeed,
+    DataSource,
+    LlmUsage,
+    MountainAlias,
+    MountainGroup,
+    PromptBackup,
+    SourceActivity,
+    TrailCondition,
+)
+from .services import site_cache
+from .services.source_activity import deferred_refresh, refresh_source_activity
 
 
 # 一括操作の設定
 @admin.action(description="情報の無効化の解除")
 def unable_disabled(modeladmin, request, queryset):
+    source_ids = set(queryset.values_list("source_id", flat=True))  # 絞り込み条件によっては更新後に取得できない
     queryset.update(disabled=False)
+    refresh_source_activity(source_ids)
+    transaction.on_commit(site_cache.bump_content_version)
 
 
 @admin.action(description="情報の無効化")
 def enable_disabled(modeladmin, request, queryset):
+    source_ids = set(queryset.values_list("source_id", flat=True))  # 絞り込み条件によっては更新後に取得できない
     queryset.update(disabled=True)
+    refresh_source_activity(source_ids)
+    transaction.on_commit(site_cache.bump_content_version)
+
+
+class ContentCacheAdminMixin:
+    """公開ページに表示するモデル（山グループ・別名は登山道状況の山名に反映）の保存・削除時に表示用キャッシュを無効化"""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        transaction.on_commit(site_cache.bump_content_version)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(site_cache.bump_content_version)
+
+    def delete_queryset(self, request, queryset):
+        # 一括削除アクション
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(site_cache.bump_content_version)
+
+
+class SourceActivityAdminMixin:
+    """情報源に属するモデルの一括削除で、情報源の更新状況の再集計（シグナル）を情報源ごとに1回にまとめる"""
+
+    def delete_queryset(self, request, queryset):
+        with deferred_refresh():
+            super().delete_queryset(request, queryset)
 
 
 @admin.register(DataSource)
-class DataSourceAdmin(admin.ModelAdmin):
+class DataSourceAdmin(ContentCacheAdminMixin, admin.ModelAdmin):
     list_display = [
         "name",
         "id",
@@ -47,6 +90,7 @@ class DataSourceAdmin(admin.ModelAdmin):
                 )
             },
         ),
+        ("レコード照合", {"fields": ("matching_mode", "matching_params")}),
         ("ハッシュ追跡", {"fields": ("content_hash", "last_scraped_at", "last_checked_at")}),
         ("メタデータ", {"fields": ("created_at", "updated_at")}),
     )
@@ -60,7 +104,7 @@ class DataSourceAdmin(admin.ModelAdmin):
 
 
 @admin.register(MountainGroup)
-class MountainGroupAdmin(admin.ModelAdmin):
+class MountainGroupAdmin(ContentCacheAdminMixin, admin.ModelAdmin):
     list_display = ["id", "name", "area_display", "latitude", "longitude", "aliases_count"]
     list_filter = ["area"]
     search_fields = ["name"]
@@ -82,7 +126,7 @@ class MountainGroupAdmin(admin.ModelAdmin):
 
 
 @admin.register(MountainAlias)
-class MountainAliasAdmin(admin.ModelAdmin):
+class MountainAliasAdmin(ContentCacheAdminMixin, admin.ModelAdmin):
     list_display = ["alias_name", "mountain_group"]
     list_filter = ["mountain_group"]
     search_fields = ["alias_name", "mountain_group__name"]
@@ -96,7 +140,7 @@ class MountainAliasAdmin(admin.ModelAdmin):
 
 
 @admin.register(TrailCondition)
-class TrailConditionAdmin(admin.ModelAdmin):
+class TrailConditionAdmin(SourceActivityAdminMixin, ContentCacheAdminMixin, admin.ModelAdmin):
     list_display = [
         "mountain_name_raw",
         "id",
@@ -117,7 +161,8 @@ class TrailConditionAdmin(admin.ModelAdmin):
         "disabled",
     ]
     list_filter = ["source", "status", "area", ("resolved_at", admin.EmptyFieldListFilter), "disabled"]
-    search_fields = ["mountain_name_raw", "trail_name", "description"]
+    # icontains は pg_trgm のインデックスを使う（services.search と同じ列）
+    search_fields = ["mountain_name_raw", "trail_name", "title", "description"]
     date_hierarchy = "reported_at"
     readonly_fields = ["created_at", "updated_at"]
 
@@ -147,6 +192,12 @@ class TrailConditionAdmin(admin.ModelAdmin):
 
     actions = [unable_disabled, enable_disabled]
 
+    def save_model(self, request, obj, form, change):
+        # 照合キーの生成元が手動編集された場合は古いキーを破棄
+        if set(form.changed_data) & set(TrailCondition.MATCH_KEY_SOURCE_FIELDS):
+            obj.clear_match_keys()
+        super().save_model(request, obj, form, change)
+
     # カスタム報告日を表示
     @admin.display(description="報告日", ordering="reported_at")
     def reported_date(self, obj):
@@ -161,7 +212,7 @@ class TrailConditionAdmin(admin.ModelAdmin):
 
 
 @admin.register(BlogFeed)
-class BlogFeedAdmin(admin.ModelAdmin):
+class BlogFeedAdmin(SourceActivityAdminMixin, ContentCacheAdminMixin, admin.ModelAdmin):
     list_display = [
         "source",
         "title",
@@ -276,3 +327,30 @@ class PromptBackupAdmin(admin.ModelAdmin):
         if "delete_selected" in actions:
             del actions["delete_selected"]
         return actions
+
+
+@admin.register(SourceActivity)
+class SourceActivityAdmin(admin.ModelAdmin):
+    """集計結果の確認用（保存時に自動で再集計されるため編集不可）"""
+
+    list_display = [
+        "source",
+        "condition_count",
+        "latest_synced_at",
+        "latest_changed_at",
+        "latest_feed_at",
+        "refreshed_at",
+    ]
+    readonly_fields = [
+        "source",
+        "latest_synced_at",
+        "latest_changed_at",
+        "latest_feed_at",
+        "condition_count",
+        "status_counts",
+        "area_counts",
+        "refreshed_at",
+    ]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from trail_status.models import TrailCondition
+from trail_status.services.db_writer import DbWriter
+
+
+class Command(BaseCommand):
+    help = "登山道状態の照合キー（正規化名・分かち書き・詳細説明ダイジェスト）を一括生成"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="生成済みのレコードも再生成（辞書・正規化ルールの変更時）",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500, help="1回の読み込み・更新件数")
+        parser.add_argument("--dry-run", action="store_true", help="対象件数の表示のみ（DB更新なし）")
+
+    def handle(self, *args, **options):
+        queryset = TrailCondition.objects.order_by("id")
+        if not options["all"]:
+            # 登山道名は必須のため、正規化後が空のレコードを未生成とみなす
+            queryset = queryset.filter(trail_name_norm="")
+
+        total = queryset.count()
+        self.stdout.write(f"対象レコード: {total}件")
+        if options["dry_run"] or not total:
+            return
+
+        chunk_size = options["chunk_size"]
+        fields = list(TrailCondition.MATCH_KEY_FIELDS)
+        processed = 0
+        last_id = 0
+        # idの昇順に区切って処理（更新で対象条件から外れても取りこぼさない）
+        while chunk := list(queryset.filter(id__gt=last_id)[:chunk_size]):
+            for record in chunk:
+                DbWriter.fill_match_keys(record)
+            # bulk_updateではauto_nowが機能しないため updated_at は変わらない
+            TrailCondition.objects.bulk_update(chunk, fields)
+
+            processed += len(chunk)
+            last_id = chunk[-1].id
+            self.stdout.write(f"  {processed}/{total}件")
+
+        self.stdout.write(self.style.SUCCESS(f"照合キーの生成完了: {processed}件"))
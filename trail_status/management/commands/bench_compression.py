@@ -0,0 +1,66 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from trail_status.models import TrailCondition
+from trail_status.services import compression
+from trail_status.services.static_pages import server_host
+
+
+class Command(BaseCommand):
+    help = "公開ページの圧縮の効果（転送量・1リクエストあたりのCPU時間）を圧縮なし・gzip・brotliで計測"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--paths", nargs="+", help="計測するページのパス（省略時は一覧・詳細・情報源一覧・巡視ブログ一覧）"
+        )
+        parser.add_argument("--repeat", type=int, default=20, help="各条件のリクエスト回数（中央値を表示）")
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or self.default_paths()
+        repeat = max(options["repeat"], 1)
+        client = Client(headers={"host": server_host()})
+
+        self.stdout.write(
+            f"{'ページ':<24} {'方式':>8} {'転送量':>10} {'圧縮率':>6} {'CPU/リクエスト':>14} {'圧縮のみ(キャッシュなし)':>20}"
+        )
+        for path in paths:
+            identity = None
+            for encoding in ("identity", *compression.ENCODINGS):
+                headers = {"Accept-Encoding": "" if encoding == "identity" else encoding}
+                response = client.get(path, headers=headers, secure=True)  # 表示用・圧縮後の内容をキャッシュ
+                if response.status_code != 200:
+                    self.stdout.write(self.style.ERROR(f"{path}: ステータスコード {response.status_code}"))
+                    break
+                cpu = self.measure(lambda: client.get(path, headers=headers, secure=True), repeat)
+                size = len(response.content)
+
+                if encoding == "identity":
+                    identity = response.content
+                    ratio, compress_cpu = "", ""
+                else:
+                    ratio = f"{size / len(identity):.0%}"
+                    cpu_ms = self.measure(lambda: compression.compress(identity, encoding), repeat)
+                    compress_cpu = f"{cpu_ms:.2f}ms"
+                self.stdout.write(f"{path:<24} {encoding:>8} {size:>10,} {ratio:>6} {cpu:>12.2f}ms {compress_cpu:>20}")
+
+    def default_paths(self) -> list[str]:
+        paths = [reverse("trail_status:trail-list")]
+        condition = TrailCondition.objects.filter(disabled=False).order_by("-updated_at").first()
+        if condition:
+            paths.append(reverse("trail_status:trail-detail", args=[condition.id]))
+        paths += [reverse("trail_status:source-list"), reverse("trail_status:blog-list")]
+        return paths
+
+    @staticmethod
+    def measure(func, repeat: int) -> float:
+        """1回あたりのCPU時間（ミリ秒、中央値）"""
+        timings = []
+        for _ in range(repeat):
+            started = time.process_time()
+            func()
+            timings.append(time.process_time() - started)
+        return statistics.median(timings) * 1000
@@ -0,0 +1,191 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from trail_status.services import tokenizer
+from trail_status.services.assignment import greedy_assignment, optimal_assignment
+from trail_status.services.db_writer import DbWriter
+from trail_status.services.reconcile_dataset import (
+    SAMPLE_BASE_DIR,
+    build_reconcile_inputs,
+    exact_key_labels,
+    load_sample_pairs,
+)
+
+
+class Command(BaseCommand):
+    help = "サンプルJSONを使ったレコード照合（_reconcile_records）のベンチマーク（DB保存なし）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sources",
+            type=int,
+            nargs="+",
+            default=[8, 100],
+            help="1回の同期で処理する情報源数（サンプルを繰り返して水増し）。複数指定で比較",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="各条件の試行回数（最良値を採用）")
+        parser.add_argument(
+            "--assignment",
+            action="store_true",
+            help="対応付け方式（貪欲法・最適割当）の速度と精度を比較",
+        )
+        parser.add_argument(
+            "--blocking",
+            action="store_true",
+            help="ブロッキング（候補の絞り込み）の総当りに対する再現率と所要時間を計測（履歴レコードを水増し）",
+        )
+        parser.add_argument(
+            "--similarity",
+            action="store_true",
+            help="類似度計算のみを総当り（_calculate_similarity）と行列（_similarity_matrix）で比較",
+        )
+
+    def handle(self, *args, **options):
+        pairs = load_sample_pairs()
+        if not pairs:
+            self.stdout.write(self.style.ERROR(f"サンプルが見つかりません: {SAMPLE_BASE_DIR}"))
+            return
+
+        # 照合ログを抑制（計測対象外のI/Oを減らす）
+        logging.getLogger("trail_status.services.db_writer").setLevel(logging.WARNING)
+
+        self.stdout.write(f"サンプル情報源: {len(pairs)}件")
+        for source_count in options["sources"]:
+            timings = [self.run_once(pairs, source_count) for _ in range(options["repeat"])]
+            best = min(timings)
+            info = tokenizer.cache_info()
+            self.stdout.write(
+                f"情報源 {source_count:>4}件: 合計 {best:.3f}秒 / 1情報源あたり {best / source_count * 1000:.1f}ms "
+                f"(キャッシュ hits={info.hits}, misses={info.misses}, size={info.currsize})"
+            )
+
+        if options["similarity"]:
+            self.compare_similarity(pairs, options["repeat"])
+        if options["assignment"]:
+            self.compare_assignment(pairs, options["repeat"])
+        if options["blocking"]:
+            self.compare_blocking(pairs, options["repeat"])
+
+    def compare_blocking(self, pairs, repeat: int) -> None:
+        """
+        ブロッキングの再現率と所要時間を総当りと比較
+
+        各情報源の既存レコードに他の情報源の全レコードを同じ山域の履歴として混ぜ、
+        数百件の履歴を持つ情報源を模擬する。再現率は、履歴を混ぜる前の総当りで対応付けた組のうち、
+        ブロッキング後も候補に残った割合（混ぜた履歴との組は偶然の高スコアが多いため正解に含めない）
+        """
+        threshold = DbWriter.SIMILARITY_THRESHOLD
+        cases = []
+        for i, (_, previous, latest) in enumerate(pairs, start=1):
+            writer, existing_records, ai_records = build_reconcile_inputs(i, previous, latest)
+            area = existing_records[0].area if existing_records else ""
+            history = [
+                record | {"area": area}
+                for j, (_, other_previous, other_latest) in enumerate(pairs, start=1)
+                if j != i
+                for record in other_previous + other_latest
+            ]
+            own_count = len(existing_records)
+            existing_records += build_reconcile_inputs(i + len(pairs), history, [])[1]
+            for record in existing_records:
+                DbWriter.fill_match_keys(record)
+            writer.BLOCKING_MIN_CANDIDATES = 0
+            cases.append((writer, existing_records, ai_records, own_count))
+
+        results = {}
+        for label, method in [("総当り    ", "_similarity_matrix"), ("ブロッキング", "_blocked_similarity_matrix")]:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                matrices = [getattr(writer, method)(existing, ai) for writer, existing, ai, _ in cases]
+                timings.append(time.perf_counter() - started)
+            results[label] = matrices
+            self.stdout.write(f"{label}: {min(timings) * 1000:.1f}ms")
+
+        exhaustive, blocked = results.values()
+        expected = kept = compared = total = 0
+        for (_, existing, ai, own_count), full, pruned in zip(cases, exhaustive, blocked):
+            total += full.size
+            compared += int((pruned > 0).sum())
+            own_pairs = greedy_assignment(full[:, :own_count], threshold)
+            expected += len(own_pairs)
+            kept += sum(pruned[pair] == full[pair] for pair in own_pairs)
+
+        candidate_count = sum(len(existing) for _, existing, _, _ in cases) / len(cases)
+        self.stdout.write(
+            f"平均候補数 {candidate_count:.0f}件 / 類似度計算 {compared}/{total}組 / "
+            f"再現率 {kept}/{expected} ({kept / max(expected, 1):.1%})"
+        )
+
+    def compare_assignment(self, pairs, repeat: int) -> None:
+        """
+        対応付け方式の速度と精度を比較
+
+        正解ラベルは「正規化した (山名, 登山道名) が既存・AI出力の両側で一意に一致する組」とし、
+        ラベルのあるAI出力についてのみ正誤を数える
+        """
+        cases = []
+        for i, pair in enumerate(pairs, start=1):
+            writer, existing_records, ai_records = build_reconcile_inputs(i, *pair[1:])
+            scores = writer._similarity_matrix(existing_records, ai_records)
+            cases.append((pair[0], scores, exact_key_labels(existing_records, ai_records)))
+
+        threshold = DbWriter.SIMILARITY_THRESHOLD
+        for label, assign in [("貪欲法  ", greedy_assignment), ("最適割当", optimal_assignment)]:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                results = [assign(scores, threshold) for _, scores, _ in cases]
+                timings.append(time.perf_counter() - started)
+
+            correct = labelled = matched = 0
+            total_score = 0.0
+            for (_, scores, labels), result in zip(cases, results):
+                assigned = dict(result)
+                matched += len(result)
+                labelled += len(labels)
+                correct += sum(assigned.get(ai_idx) == candidate_idx for ai_idx, candidate_idx in labels.items())
+                total_score += sum(float(scores[pair]) for pair in result)
+
+            self.stdout.write(
+                f"{label}: {min(timings) * 1000:.2f}ms / 対応付け {matched}件 (スコア総和 {total_score:.2f}) / "
+                f"正解率 {correct}/{labelled} ({correct / labelled:.1%})"
+            )
+
+    def compare_similarity(self, pairs, repeat: int) -> None:
+        """類似度計算の総当り版と行列版の所要時間を比較（分かち書きはキャッシュ済みの状態で計測）"""
+        inputs = [build_reconcile_inputs(i, *pair[1:]) for i, pair in enumerate(pairs, start=1)]
+        pair_count = sum(len(existing) * len(ai) for _, existing, ai in inputs)
+
+        def scalar():
+            for writer, existing_records, ai_records in inputs:
+                for ai_record in ai_records:
+                    for candidate in existing_records:
+                        writer._calculate_similarity(candidate, ai_record)
+
+        def matrix():
+            for writer, existing_records, ai_records in inputs:
+                writer._similarity_matrix(existing_records, ai_records)
+
+        scalar()  # キャッシュのウォームアップ
+        for label, func in [("総当り", scalar), ("行列  ", matrix)]:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+            best = min(timings)
+            self.stdout.write(f"類似度計算 {label}: {best * 1000:.1f}ms ({pair_count / best:,.0f} pairs/sec)")
+
+    def run_once(self, pairs, source_count: int) -> float:
+        """1回の同期を模擬（情報源ごとにDbWriterを生成）し、照合の所要時間を返す"""
+        # 実行ごとに辞書ロード・キャッシュを含めて計測（プロセス起動直後の同期と同条件）
+        tokenizer.cache_clear()
+        inputs = [build_reconcile_inputs(i, *pairs[i % len(pairs)][1:]) for i in range(1, source_count + 1)]
+
+        started = time.perf_counter()
+        for writer, existing_records, ai_records in inputs:
+            writer._reconcile_records(existing_records, ai_records)
+        return time.perf_counter() - started
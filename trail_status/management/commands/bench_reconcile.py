@@ -0,0 +1,171 @@
+import json
+import logging
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from trail_status.services.db_writer import DbWriter
+from trail_status.services.reconcile_dataset import (
+    Accuracy,
+    GoldenCase,
+    build_existing_dataset,
+    build_reconcile_inputs,
+    build_sample_dataset,
+    evaluate,
+    load_dataset,
+    load_db_records,
+    load_fixture_records,
+    save_dataset,
+)
+from trail_status.services.types import MatchingMode
+
+
+def _greedy(writer: DbWriter) -> None:
+    writer.source_schema_single.matching_mode = MatchingMode.GREEDY
+
+
+def _optimal(writer: DbWriter) -> None:
+    writer.source_schema_single.matching_mode = MatchingMode.OPTIMAL
+
+
+def _blocking(writer: DbWriter) -> None:
+    # 候補数によらずブロッキングを適用
+    writer.BLOCKING_MIN_CANDIDATES = 0
+
+
+def _no_exact(writer: DbWriter) -> None:
+    # 完全一致の高速パスを使わず、全て類似度で同定
+    writer._exact_match_pairs = lambda candidates, ai_record_list: []
+
+
+# 照合方式の比較対象 {名前: DbWriterの設定を変更する関数}
+VARIANTS = {"greedy": _greedy, "optimal": _optimal, "blocking": _blocking, "no_exact": _no_exact}
+
+
+class Command(BaseCommand):
+    help = "正解ラベル付きデータセットでレコード照合の精度・速度・メモリを計測し、JSONで出力（DB保存なし）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dataset",
+            type=Path,
+            help="データセットのJSON（省略時はサンプルJSONから自動ラベルで作成）",
+        )
+        parser.add_argument(
+            "--from-db",
+            action="store_true",
+            help="DBの有効な登山道状況と情報源の最新のサンプル出力の組をケースに追加",
+        )
+        parser.add_argument(
+            "--fixture",
+            type=Path,
+            help="フィクスチャ（dumpdataのJSON）の登山道状況と情報源の最新のサンプル出力の組をケースに追加",
+        )
+        parser.add_argument(
+            "--export",
+            type=Path,
+            help="使用したデータセットをJSONに書き出す（ラベルを手作業で修正して --dataset に指定できる）",
+        )
+        parser.add_argument("--output", type=Path, help="結果JSONの出力先（省略時は標準出力）")
+        parser.add_argument(
+            "--variants",
+            nargs="+",
+            choices=list(VARIANTS),
+            default=list(VARIANTS),
+            help="計測する照合方式",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="各方式の試行回数（最良値を採用）")
+
+    def handle(self, *args, **options):
+        cases, dataset_names = self.load_cases(options)
+        if options["export"]:
+            save_dataset(cases, options["export"])
+            self.stderr.write(f"データセットを書き出しました: {options['export']}")
+
+        # 照合ログを抑制（計測対象外のI/Oを減らす）
+        logging.getLogger("trail_status.services.db_writer").setLevel(logging.WARNING)
+
+        # 分かち書きのキャッシュを温めて、方式間で同条件にする
+        self.run_variant(cases, _greedy)
+
+        report = {
+            "generated_at": timezone.now().isoformat(),
+            "dataset": {
+                "source": "+".join(dataset_names),
+                "cases": len(cases),
+                "pairs": sum(len(case.previous) * len(case.latest) for case in cases),
+                "labelled": sum(len(case.labels) for case in cases),
+                "labelled_new": sum(label is None for case in cases for label in case.labels.values()),
+            },
+            "parameters": {
+                "similarity_threshold": DbWriter.SIMILARITY_THRESHOLD,
+                "desc_compare_length": DbWriter.DESC_COMPARE_LENGTH,
+            },
+            "variants": {name: self.measure(cases, VARIANTS[name], options["repeat"]) for name in options["variants"]},
+        }
+
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            options["output"].write_text(output + "\n", encoding="utf-8")
+            self.stderr.write(f"結果を書き出しました: {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def load_cases(self, options) -> tuple[list[GoldenCase], list[str]]:
+        """データセットのケースと、その作成元の名前"""
+        if options["dataset"]:
+            cases, names = load_dataset(options["dataset"]), [str(options["dataset"])]
+        else:
+            cases, names = build_sample_dataset(), ["sample"]
+        if options["from_db"]:
+            cases += build_existing_dataset(load_db_records(), "db")
+            names.append("db")
+        if options["fixture"]:
+            cases += build_existing_dataset(load_fixture_records(options["fixture"]), "fixture")
+            names.append(str(options["fixture"]))
+        return cases, names
+
+    def measure(self, cases: list[GoldenCase], configure, repeat: int) -> dict:
+        """1つの照合方式について精度・スループット・ピークメモリを計測"""
+        timings = [self.run_variant(cases, configure) for _ in range(max(repeat, 1))]
+        best = min(timings)
+
+        accuracy = Accuracy()
+        for writer, existing_records, ai_records, case in self.prepare(cases, configure):
+            accuracy.add(evaluate(writer._match_records(existing_records, ai_records).matches, case.labels))
+
+        tracemalloc.start()
+        try:
+            self.run_variant(cases, configure)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        pair_count = sum(len(case.previous) * len(case.latest) for case in cases)
+        return accuracy.to_dict() | {
+            "seconds": round(best, 6),
+            "pairs_per_sec": round(pair_count / best) if best else None,
+            "peak_memory_bytes": peak,
+        }
+
+    def prepare(self, cases: list[GoldenCase], configure):
+        """ケースごとに照合処理の入力を作る（既存レコードはDB保存時と同じく照合キーを持たせる）"""
+        inputs = []
+        for i, case in enumerate(cases, start=1):
+            writer, existing_records, ai_records = build_reconcile_inputs(i, case.previous, case.latest)
+            for record in existing_records:
+                DbWriter.fill_match_keys(record)
+            configure(writer)
+            inputs.append((writer, existing_records, ai_records, case))
+        return inputs
+
+    def run_variant(self, cases: list[GoldenCase], configure) -> float:
+        """全ケースの _reconcile_records の所要時間（入力の準備は計測外）"""
+        inputs = self.prepare(cases, configure)
+        started = time.perf_counter()
+        for writer, existing_records, ai_records, _ in inputs:
+            writer._reconcile_records(existing_records, ai_records)
+        return time.perf_counter() - started
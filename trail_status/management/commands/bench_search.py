@@ -0,0 +1,135 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from trail_status.models import AreaName, DataSource, StatusType, TrailCondition
+from trail_status.services.db_writer import DbWriter
+from trail_status.services.keyset import keyset_page
+from trail_status.services.search import search_conditions
+
+# 合成データの語彙（組み合わせで行を作る）
+MOUNTAINS = (
+    "雲取山 大岳山 御岳山 三頭山 川苔山 鷹ノ巣山 本仁田山 棒ノ折山 丹沢山 塔ノ岳 蛭ヶ岳 大山 檜洞丸 高尾山".split()
+)
+TRAILS = ["鴨沢ルート", "石尾根", "日原林道", "大ダワ林道", "大倉尾根", "表尾根", "ヤビツ峠ルート", "馬頭刈尾根"]
+TITLES = ["通行止め", "倒木により通行注意", "崩落のため迂回", "クマ目撃情報", "積雪・凍結", "水場枯渇", "橋の流失"]
+DESCRIPTIONS = [
+    "台風の影響で登山道の一部が崩落しています。",
+    "復旧の見込みは立っていません。",
+    "迂回路をご利用ください。",
+    "倒木が道をふさいでいます。",
+    "クマの出没が確認されています。鈴等を携行してください。",
+    "凍結箇所があるため軽アイゼンが必要です。",
+    "橋が流失したため渡渉が必要です。",
+]
+
+# 検索にインデックスを使うかの比較 {名前: 計測前に実行するSQL（PostgreSQLのみ）}
+# SET LOCAL はセーブポイントの解放後も残るため、どちらも明示的に設定する
+VARIANTS = {
+    "index": ["SET LOCAL enable_bitmapscan = on"],
+    "no_index": ["SET LOCAL enable_bitmapscan = off"],
+}
+
+
+class Command(BaseCommand):
+    help = "合成した登山道状況でキーワード検索（一覧の1ページ目と件数）の所要時間を計測（計測後にロールバック）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000, help="合成する登山道状況の件数")
+        parser.add_argument(
+            "--terms",
+            nargs="+",
+            default=["雲取山", "鴨沢", "倒木 通行止め", "アイゼン", "ＡＢＣ"],
+            help="検索語（空白区切りの複数語はAND）",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="各条件の試行回数（中央値と最良値を表示）")
+        parser.add_argument("--explain", action="store_true", help="各検索語の実行計画を表示")
+        parser.add_argument("--seed", type=int, default=0, help="合成データの乱数シード")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.perf_counter()
+            self.create_rows(options["rows"], options["seed"])
+            self.stdout.write(f"合成データ: {options['rows']}件 ({time.perf_counter() - started:.1f}秒)")
+
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE trail_status_trailcondition")
+                self.stdout.write(f"検索用インデックス: {', '.join(self.search_indexes()) or 'なし'}")
+                variants = VARIANTS
+            else:
+                variants = {"index": []}
+
+            conditions = TrailCondition.objects.filter(disabled=False)
+            for term in options["terms"]:
+                for name, statements in variants.items():
+                    timings, count = self.measure(conditions, term, statements, options["repeat"])
+                    self.stdout.write(
+                        f"{term!r:>16} {name:>8}: 中央値 {statistics.median(timings) * 1000:7.1f}ms "
+                        f"/ 最良 {min(timings) * 1000:7.1f}ms ({count}件)"
+                    )
+                if options["explain"]:
+                    self.stdout.write(search_conditions(conditions, term).explain())
+
+            transaction.set_rollback(True)
+
+    def create_rows(self, rows: int, seed: int) -> DataSource:
+        """語彙を組み合わせた登山道状況を一括作成（照合キーは DbWriter と同じ方法で生成）"""
+        rng = random.Random(seed)
+        source = DataSource.objects.create(
+            name="検索ベンチマーク",
+            prompt_key="bench_search",
+            url1="https://bench.example.com/",
+            data_format="WEB",
+            area_name=AreaName.OKUTAMA,
+        )
+        areas, statuses = list(AreaName), list(StatusType)
+        today = date.today()
+
+        records = []
+        for i in range(rows):
+            record = TrailCondition(
+                source=source,
+                url1=source.url1,
+                mountain_name_raw=rng.choice(MOUNTAINS),
+                trail_name=rng.choice(TRAILS),
+                title=rng.choice(TITLES),
+                description="".join(rng.sample(DESCRIPTIONS, 2)),
+                reported_at=today - timedelta(days=rng.randrange(365)),
+                status=rng.choice(statuses),
+                area=rng.choice(areas),
+            )
+            DbWriter.fill_match_keys(record)
+            records.append(record)
+        TrailCondition.objects.bulk_create(records, batch_size=5000)
+        return source
+
+    def measure(self, conditions, term: str, statements: list[str], repeat: int) -> tuple[list[float], int]:
+        """一覧と同じ検索（1ページ目 + 件数）の所要時間"""
+        timings = []
+        count = 0
+        for _ in range(max(repeat, 1)):
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for statement in statements:
+                        cursor.execute(statement)
+                started = time.perf_counter()
+                results = search_conditions(conditions, term)
+                list(keyset_page(results).object_list)
+                count = results.count()
+                timings.append(time.perf_counter() - started)
+        return timings, count
+
+    def search_indexes(self) -> list[str]:
+        """作成済みの検索用インデックス（0014 のマイグレーション）"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes WHERE tablename = %s AND (indexname LIKE %s OR indexname LIKE %s) "
+                "ORDER BY indexname",
+                [TrailCondition._meta.db_table, "%_trgm", "%_fts"],
+            )
+            return [row[0] for row in cursor.fetchall()]
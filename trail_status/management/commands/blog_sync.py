@@ -6,8 +6,10 @@ from django.utils import timezone
 from httpx import AsyncClient
 
 from trail_status.models import BlogFeed, DataSource
+from trail_status.services import http_cache, site_cache, static_pages
 from trail_status.services.blog_fetcher import BlogFeedSchema, BlogFetcher
 from trail_status.services.slack_notifier import SlackNotifier
+from trail_status.services.source_activity import refresh_source_activity
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +69,11 @@ class Command(BaseCommand):
                 logger.info(f"{source.name}: ブログ更新なし")
 
         BlogFeed.objects.bulk_create(new_records)
+        if new_records:
+            refresh_source_activity({record.source_id for record in new_records})
+            site_cache.bump_content_version()
+            static_pages.render_static_pages()
+            http_cache.purge_cdn()
 
         logger.info(f"{len(new_records)}件のブログを新規取得")
         self.stdout.write(self.style.SUCCESS(f"✅ {len(new_records)}件のブログを新規取得"))
@@ -0,0 +1,61 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from trail_status.models import TrailCondition
+from trail_status.services.mountain_resolver import MountainResolver
+
+
+class Command(BaseCommand):
+    help = "登山道状態の山グループを山名・別名から一括で紐付け（山名ごとに解決し、ID指定のUPDATEを分割実行）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="紐付け済みのレコードも再計算（手動で設定した山グループも上書きされる）",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000, help="UPDATE1回あたりのレコード数")
+        parser.add_argument("--dry-run", action="store_true", help="紐付け件数の表示のみ（DB更新なし）")
+
+    def handle(self, *args, **options):
+        resolver = MountainResolver.load()
+        self.stdout.write(f"山名・別名の照合キー: {len(resolver.keys)}件")
+
+        queryset = TrailCondition.objects.all()
+        if not options["all"]:
+            queryset = queryset.filter(mountain_group__isnull=True)
+
+        # 同じ (山名, 山域) は1回だけ解決し、紐付け先の山グループごとにレコードIDをまとめる
+        resolved: dict[tuple[str, str], int | None] = {}
+        ids_by_group: dict[int | None, list[int]] = defaultdict(list)
+        for record_id, mountain_name, area, current_group_id in queryset.values_list(
+            "id", "mountain_name_raw", "area", "mountain_group_id"
+        ).iterator(chunk_size=options["chunk_size"]):
+            key = (mountain_name, area)
+            if key not in resolved:
+                resolved[key] = resolver.resolve(mountain_name, area)
+            if resolved[key] != current_group_id:
+                ids_by_group[resolved[key]].append(record_id)
+
+        linked = sum(len(ids) for group_id, ids in ids_by_group.items() if group_id is not None)
+        unlinked = len(ids_by_group.get(None, []))
+        unresolved_names = sorted({name for (name, _), group_id in resolved.items() if group_id is None and name})
+        self.stdout.write(f"紐付け: {linked}件 / 紐付け解除: {unlinked}件 / 未解決の山名: {len(unresolved_names)}件")
+        for name in unresolved_names[:20]:
+            self.stdout.write(f"  未解決: {name}")
+
+        if options["dry_run"]:
+            return
+
+        chunk_size = options["chunk_size"]
+        updated = 0
+        with transaction.atomic():
+            for group_id, ids in ids_by_group.items():
+                for start in range(0, len(ids), chunk_size):
+                    updated += TrailCondition.objects.filter(id__in=ids[start : start + chunk_size]).update(
+                        mountain_group_id=group_id
+                    )
+
+        self.stdout.write(self.style.SUCCESS(f"山グループの紐付け完了: {updated}件"))
@@ -0,0 +1,30 @@
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from trail_status.services.static_pages import StaticPageRenderer
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "公開ページを事前レンダリングして静的HTML（gzip圧縮版を含む）を出力（内容が変わったページのみ）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", type=str, help="出力先（指定しなければ STATIC_PAGES_DIR）")
+        parser.add_argument("--force", action="store_true", help="内容が変わっていないページも再出力")
+
+    def handle(self, *args, **options):
+        output_dir = options.get("output") or settings.STATIC_PAGES_DIR
+        if not output_dir:
+            raise CommandError("出力先を --output または環境変数 STATIC_PAGES_DIR で指定してください")
+
+        result = StaticPageRenderer(output_dir, force=options["force"]).run()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ 事前レンダリング完了: 出力{len(result.rendered)}件, 変更なし{len(result.skipped)}件, "
+                f"削除{len(result.removed)}件 ({output_dir})"
+            )
+        )
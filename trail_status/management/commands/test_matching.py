@@ -224,6 +224,8 @@ class Command(BaseCommand):
             url1=source.url1,
             prompt_file=PromptFile.load_merged_config(source.prompt_filename, url=source.url1),
             content_hash=source.content_hash,
+            matching_mode=source.matching_mode,
+            matching_params=source.matching_params,
         )
 
         # LlmConfigをダミーで作成（照合ロジックで使用）
@@ -1,15 +1,25 @@
 import asyncio
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from typing import Any
 
+from asgiref.sync import sync_to_async
 from django.core.management.base import BaseCommand
 
 from trail_status.models import DataSource
+from trail_status.services import http_cache, site_cache, static_pages
 from trail_status.services.db_writer import DbWriter
+from trail_status.services.reconcile_worker import init_reconcile_worker
+from trail_status.services.run_writer import RunWriter
 from trail_status.services.llm_client import ConversationalAi, DeepseekClient, GeminiClient, GptClient, LlmConfig
 from trail_status.services.pipeline import AiPipeline, UpdatedDataList
+from trail_status.services.priority import compute_source_priorities
 from trail_status.services.prompt_utils import PromptFile
 from trail_status.services.slack_notifier import SlackNotifier
+from trail_status.services.sync_lock import SyncLock
 from trail_status.services.types import ConditionSchemaAiList, ResultSingle, SourceSchemaSingle
 
 logger = logging.getLogger(__name__)
@@ -37,12 +47,43 @@ class Command(BaseCommand):
         )
         parser.add_argument("--dry-run", action="store_true", help="実際にDBに保存せず、処理結果のみ表示")
         parser.add_argument("--new-hash", action="store_true", help="既存のハッシュを無視しLlm処理実行")
+        parser.add_argument(
+            "--lock-wait",
+            type=float,
+            default=0,
+            help="別のtrail_sync実行中の場合に待機する最大秒数（指定しなければ待たずに終了）",
+        )
+        parser.add_argument(
+            "--time-budget",
+            type=float,
+            help="処理時間の予算（秒）。超過後は新たな情報源の処理を開始せず、優先度の低い情報源を次回に持ち越す",
+        )
+        parser.add_argument(
+            "--deadline",
+            type=float,
+            help="実行全体の期限（秒）。超過した処理は取り消し、該当する情報源を次回に持ち越す",
+        )
+        parser.add_argument(
+            "--source-timeout",
+            type=float,
+            help="情報源ごとの期限（秒）。スクレイピング開始から計測し、超過した情報源を次回に持ち越す",
+        )
+        parser.add_argument(
+            "--reconcile-workers",
+            type=int,
+            help="レコード照合のプロセス数（指定しなければ情報源数とCPUコア数の小さい方、0ならプロセスを使わない）",
+        )
 
     def handle(self, *args, **options):
         source_id = options.get("source")
         ai_model = options.get("model")
         dry_run = options["dry_run"]
         new_hash_mode = options["new_hash"]
+        lock_wait = options.get("lock_wait") or 0
+        time_budget = options.get("time_budget")
+        deadline = options.get("deadline")
+        source_timeout = options.get("source_timeout")
+        reconcile_workers = options.get("reconcile_workers")
 
         logger.info(
             f"trail_sync コマンド開始 - source_id: {source_id}, model: {ai_model}, dry_run: {dry_run}, new_hash: {new_hash_mode}"
@@ -61,82 +102,250 @@ class Command(BaseCommand):
         if dry_run:
             self.stdout.write(self.style.WARNING("DRY-RUNモード: DBには保存されません"))
 
-        # ───────── Step2 処理対象の情報源をDBから取得 ─────────
-        source_data_list = self.setup_data_source(source_id)
-        if source_data_list is None:
+        # ───────── Step2 多重実行の防止（全情報源の処理時のみ実行単位でロック） ─────────
+        run_lock = SyncLock.for_run() if source_id is None else None
+        if run_lock and not run_lock.acquire(timeout=lock_wait):
+            logger.warning("別のtrail_syncが実行中のため処理を中断します")
+            self.stdout.write(self.style.WARNING("別のtrail_syncが実行中のため処理を中断します"))
             return
 
-        # ───────── Step3 スクレイピング・名寄せ処理を実行（非同期） ─────────
-        processor = AiPipeline(
-            source_data_list, client_factory=self.default_client_factory, ai_model=ai_model, new_hash_mode=new_hash_mode
-        )
-        all_source_results: UpdatedDataList = asyncio.run(processor.run())
+        # ───────── Step3〜5 情報源の取得・スクレイピング・DB保存（1つのイベントループで実行） ─────────
+        content_version = site_cache.get_content_version()
+        try:
+            all_source_results = asyncio.run(
+                self.arun(
+                    source_id,
+                    dry_run=dry_run,
+                    new_hash_mode=new_hash_mode,
+                    reconcile_workers=reconcile_workers,
+                    ai_model=ai_model,
+                    time_budget=time_budget,
+                    deadline=deadline,
+                    source_timeout=source_timeout,
+                )
+            )
+        finally:
+            if run_lock:
+                run_lock.release()
 
-        # ───────── Step4 DB保存・スラック通知（同期処理） ─────────
-        if not dry_run:
-            for source_data, result_by_source in all_source_results:
-                self.process_result(source_data, result_by_source, new_hash_mode=new_hash_mode)
+        if all_source_results is None:
+            return
 
-        # ───────── Step5 結果サマリーをコンソールに表示 ─────────
+        # ───────── Step6 結果サマリーをコンソールに表示 ─────────
         summary = self.generate_summary(all_source_results)
         self.print_summary(summary)
 
-    def setup_data_source(self, source_id: int | None) -> list[SourceSchemaSingle]:
+        # ───────── Step7 内容が変わった場合は公開ページを事前レンダリングし、共有キャッシュ（CDN）を削除 ─────────
+        if site_cache.get_content_version() != content_version:
+            static_pages.render_static_pages()
+            http_cache.purge_cdn()
+
+    async def arun(
+        self,
+        source_id: int | None,
+        dry_run: bool,
+        new_hash_mode: bool,
+        reconcile_workers: int | None = None,
+        **pipeline_options,
+    ) -> UpdatedDataList | None:
+        """
+        情報源の取得からDB保存までを1つのイベントループで実行
+
+        完了した情報源から順にレコード照合を行い、残りの情報源のスクレイピング・LLM解析と重ねる。
+        レコード照合（CPU処理）はプロセスプールで情報源ごとに並列実行し、
+        DB保存は全情報源の照合後に1トランザクションでまとめて行う
+        """
+        # ───────── Step3 処理対象の情報源をDBから取得 ─────────
+        source_data_list = await self.asetup_data_source(source_id)
+        if source_data_list is None:
+            return None
+
+        # 他の実行で処理中の情報源は除外（LLM呼び出しと照合の重複を防ぐ）
+        # advisory lockは接続単位のため、取得・解放とも thread_sensitive な同一スレッドで行う
+        source_data_list, source_locks = await sync_to_async(self.acquire_source_locks)(source_data_list)
+        try:
+            if not source_data_list:
+                self.stdout.write(self.style.WARNING("処理可能な情報源がありません"))
+                return None
+
+            # ───────── Step4 スクレイピング・名寄せ処理を実行（非同期） ─────────
+            processor = AiPipeline(
+                source_data_list,
+                client_factory=self.default_client_factory,
+                new_hash_mode=new_hash_mode,
+                **pipeline_options,
+            )
+
+            # ───────── Step5 レコード照合（完了した情報源から順に）・DB保存・スラック通知 ─────────
+            # 照合プロセスはLLM解析の待ち時間中に起動・辞書ロードを済ませる
+            executor = None if dry_run else self.create_reconcile_executor(len(source_data_list), reconcile_workers)
+            run_writer = RunWriter()
+            all_source_results: UpdatedDataList = []
+            with executor or nullcontext():
+                # 情報源ごとの照合を並列に進めるため、照合処理はタスクとして起動し最後にまとめて待つ
+                reconcile_tasks = []
+                async for source_data, result_by_source in processor.iter_results():
+                    all_source_results.append((source_data, result_by_source))
+                    if not dry_run:
+                        reconcile_tasks.append(
+                            asyncio.create_task(
+                                self.aprocess_result(
+                                    source_data,
+                                    result_by_source,
+                                    new_hash_mode=new_hash_mode,
+                                    run_writer=run_writer,
+                                    executor=executor,
+                                )
+                            )
+                        )
+                await asyncio.gather(*reconcile_tasks)
+
+            if not dry_run:
+                await self.acommit_run(run_writer)
+            return all_source_results
+        finally:
+            await sync_to_async(self.release_locks)(source_locks)
+
+    @staticmethod
+    def create_reconcile_executor(source_count: int, workers: int | None) -> ProcessPoolExecutor | None:
+        """
+        レコード照合用のプロセスプールを作成（1プロセス以下ならNone = スレッドで照合）
+
+        ワーカーはイベントループ・DB接続のスレッドを引き継がないようspawnで起動し、
+        初期化時にSudachi辞書をロードしておく
+        """
+        if workers is None:
+            workers = min(source_count, os.cpu_count() or 1)
+        if workers <= 1:
+            return None
+        logger.info(f"照合プロセスプールを起動: {workers}プロセス")
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_reconcile_worker,
+        )
+
+    def acquire_source_locks(
+        self, source_data_list: list[SourceSchemaSingle]
+    ) -> tuple[list[SourceSchemaSingle], list[SyncLock]]:
+        """情報源単位のロックを取得し、他の実行で処理中の情報源を除外"""
+        lockable, locks = [], []
+        for source_data in source_data_list:
+            lock = SyncLock.for_source(source_data.id)
+            if lock.acquire():
+                lockable.append(source_data)
+                locks.append(lock)
+            else:
+                logger.warning(f"他の実行で処理中のためスキップ: {source_data.name} (ID: {source_data.id})")
+                self.stdout.write(self.style.WARNING(f"他の実行で処理中のためスキップ: {source_data.name}"))
+        return lockable, locks
+
+    @staticmethod
+    def release_locks(locks: list[SyncLock]) -> None:
+        for lock in locks:
+            lock.release()
+
+    async def asetup_data_source(self, source_id: int | None) -> list[SourceSchemaSingle] | None:
         """処理対象の情報源をDBから取得"""
         if source_id:
             try:
-                source = DataSource.objects.get(id=source_id)
-                if source.data_format != "WEB":
-                    logger.error(f"情報源のデータ形式が'WEB'ではありません: {source_id}: {source.data_format}")
-                    self.stdout.write(
-                        self.style.ERROR(f"情報源のデータ形式が'WEB'ではありません: {source_id}: {source.data_format}")
-                    )
-                    return
-                model_data_single = SourceSchemaSingle(
-                    id=source.id,
-                    name=source.name,
-                    url1=source.url1,
-                    prompt_file=PromptFile.load_merged_config(source.prompt_filename, url=source.url1),
-                    content_hash=source.content_hash,
-                )
-                source_data_list = [model_data_single]
-                self.stdout.write(f"情報源: {source.name}")
+                source = await DataSource.objects.aget(id=source_id)
             except DataSource.DoesNotExist:
                 logger.error(f"指定された情報源が見つかりません: {source_id}")
                 self.stdout.write(self.style.ERROR(f"指定された情報源が見つかりません: {source_id}"))
-                return
+                return None
+            if source.data_format != "WEB":
+                logger.error(f"情報源のデータ形式が'WEB'ではありません: {source_id}: {source.data_format}")
+                self.stdout.write(
+                    self.style.ERROR(f"情報源のデータ形式が'WEB'ではありません: {source_id}: {source.data_format}")
+                )
+                return None
+            sources, priorities = [source], {source.id: 0.0}
+            self.stdout.write(f"情報源: {source.name}")
         else:
             # CLI引数なしの場合、data_format='WEB'のすべての情報源を処理リストに追加
-            source_data_list = [
-                SourceSchemaSingle(
-                    id=s.id,
-                    name=s.name,
-                    url1=s.url1,
-                    prompt_file=PromptFile.load_merged_config(s.prompt_filename, url=s.url1),
-                    content_hash=s.content_hash,
-                )
-                for s in DataSource.web.all()
-            ]
-            self.stdout.write(f"全ての情報源を処理: {len(source_data_list)}件")
-        return source_data_list
+            sources = [s async for s in DataSource.web.all()]
+            priorities = await sync_to_async(compute_source_priorities)(sources)
+            self.stdout.write(f"全ての情報源を処理: {len(sources)}件")
+
+        # プロンプト設定（YAML）の読み込みはファイルI/Oのためスレッドで並行実行
+        prompt_files = await asyncio.gather(
+            *(asyncio.to_thread(PromptFile.load_merged_config, s.prompt_filename, url=s.url1) for s in sources)
+        )
+        return [
+            SourceSchemaSingle(
+                id=s.id,
+                name=s.name,
+                url1=s.url1,
+                url2=s.url2,
+                prompt_file=prompt_file,
+                content_hash=s.content_hash,
+                priority=priorities[s.id],
+                matching_mode=s.matching_mode,
+                matching_params=s.matching_params,
+            )
+            for s, prompt_file in zip(sources, prompt_files)
+        ]
 
-    def process_result(
-        self, source_data: SourceSchemaSingle, result_by_source: ResultSingle | BaseException, new_hash_mode
+    async def aprocess_result(
+        self,
+        source_data: SourceSchemaSingle,
+        result_by_source: ResultSingle | BaseException,
+        new_hash_mode,
+        run_writer: RunWriter,
+        executor: ProcessPoolExecutor | None = None,
     ) -> None:
-        """DB保存・スラック通知の処理"""
+        """
+        レコード照合・エラー通知の処理
+
+        照合結果と巡回記録は run_writer に追加し、DB保存は acommit_run でまとめて行う。
+        executorがあればレコード照合をプロセスプールで実行
+        """
+
+        if isinstance(result_by_source, ResultSingle) and result_by_source.deferred:
+            # 持ち越し（時間予算・期限超過）: 巡回日時・ハッシュを更新せず次回実行で再処理
+            self.stdout.write(self.style.WARNING(f"次回に持ち越し: {source_data.name} - {result_by_source.message}"))
+            return
 
         if isinstance(result_by_source, ResultSingle) and result_by_source.success:
             writer = DbWriter(source_data, result_by_source)
-            writer.save_to_source()
 
             if not result_by_source.content_changed:
                 if not new_hash_mode:
                     self.stdout.write(self.style.WARNING(f"コンテンツ変更なし: {source_data.name} - LLM処理スキップ"))
+                    # 巡回日時のみ記録
+                    run_writer.add(writer)
                     return
                 else:
                     logger.info("NEW-HASHモード: 既存データと再度照合します")
 
-            db_result = writer.persist_condition_and_usage()
+            to_update, to_create, count = await writer.areconcile(executor=executor)
+            run_writer.add(writer, to_update, to_create, count)
+        else:
+            # 失敗時のSlack通知
+            notifier = SlackNotifier()
+            if isinstance(result_by_source, ResultSingle):
+                error_message = result_by_source.message
+            else:
+                error_message = f"予期せぬエラー: {result_by_source}"
+            await asyncio.to_thread(
+                notifier.send_error_notification,
+                source_name=source_data.name,
+                error_message=error_message,
+            )
+
+    async def acommit_run(self, run_writer: RunWriter) -> None:
+        """実行単位のDB保存と、保存結果のスラック通知"""
+        notifier = SlackNotifier()
+        for db_result in await run_writer.acommit():
+            if "error" in db_result:
+                self.stdout.write(self.style.ERROR(f"DB保存失敗: {db_result['name']} - {db_result['error']}"))
+                await asyncio.to_thread(
+                    notifier.send_error_notification,
+                    source_name=db_result["name"],
+                    error_message=f"DB保存失敗: {db_result['error']}",
+                )
+                continue
 
             self.stdout.write(
                 self.style.SUCCESS(
@@ -146,25 +355,14 @@ class Command(BaseCommand):
 
             # Slack通知を送信（ハッシュ更新検知時）
             if db_result["updated"] > 0 or db_result["created"] > 0:
-                notifier = SlackNotifier()
-                notifier.send_update_notification(
+                await asyncio.to_thread(
+                    notifier.send_update_notification,
                     source_name=db_result["name"],
                     updated_count=db_result["updated"],
                     created_count=db_result["created"],
                     total_count=db_result["count"],
                     cost=db_result["cost"],
                 )
-        else:
-            # 失敗時のSlack通知
-            notifier = SlackNotifier()
-            if isinstance(result_by_source, ResultSingle):
-                error_message = result_by_source.message
-            else:
-                error_message = f"予期せぬエラー: {result_by_source}"
-            notifier.send_error_notification(
-                source_name=source_data.name,
-                error_message=error_message,
-            )
 
     @staticmethod
     def default_client_factory(config: LlmConfig) -> ConversationalAi:
@@ -186,11 +384,22 @@ class Command(BaseCommand):
             "success_count": 0,
             "error_count": 0,
             "skipped_count": 0,
+            "deferred_count": 0,
             "total_conditions": 0,
         }
 
         for source_data, result in results:
-            if isinstance(result, ResultSingle) and result.success:
+            # 時間予算・期限超過で次回に持ち越し
+            if isinstance(result, ResultSingle) and result.deferred:
+                summary["results"].append(
+                    {
+                        "source_name": source_data.name,
+                        "status": "deferred",
+                        "reason": result.message,
+                    }
+                )
+                summary["deferred_count"] += 1
+            elif isinstance(result, ResultSingle) and result.success:
                 # コンテンツ変更なしの場合
                 if not result.content_changed:
                     summary["results"].append(
@@ -255,12 +464,15 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR(f"❌ {result['source_name']}: {result['message']}"))
             elif result["status"] == "skipped":
                 self.stdout.write(self.style.WARNING(f"⏭️  {result['source_name']}: {result['reason']}"))
+            elif result["status"] == "deferred":
+                self.stdout.write(self.style.WARNING(f"⏳ {result['source_name']}: {result['reason']}"))
             else:
                 self.stdout.write(
                     self.style.SUCCESS(f"✅ {result['source_name']}: {result['conditions_count']}件の状況情報")
                 )
 
         self.stdout.write(
-            f"\n成功: {summary['success_count']}件, スキップ: {summary['skipped_count']}件, エラー: {summary['error_count']}件"
+            f"\n成功: {summary['success_count']}件, スキップ: {summary['skipped_count']}件, "
+            f"持ち越し: {summary['deferred_count']}件, エラー: {summary['error_count']}件"
         )
         self.stdout.write(f"取得された状況情報の総数: {summary['total_conditions']}件")
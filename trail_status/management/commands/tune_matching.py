@@ -0,0 +1,111 @@
+from collections import defaultdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from trail_status.models import DataSource, MatchingMode
+from trail_status.services.db_writer import DbWriter
+from trail_status.services.matching_tuner import MatchingTuner, boundary_params
+from trail_status.services.reconcile_dataset import build_sample_dataset, load_dataset
+
+
+class Command(BaseCommand):
+    help = "正解ラベル付きデータセットで類似度の閾値・フィールド重みを情報源ごとに探索し、照合パラメータに保存"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dataset",
+            type=Path,
+            help="手作業でラベルを確認したデータセットのJSON（省略時はサンプルJSONの自動ラベルで探索のみ。DB更新なし）",
+        )
+        parser.add_argument("--sources", type=int, nargs="+", help="対象の情報源ID（省略時はデータセットの全情報源）")
+        parser.add_argument(
+            "--thresholds",
+            type=float,
+            nargs="+",
+            default=[0.6, 0.65, 0.7, 0.75, 0.8],
+            help="類似度の閾値の候補",
+        )
+        parser.add_argument(
+            "--desc-lengths",
+            type=int,
+            nargs="+",
+            default=[100, 200, 300],
+            help="詳細説明の比較文字数の候補",
+        )
+        parser.add_argument("--weight-step", type=float, default=0.1, help="フィールド重みの刻み幅")
+        parser.add_argument("--rounds", type=int, default=2, help="詳細説明あり / なしの重みを交互に探索する回数")
+        parser.add_argument(
+            "--min-labels",
+            type=int,
+            default=20,
+            help="調整に必要なラベル数の下限（少ない情報源は過学習を避けるためスキップ）",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="探索結果の表示のみ（DB更新なし）")
+
+    def handle(self, *args, **options):
+        if options["dataset"]:
+            cases = load_dataset(options["dataset"])
+        else:
+            # 自動ラベルは名称が一致する組と明らかな新規のみで、閾値・重みで判定が分かれる表記揺れの組にはラベルがない。
+            # 曖昧な組を対応付けないほど F1 が上がるため、探索結果は保存しない
+            cases = build_sample_dataset()
+            if not options["dry_run"]:
+                self.stdout.write(
+                    self.style.WARNING("自動ラベルのため照合パラメータは保存しません（保存するには --dataset を指定）")
+                )
+                options["dry_run"] = True
+        cases_by_source = defaultdict(list)
+        for case in cases:
+            if case.source_id is not None:
+                cases_by_source[case.source_id].append(case)
+
+        source_ids = options["sources"] or sorted(cases_by_source)
+        sources = DataSource.objects.in_bulk(source_ids)
+        defaults = DbWriter.default_matching_params()
+
+        for source_id in source_ids:
+            source = sources.get(source_id)
+            label = source.name if source else f"情報源ID {source_id}"
+            tuner = MatchingTuner(
+                cases_by_source.get(source_id, []),
+                matching_mode=source.matching_mode if source else MatchingMode.GREEDY,
+                base_params=source.matching_params if source else None,
+                desc_lengths=tuple(options["desc_lengths"]),
+            )
+            if tuner.labelled_count < options["min_labels"]:
+                self.stdout.write(self.style.WARNING(f"スキップ: {label}（ラベル {tuner.labelled_count}件）"))
+                continue
+
+            result = tuner.search(options["thresholds"], options["weight_step"], options["rounds"])
+            self.stdout.write(
+                f"{label}: ラベル {tuner.labelled_count}件 / F1 {result.baseline.f1:.4f} → {result.accuracy.f1:.4f} "
+                f"(適合率 {result.accuracy.precision:.4f}, 再現率 {result.accuracy.recall:.4f}) / "
+                f"{result.evaluated}候補 {result.seconds:.2f}秒"
+            )
+            candidates = {
+                "similarity_threshold": options["thresholds"],
+                "desc_compare_length": options["desc_lengths"],
+            }
+            for name in boundary_params(result.params, candidates):
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"  {name} が探索範囲の端（{result.params[name]}）です。範囲を広げるか、ラベルを確認してください"
+                    )
+                )
+            # 既定値と異なるものだけを保存（既定値の変更が反映されるように）
+            params = {name: value for name, value in result.params.items() if value != defaults[name]}
+            for name, value in params.items():
+                self.stdout.write(f"  {name}: {defaults[name]} → {value}")
+
+            if result.accuracy.f1 <= result.baseline.f1:
+                self.stdout.write("  改善なし（照合パラメータは変更しません）")
+                continue
+            if source is None:
+                self.stdout.write(self.style.WARNING("  情報源がDBにないため保存しません"))
+                continue
+            if options["dry_run"]:
+                continue
+
+            DataSource.objects.filter(id=source_id).update(matching_params=params)
+            self.stdout.write(self.style.SUCCESS(f"  照合パラメータを保存しました: {label}"))
@@ -0,0 +1,159 @@
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .services import compression, http_cache
+from .services.static_pages import FILTER_PARAMS, MANIFEST_FILE, build_key, load_manifest, page_url
+
+logger = logging.getLogger(__name__)
+
+
+class StaticPageMiddleware:
+    """
+    事前レンダリングした公開ページ（render_static コマンドの出力）を返す
+
+    manifest にないページ・絞り込み以外のクエリがあるページ・内容が変わった後（検証子の不一致）は
+    Django のビューで表示する。STATIC_PAGES_DIR が未設定なら使用しない
+    """
+
+    def __init__(self, get_response):
+        if not settings.STATIC_PAGES_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.output_dir = Path(settings.STATIC_PAGES_DIR)
+        self._manifest: dict = {}
+        self._manifest_mtime: float | None = None
+
+    def __call__(self, request):
+        if request.method in ("GET", "HEAD"):
+            response = self.static_response(request)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def manifest(self) -> dict:
+        """manifest（更新されていれば読み直す）"""
+        try:
+            mtime = (self.output_dir / MANIFEST_FILE).stat().st_mtime
+        except FileNotFoundError:
+            return {}
+        if mtime != self._manifest_mtime:
+            self._manifest = load_manifest(self.output_dir)
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def static_response(self, request) -> HttpResponse | None:
+        """事前レンダリングしたページがあり、現在の内容と一致すれば返す"""
+        params = request.GET
+        if any(key not in FILTER_PARAMS or len(params.getlist(key)) != 1 for key in params) or len(params) > 1:
+            return None
+
+        manifest = self.manifest()
+        page = manifest.get("pages", {}).get(page_url(request.path, params.dict()))
+        if page is None or manifest.get("build") != build_key():
+            return None
+
+        validator = http_cache.get_validator()
+        if manifest.get("etag") != validator.etag:
+            return None
+
+        path, encoding = self.find_file(request, page["file"])
+        etag = compression.weak_etag(validator.etag) if encoding else validator.etag
+
+        # ETag / Last-Modified が一致すれば 304
+        response = get_conditional_response(request, etag=etag, last_modified=int(validator.last_modified.timestamp()))
+        if response is None:
+            response = self.file_response(request, path, encoding)
+            if response is None:
+                return None
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(validator.last_modified.timestamp())
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return http_cache.patch_shared_cache_headers(response)
+
+    def find_file(self, request, file_name: str) -> tuple[Path, str | None]:
+        """クライアントが受け付ける圧縮版（brotli / gzip）があればそのファイル、なければHTML"""
+        for encoding in compression.accepted_encodings(request.headers.get("Accept-Encoding", "")):
+            path = self.output_dir / f"{file_name}{compression.FILE_SUFFIXES[encoding]}"
+            if path.exists():
+                return path, encoding
+        return self.output_dir / file_name, None
+
+    def file_response(self, request, path: Path, encoding: str | None) -> HttpResponse | None:
+        """事前レンダリングしたファイルの応答"""
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            logger.warning(f"事前レンダリングしたページがありません: {path}")
+            return None
+
+        response = HttpResponse(content, content_type="text/html; charset=utf-8")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        if request.method == "HEAD":
+            response.content = b""
+            response.headers["Content-Length"] = str(len(content))
+        return response
+
+
+class CompressionMiddleware:
+    """
+    公開ページ（共有キャッシュ可能な応答）を brotli / gzip で圧縮
+
+    圧縮後の内容はキャッシュし、同じ内容はリクエストごとに再圧縮しない。
+    CSRFトークン等を含みうる非公開の応答（管理画面等）は BREACH 攻撃を避けるため圧縮しない
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.status_code == 304 and self.is_public(response):
+            return self.not_modified(request, response)
+        if not self.is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ["Accept-Encoding"])
+        encoding = compression.negotiate(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+
+        content = compression.compress_cached(response.content, encoding)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response.headers["Content-Length"] = str(len(content))
+        response.headers["Content-Encoding"] = encoding
+        if etag := response.headers.get("ETag"):
+            response.headers["ETag"] = compression.weak_etag(etag)
+        return response
+
+    @staticmethod
+    def not_modified(request, response):
+        """304応答の ETag を圧縮した200応答と同じ（弱い ETag）にする（本文がないため圧縮方式の交渉結果で判断）"""
+        patch_vary_headers(response, ["Accept-Encoding"])
+        etag = response.headers.get("ETag")
+        if etag and compression.negotiate(request.headers.get("Accept-Encoding", "")):
+            response.headers["ETag"] = compression.weak_etag(etag)
+        return response
+
+    @staticmethod
+    def is_public(response) -> bool:
+        """共有キャッシュ可能な応答か（非公開の応答は圧縮しない）"""
+        return "public" in response.headers.get("Cache-Control", "")
+
+    @classmethod
+    def is_compressible(cls, response) -> bool:
+        """圧縮対象か（公開ページの200応答で、未圧縮の一定サイズ以上のテキスト）"""
+        if response.status_code != 200 or response.streaming or response.has_header("Content-Encoding"):
+            return False
+        if not cls.is_public(response):
+            return False
+        content_type = response.headers.get("Content-Type", "")
+        return content_type.startswith(compression.COMPRESSIBLE_TYPES) and len(response.content) >= compression.MIN_SIZE
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.5 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trail_status", "0008_add_trailcondition_scraped_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datasource",
+            name="matching_mode",
+            field=models.CharField(
+                choices=[("GREEDY", "貪欲法（スコア順）"), ("OPTIMAL", "最適割当（ハンガリアン法）")],
+                default="GREEDY",
+                help_text="既存レコードとAI出力の対応付け方式。似た名前の登山道が多い情報源は最適割当を推奨",
+                max_length=20,
+                verbose_name="照合方式",
+            ),
+        ),
+    ]
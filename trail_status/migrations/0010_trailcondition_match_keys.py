@@ -0,0 +1,59 @@
+# Generated by Django 6.0.5 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trail_status", "0009_datasource_matching_mode"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trailcondition",
+            name="description_digest",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=16, verbose_name="詳細説明ダイジェスト"
+            ),
+        ),
+        migrations.AddField(
+            model_name="trailcondition",
+            name="description_tokens",
+            field=models.TextField(blank=True, default="", editable=False, verbose_name="詳細説明（分かち書き）"),
+        ),
+        migrations.AddField(
+            model_name="trailcondition",
+            name="mountain_name_norm",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=100, verbose_name="山名（正規化）"
+            ),
+        ),
+        migrations.AddField(
+            model_name="trailcondition",
+            name="mountain_name_tokens",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=200, verbose_name="山名（分かち書き・名詞のみ）"
+            ),
+        ),
+        migrations.AddField(
+            model_name="trailcondition",
+            name="title_tokens",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=500, verbose_name="タイトル（分かち書き）"
+            ),
+        ),
+        migrations.AddField(
+            model_name="trailcondition",
+            name="trail_name_norm",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=100, verbose_name="登山道名（正規化）"
+            ),
+        ),
+        migrations.AddField(
+            model_name="trailcondition",
+            name="trail_name_tokens",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=200, verbose_name="登山道名（分かち書き）"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.5 on 2026-10-18 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trail_status", "0010_trailcondition_match_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datasource",
+            name="matching_params",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="類似度の閾値・フィールド重みの上書き（tune_matching コマンドで設定）。空なら既定値",
+                verbose_name="照合パラメータ",
+            ),
+        ),
+    ]
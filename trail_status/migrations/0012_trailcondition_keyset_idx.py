@@ -0,0 +1,22 @@
+# Generated by Django 6.0.5 on 2026-10-18 23:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trail_status", "0011_datasource_matching_params"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trailcondition",
+            index=models.Index(
+                models.OrderBy(models.F("reported_at"), descending=True, nulls_last=True),
+                models.OrderBy(models.F("created_at"), descending=True),
+                models.OrderBy(models.F("id"), descending=True),
+                condition=models.Q(("disabled", False)),
+                name="trailcondition_keyset_idx",
+            ),
+        ),
+    ]
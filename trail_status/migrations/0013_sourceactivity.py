@@ -0,0 +1,81 @@
+# Generated by Django 6.0.5 on 2026-10-18 23:36
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.utils import timezone
+
+
+def create_source_activity(apps, schema_editor):
+    """既存の登山道状況・巡視ブログから全情報源の更新状況を集計"""
+    DataSource = apps.get_model("trail_status", "DataSource")
+    TrailCondition = apps.get_model("trail_status", "TrailCondition")
+    BlogFeed = apps.get_model("trail_status", "BlogFeed")
+    SourceActivity = apps.get_model("trail_status", "SourceActivity")
+
+    now = timezone.now()
+    ids = list(DataSource.objects.values_list("id", flat=True))
+    activities = {id: SourceActivity(source_id=id, refreshed_at=now) for id in ids}
+    status_counts = {id: Counter() for id in activities}
+    area_counts = {id: Counter() for id in activities}
+    rows = (
+        TrailCondition.objects.filter(disabled=False)
+        .values("source_id", "status", "area")
+        .annotate(count=Count("pk"), synced=Max("synced_at"), changed=Max("updated_at"))
+        .order_by()
+    )
+    for row in rows:
+        activity = activities[row["source_id"]]
+        activity.condition_count += row["count"]
+        status_counts[row["source_id"]][row["status"]] += row["count"]
+        area_counts[row["source_id"]][row["area"]] += row["count"]
+        activity.latest_synced_at = max(filter(None, [activity.latest_synced_at, row["synced"]]), default=None)
+        activity.latest_changed_at = max(filter(None, [activity.latest_changed_at, row["changed"]]), default=None)
+
+    feeds = BlogFeed.objects.filter(disabled=False).values("source_id").annotate(latest=Max("created_at")).order_by()
+    for row in feeds:
+        activities[row["source_id"]].latest_feed_at = row["latest"]
+
+    for id, activity in activities.items():
+        activity.status_counts = dict(status_counts[id])
+        activity.area_counts = dict(area_counts[id])
+    SourceActivity.objects.bulk_create(activities.values())
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trail_status", "0012_trailcondition_keyset_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SourceActivity",
+            fields=[
+                (
+                    "source",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="activity",
+                        serialize=False,
+                        to="trail_status.datasource",
+                        verbose_name="情報源",
+                    ),
+                ),
+                ("latest_synced_at", models.DateTimeField(blank=True, null=True, verbose_name="最新の同期日時")),
+                ("latest_changed_at", models.DateTimeField(blank=True, null=True, verbose_name="最新の内容変更日時")),
+                ("latest_feed_at", models.DateTimeField(blank=True, null=True, verbose_name="最新のブログ取得日時")),
+                ("condition_count", models.PositiveIntegerField(default=0, verbose_name="有効な登山道状況の件数")),
+                ("status_counts", models.JSONField(blank=True, default=dict, verbose_name="状況種別ごとの件数")),
+                ("area_counts", models.JSONField(blank=True, default=dict, verbose_name="山域ごとの件数")),
+                ("refreshed_at", models.DateTimeField(auto_now=True, verbose_name="集計日時")),
+            ],
+            options={
+                "verbose_name": "情報源の更新状況",
+                "verbose_name_plural": "情報源の更新状況",
+            },
+        ),
+        migrations.RunPython(create_source_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 6.0.5 on 2026-10-19 00:12
+
+import logging
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models.functions import Upper
+
+logger = logging.getLogger(__name__)
+
+# 部分一致（icontains = UPPER(列) LIKE UPPER(%語%)）用の pg_trgm インデックス {インデックス名: 列}
+TRIGRAM_INDEXES = {
+    "trailcondition_mountain_trgm": "mountain_name_raw",
+    "trailcondition_trail_trgm": "trail_name",
+    "trailcondition_title_trgm": "title",
+    "trailcondition_desc_trgm": "description",
+}
+
+# 分かち書きの列の全文検索用インデックス（services.search.token_vector と同じ式）
+FULLTEXT_INDEX = GinIndex(
+    SearchVector("mountain_name_tokens", "trail_name_tokens", "title_tokens", "description_tokens", config="simple"),
+    name="trailcondition_tokens_fts",
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    """検索用のGINインデックスを作成（PostgreSQLのみ。pg_trgm がない環境は部分一致のインデックスを省略）"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    TrailCondition = apps.get_model("trail_status", "TrailCondition")
+    schema_editor.add_index(TrailCondition, FULLTEXT_INDEX)
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            logger.warning("pg_trgm が利用できないため、部分一致のインデックスを作成しません")
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, field in TRIGRAM_INDEXES.items():
+        schema_editor.add_index(TrailCondition, GinIndex(OpClass(Upper(field), name="gin_trgm_ops"), name=name))
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in [FULLTEXT_INDEX.name, *TRIGRAM_INDEXES]:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(name)}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("trail_status", "0013_sourceactivity"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -1,19 +1,22 @@
+from .activity import SourceActivity
 from .condition import StatusType, TrailCondition
 from .feed import BlogFeed
 from .llm_usage import LlmUsage
 from .mountain import AreaName, MountainAlias, MountainGroup
 from .prompt_backup import PromptBackup
-from .source import DataSource, OrganizationType
+from .source import DataSource, MatchingMode, OrganizationType
 
 __all__ = [
     "AreaName",
     "BlogFeed",
     "DataSource",
     "LlmUsage",
+    "MatchingMode",
     "MountainAlias",
     "MountainGroup",
     "OrganizationType",
     "PromptBackup",
+    "SourceActivity",
     "StatusType",
     "TrailCondition",
 ]
@@ -0,0 +1,30 @@
+from django.db import models
+
+from .source import DataSource
+
+
+class SourceActivity(models.Model):
+    """
+    情報源ごとの更新状況の集計（1情報源1行）
+
+    一覧ページ上部の更新情報とサイドバーの件数はこの表のみから作成する。
+    登山道状況・巡視ブログの保存時に services.source_activity.refresh_source_activity() で該当情報源の行を再集計する
+    """
+
+    source = models.OneToOneField(
+        DataSource, on_delete=models.CASCADE, primary_key=True, related_name="activity", verbose_name="情報源"
+    )
+    latest_synced_at = models.DateTimeField("最新の同期日時", null=True, blank=True)
+    latest_changed_at = models.DateTimeField("最新の内容変更日時", null=True, blank=True)
+    latest_feed_at = models.DateTimeField("最新のブログ取得日時", null=True, blank=True)
+    condition_count = models.PositiveIntegerField("有効な登山道状況の件数", default=0)
+    status_counts = models.JSONField("状況種別ごとの件数", default=dict, blank=True)
+    area_counts = models.JSONField("山域ごとの件数", default=dict, blank=True)
+    refreshed_at = models.DateTimeField("集計日時", auto_now=True)
+
+    class Meta:
+        verbose_name = "情報源の更新状況"
+        verbose_name_plural = "情報源の更新状況"
+
+    def __str__(self):
+        return f"{self.source_id}: {self.condition_count}件"
@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+
 from django.db import models
 from django.utils import timezone
 
@@ -16,6 +18,38 @@ class StatusType(models.TextChoices):
     SNOW = "SNOW", "❄️ 積雪"
     OTHER = "OTHER", "📝 その他"
 
+    @classmethod
+    def get_presentation(cls, status_code: str) -> "StatusPresentation":
+        """表示用の情報（バッジのクラス・一覧の並び順・表示名）を取得"""
+        return _STATUS_PRESENTATIONS.get(status_code) or StatusPresentation(status_code, _DEFAULT_BADGE_CLASS, 9)
+
+
+@dataclass(frozen=True)
+class StatusPresentation:
+    """状況種別の表示用の情報"""
+
+    label: str
+    badge_class: str  # バッジの配色（Tailwind CSS）
+    sort_order: int  # 一覧の状況種別列の並び順
+
+
+_DEFAULT_BADGE_CLASS = "bg-blue-100 text-blue-700"
+
+# テンプレートで行ごとに分岐しないよう事前に作成
+_STATUS_PRESENTATIONS = {
+    StatusType.CLOSURE: StatusPresentation(StatusType.CLOSURE.label, "bg-red-100 text-red-700", 1),
+    StatusType.HAZARD: StatusPresentation(StatusType.HAZARD.label, "bg-orange-100 text-orange-700", 2),
+    StatusType.CLEAR: StatusPresentation(StatusType.CLEAR.label, "bg-green-100 text-green-700", 3),
+    StatusType.ANIMAL: StatusPresentation(StatusType.ANIMAL.label, "bg-purple-100 text-purple-700", 4),
+    StatusType.WEATHER: StatusPresentation(StatusType.WEATHER.label, "bg-gray-100 text-gray-700", 5),
+    StatusType.FACILITY: StatusPresentation(StatusType.FACILITY.label, _DEFAULT_BADGE_CLASS, 6),
+    StatusType.WATER: StatusPresentation(StatusType.WATER.label, "bg-teal-100 text-teal-700", 7),
+    StatusType.SNOW: StatusPresentation(StatusType.SNOW.label, "bg-cyan-100 text-cyan-700", 8),
+    StatusType.OTHER: StatusPresentation(StatusType.OTHER.label, _DEFAULT_BADGE_CLASS, 9),
+    # 旧データの種別（選択肢からは削除済み）
+    "RESOLVED": StatusPresentation("RESOLVED", "bg-green-100 text-green-700", 9),
+}
+
 
 class TrailCondition(models.Model):
     """登山道の状況情報（コアモデル）"""
@@ -72,6 +106,31 @@ class TrailCondition(models.Model):
     updated_at = models.DateTimeField("更新日時", auto_now=True)
     synced_at = models.DateTimeField("バッチによる自動更新日時", null=True)
 
+    # 照合キー（DbWriterが保存時に生成 / backfill_match_keysコマンドで一括生成）
+    mountain_name_norm = models.CharField("山名（正規化）", max_length=100, blank=True, default="", editable=False)
+    trail_name_norm = models.CharField("登山道名（正規化）", max_length=100, blank=True, default="", editable=False)
+    mountain_name_tokens = models.CharField(
+        "山名（分かち書き・名詞のみ）", max_length=200, blank=True, default="", editable=False
+    )
+    trail_name_tokens = models.CharField(
+        "登山道名（分かち書き）", max_length=200, blank=True, default="", editable=False
+    )
+    title_tokens = models.CharField("タイトル（分かち書き）", max_length=500, blank=True, default="", editable=False)
+    description_tokens = models.TextField("詳細説明（分かち書き）", blank=True, default="", editable=False)
+    description_digest = models.CharField("詳細説明ダイジェスト", max_length=16, blank=True, default="", editable=False)
+
+    # 照合キーの生成元フィールドと照合キーのフィールド
+    MATCH_KEY_SOURCE_FIELDS = ("mountain_name_raw", "trail_name", "title", "description")
+    MATCH_KEY_FIELDS = (
+        "mountain_name_norm",
+        "trail_name_norm",
+        "mountain_name_tokens",
+        "trail_name_tokens",
+        "title_tokens",
+        "description_tokens",
+        "description_digest",
+    )
+
     class Meta:
         verbose_name = "登山道状態"
         verbose_name_plural = "登山道状態"
@@ -80,7 +139,25 @@ class TrailCondition(models.Model):
             models.Index(fields=["disabled", "resolved_at", "-reported_at"]),
             models.Index(fields=["area", "status", "disabled", "-reported_at"]),
             models.Index(fields=["mountain_name_raw", "trail_name", "-reported_at"]),
+            # 一覧のキーセットページ送り用（services.keyset.KEYSET_ORDERING と同じ順序）
+            models.Index(
+                models.F("reported_at").desc(nulls_last=True),
+                models.F("created_at").desc(),
+                models.F("id").desc(),
+                name="trailcondition_keyset_idx",
+                condition=models.Q(disabled=False),
+            ),
         ]
 
     def __str__(self):
         return f"{self.trail_name}: {self.status}"
+
+    @property
+    def has_match_keys(self) -> bool:
+        """照合キーが生成済みか（登山道名は必須のため、正規化後が空なら未生成）"""
+        return bool(self.trail_name_norm)
+
+    def clear_match_keys(self) -> None:
+        """照合キーを未生成の状態に戻す（生成元の手動編集時。次回の照合・バックフィルで再生成）"""
+        for field in self.MATCH_KEY_FIELDS:
+            setattr(self, field, "")
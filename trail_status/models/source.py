@@ -16,6 +16,13 @@ class OrganizationType(models.TextChoices):
     OTHER = "OTHER", "その他"
 
 
+class MatchingMode(models.TextChoices):
+    """既存レコードとAI出力の対応付け方式"""
+
+    GREEDY = "GREEDY", "貪欲法（スコア順）"
+    OPTIMAL = "OPTIMAL", "最適割当（ハンガリアン法）"
+
+
 class WebSourceManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset().filter(data_format="WEB")
@@ -54,6 +61,20 @@ class DataSource(models.Model):
         help_text="""巡視ブログのエリア名分類用に使用""",
     )  # 例: 奥多摩
 
+    matching_mode = models.CharField(
+        "照合方式",
+        max_length=20,
+        choices=MatchingMode.choices,
+        default=MatchingMode.GREEDY,
+        help_text="既存レコードとAI出力の対応付け方式。似た名前の登山道が多い情報源は最適割当を推奨",
+    )
+    matching_params = models.JSONField(
+        "照合パラメータ",
+        default=dict,
+        blank=True,
+        help_text="類似度の閾値・フィールド重みの上書き（tune_matching コマンドで設定）。空なら既定値",
+    )
+
     # ハッシュベース重複検出
     content_hash = models.CharField(
         "コンテンツハッシュ", max_length=64, blank=True, help_text="スクレイピング内容のハッシュ値（変更検知用）"
@@ -0,0 +1,128 @@
+import logging
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy未導入の環境ではNumPy実装にフォールバック
+    linear_sum_assignment = None
+
+logger = logging.getLogger(__name__)
+
+
+def greedy_assignment(scores: np.ndarray, threshold: float) -> list[tuple[int, int]]:
+    """
+    閾値以上の組み合わせをスコアの高い順に採用する（各行・各列は1回まで）
+
+    Args:
+        scores: 類似度行列（行: AI出力, 列: 既存レコード）
+        threshold: 採用するスコアの下限
+
+    Returns:
+        採用した (行, 列) のリスト（スコア順）
+    """
+    rows, cols = np.nonzero(scores >= threshold)
+    # 同点は行・列の若い順（安定ソート）
+    order = np.argsort(-scores[rows, cols], kind="stable")
+
+    used_rows, used_cols = set(), set()
+    pairs = []
+    for row, col in zip(rows[order].tolist(), cols[order].tolist()):
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        pairs.append((row, col))
+    return pairs
+
+
+def optimal_assignment(scores: np.ndarray, threshold: float) -> list[tuple[int, int]]:
+    """
+    閾値以上の組み合わせのみで、スコアの総和が最大になる1対1の対応付けを求める
+
+    閾値未満の組み合わせは重み0（= 対応付けなしと同等）として割当問題を解き、結果から除外する
+
+    Args:
+        scores: 類似度行列（行: AI出力, 列: 既存レコード）
+        threshold: 採用するスコアの下限
+
+    Returns:
+        採用した (行, 列) のリスト（スコア順）
+    """
+    valid = scores >= threshold
+    if not valid.any():
+        return []
+
+    weights = np.where(valid, scores, 0.0)
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(weights, maximize=True)
+    else:
+        rows, cols = _hungarian_maximize(weights)
+
+    pairs = [(row, col) for row, col in zip(rows.tolist(), cols.tolist()) if valid[row, col]]
+    pairs.sort(key=lambda pair: scores[pair], reverse=True)
+    return pairs
+
+
+def _hungarian_maximize(weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """重み最大の割当（scipy.optimize.linear_sum_assignment(maximize=True) 相当）"""
+    transposed = weights.shape[0] > weights.shape[1]
+    cost = -(weights.T if transposed else weights)
+
+    rows, cols = _hungarian(cost)
+    if transposed:
+        rows, cols = cols, rows
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+
+def _hungarian(cost: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    ハンガリアン法（ポテンシャル法, O(n^2 m)）による最小コスト割当（行数 <= 列数）
+
+    1行ずつ最短増加路を探索し、各ステップの列方向の更新はNumPyで一括計算する
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)  # 行ポテンシャル
+    v = np.zeros(m + 1)  # 列ポテンシャル
+    match = np.zeros(m + 1, dtype=int)  # match[j]: 列jに割り当てた行（1始まり, 0は未割当）
+    way = np.zeros(m + 1, dtype=int)  # 増加路の直前の列
+
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            free = ~used[1:]
+
+            slack = cost[i0 - 1] - u[i0] - v[1:]
+            improved = free & (slack < min_slack[1:])
+            min_slack[1:][improved] = slack[improved]
+            way[1:][improved] = j0
+
+            candidates = np.where(free, min_slack[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            used_cols = np.nonzero(used)[0]
+            u[match[used_cols]] += delta
+            v[used_cols] -= delta
+            min_slack[1:][free] -= delta
+
+            j0 = j1
+            if match[j0] == 0:
+                break
+
+        # 増加路に沿って割当を更新
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+
+    cols = np.nonzero(match[1:])[0]
+    rows = match[1:][cols] - 1
+    return rows, cols
@@ -0,0 +1,58 @@
+import math
+from collections import defaultdict
+from collections.abc import Hashable, Iterable
+
+# ブロックキー: (種別, 値)
+BlockKey = tuple[str, Hashable]
+
+
+def block_keys(area: str, mountain_name: str, token_fields: Iterable[str], ngram: int = 2) -> set[BlockKey]:
+    """
+    レコードのブロックキーを作る（山域・正規化した山名・各フィールドのトークンn-gram）
+
+    山域はLLMの出力が揺れる（隣接する山域を選ぶ）ため、他のキーの絞り込み条件にはせず独立したキーとする
+
+    Args:
+        area: 山域
+        mountain_name: 正規化済みの山名（空なら山名キーなし）
+        token_fields: 空白区切りの分かち書き文字列（登山道名・タイトルなど）
+        ngram: n-gramの最大長（1〜ngram を全て使う）
+
+    Returns:
+        ブロックキーの集合
+    """
+    keys: set[BlockKey] = {("area", area)}
+    if mountain_name:
+        keys.add(("mountain", mountain_name))
+    for text in token_fields:
+        tokens = text.split()
+        for n in range(1, ngram + 1):
+            for i in range(len(tokens) - n + 1):
+                keys.add(("token", tuple(tokens[i : i + n])))
+    return keys
+
+
+class CandidateIndex:
+    """
+    ブロックキーの転置インデックス（情報源ごとに照合のたびに構築）
+
+    共有するブロックキーの重み（IDF: 多くのレコードが持つキーほど小さい）の合計で候補を順位付けし、
+    上位K件だけを類似度計算に回す
+    """
+
+    def __init__(self, keys_list: list[set[BlockKey]]):
+        self.size = len(keys_list)
+        self._postings: dict[BlockKey, list[int]] = defaultdict(list)
+        for idx, keys in enumerate(keys_list):
+            for key in keys:
+                self._postings[key].append(idx)
+        self._weights = {key: math.log(1 + self.size / len(ids)) for key, ids in self._postings.items()}
+
+    def top_candidates(self, keys: set[BlockKey], top_k: int) -> list[int]:
+        """ブロックキーを1つ以上共有する候補のうち、重みの合計が大きい上位K件の添字（同点は若い順）"""
+        totals: dict[int, float] = defaultdict(float)
+        for key in keys:
+            for idx in self._postings.get(key, ()):
+                totals[idx] += self._weights[key]
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+        return [idx for idx, _ in ranked[:top_k]]
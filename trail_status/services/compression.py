@@ -0,0 +1,97 @@
+"""
+公開ページのレスポンス圧縮（brotli / gzip）
+
+一覧ページは表が大きく圧縮に十数ミリ秒かかるため、圧縮後の内容を内容のバージョン付きキャッシュ（site_cache）に
+本文のダイジェストをキーとして保存し、同じ内容はリクエストごとに再圧縮しない
+"""
+
+import gzip
+import hashlib
+import logging
+
+import brotli
+
+from . import site_cache
+
+logger = logging.getLogger(__name__)
+
+COMPRESSED_CACHE_KEY = "trail_status:compressed:{encoding}:{digest}"
+
+# 圧縮方式（優先順）
+ENCODINGS = ("br", "gzip")
+
+# 事前レンダリングしたページの圧縮版のファイル名の接尾辞
+FILE_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# 圧縮しない最小サイズ（バイト。小さい応答は圧縮の効果よりCPUの負担が大きい）
+MIN_SIZE = 1024
+
+# 圧縮レベル {圧縮方式: (リクエスト時, 事前レンダリング時)}
+# リクエスト時は初回（キャッシュなし）の所要時間が十数ミリ秒に収まるレベル、
+# 事前レンダリング時はバッチ処理のため最大（brotli 11 は 6 より数%小さいが数十倍遅い。bench_compression コマンドで計測）
+LEVELS = {"br": (6, 11), "gzip": (6, 9)}
+
+# 圧縮する Content-Type
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml")
+
+
+def accepted_encodings(accept_encoding: str) -> list[str]:
+    """
+    Accept-Encoding のうち対応している圧縮方式（q値の降順、同じならサーバーの優先順）
+
+    例: "gzip;q=0.8, br" → ["br", "gzip"]
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name:
+            weights[name.strip()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    encodings = [encoding for encoding in ENCODINGS if weights.get(encoding, wildcard) > 0]
+    return sorted(encodings, key=lambda encoding: -weights.get(encoding, wildcard))
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """クライアントに返す圧縮方式（圧縮しない場合は None）"""
+    encodings = accepted_encodings(accept_encoding)
+    return encodings[0] if encodings else None
+
+
+def compress(content: bytes, encoding: str, best: bool = False) -> bytes:
+    """
+    圧縮
+
+    Args:
+        content: 圧縮する内容
+        encoding: 圧縮方式（"br" / "gzip"）
+        best: 最大の圧縮レベル（事前レンダリング用）
+    """
+    level = LEVELS[encoding][1 if best else 0]
+    if encoding == "br":
+        return brotli.compress(content, mode=brotli.MODE_TEXT, quality=level)
+    if encoding == "gzip":
+        # 同じ内容は同じバイト列にする（mtime を固定）
+        return gzip.compress(content, compresslevel=level, mtime=0)
+    raise ValueError(f"未対応の圧縮方式: {encoding}")
+
+
+def compress_cached(content: bytes, encoding: str) -> bytes:
+    """圧縮（同じ内容・圧縮方式の結果は内容のバージョンごとにキャッシュ）"""
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    key = COMPRESSED_CACHE_KEY.format(encoding=encoding, digest=digest)
+    # 圧縮前の内容のハッシュをキーに含むため、検証子は不要
+    return site_cache.get_or_build(key, lambda: compress(content, encoding), with_validator=False)
+
+
+def weak_etag(etag: str) -> str:
+    """圧縮した表現の ETag（圧縮前とバイト列が異なるため弱い ETag にする）"""
+    return etag if etag.startswith("W/") else f"W/{etag}"
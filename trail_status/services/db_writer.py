@@ -1,22 +1,62 @@
+import asyncio
+import hashlib
 import logging
-import unicodedata
+from concurrent.futures import Executor
+from dataclasses import dataclass
 from decimal import Decimal
-from functools import lru_cache
 from typing import Any
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
-from rapidfuzz import fuzz
-from sudachipy import Dictionary, SplitMode
+import numpy as np
+from rapidfuzz import fuzz, process
 
-from ..models import DataSource, LlmUsage, TrailCondition
+from ..models import DataSource, LlmUsage, MatchingMode, TrailCondition
+from . import site_cache, tokenizer
+from .assignment import greedy_assignment, optimal_assignment
+from .blocking import BlockKey, CandidateIndex, block_keys
 from .llm_stats import LlmStats
-from .types import ConditionSchemaAiInternal, ConditionSchemaAiList, ResultSingle, SourceSchemaSingle
+from .mountain_resolver import MountainResolver
+from .reconcile_worker import plan_reconcile
+from .source_activity import refresh_source_activity
+from .types import (
+    ConditionSchemaAiInternal,
+    ConditionSchemaAiList,
+    ReconcilePlan,
+    ResultSingle,
+    SourceSchemaSingle,
+)
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class MatchResult:
+    """レコード照合の対応付け結果"""
+
+    matches: list[tuple[int, int, float, str]]  # (AI出力の添字, 候補レコードの添字, スコア, 同定方法)
+    scores: np.ndarray  # 完全一致しなかった残りの類似度行列（行: rest_ai, 列: rest_candidates）
+    rest_ai: list[int]
+    rest_candidates: list[int]
+    exact_count: int
+    fuzzy_count: int
+
+
+@dataclass
+class FieldScores:
+    """フィールドごとの類似度（0.0〜1.0、カットオフ未満は0）と判定の行列"""
+
+    mountain: np.ndarray
+    trail: np.ndarray
+    title: np.ndarray
+    desc: np.ndarray
+    has_desc: np.ndarray  # 両方に詳細説明がある
+    status_match: np.ndarray
+    date_proximity: np.ndarray
+
+
 class DbWriter:
     """
     DB永続化とレコード同定を担当するクラス
@@ -56,16 +96,59 @@ class DbWriter:
     # description比較時の使用文字数
     DESC_COMPARE_LENGTH = 200
 
-    # sudachipyのトークン分割モード (A | B | C)
-    SPLIT_MODE = SplitMode.C
+    # 短い詳細説明とみなす文字数（両方これ以下なら token_set_ratio で比較）
+    DESC_SHORT_LENGTH = 20
+
+    # 類似度行列計算（rapidfuzz.process.cdist）のスレッド数（-1: 全コア）
+    CDIST_WORKERS = -1
+
+    # ブロッキング（候補の絞り込み）を行う候補レコード数の下限
+    BLOCKING_MIN_CANDIDATES = 50
+
+    # ブロッキングでAI出力1件あたりに類似度計算する候補数の上限
+    BLOCKING_TOP_K = 20
+
+    # 情報源ごとの照合パラメータ（DataSource.matching_params）で上書きできる設定
+    # キーは小文字の設定名（例: {"similarity_threshold": 0.65}）。tune_matching コマンドで調整
+    TUNABLE_PARAMS = (
+        "SIMILARITY_THRESHOLD",
+        "FIELD_WEIGHT_MOUNTAIN",
+        "FIELD_WEIGHT_TRAIL",
+        "FIELD_WEIGHT_TITLE",
+        "FIELD_WEIGHT_DESC",
+        "FIELD_WEIGHT_MOUNTAIN_NO_DESC",
+        "FIELD_WEIGHT_TRAIL_NO_DESC",
+        "FIELD_WEIGHT_TITLE_NO_DESC",
+        "DESC_COMPARE_LENGTH",
+    )
 
     # ========================================
 
-    # 形態素解析器（遅延ロード）
-    _analyzer = None
+    # 照合キーの詳細説明ダイジェストの桁数（sha1の16進先頭）
+    DESC_DIGEST_LENGTH = 16
+
+    # 比較フィールドと保存済みの分かち書き（照合キー）の対応
+    MATCH_TOKEN_FIELDS = {
+        "mountain_name_raw": "mountain_name_tokens",
+        "trail_name": "trail_name_tokens",
+        "title": "title_tokens",
+        "description": "description_tokens",
+    }
 
     # 更新対象カラム
-    FIELDS_TO_UPDATE = list(ConditionSchemaAiInternal.model_fields.keys()) + ["updated_at", "synced_at"]
+    FIELDS_TO_UPDATE = (
+        list(ConditionSchemaAiInternal.model_fields.keys())
+        + ["updated_at", "synced_at"]
+        + list(TrailCondition.MATCH_KEY_FIELDS)
+    )
+    SOURCE_FIELDS_TO_UPDATE = ["content_hash", "last_scraped_at", "last_checked_at"]
+
+    # 照合結果（ReconcilePlan）で受け渡すカラム（DB列名。FKはIDで渡しワーカーでDBを参照しない）
+    PLAN_FIELDS = [
+        TrailCondition._meta.get_field(name).attname
+        for name in FIELDS_TO_UPDATE
+        if name not in ("updated_at", "synced_at")
+    ]
 
     def __init__(
         self,
@@ -74,50 +157,100 @@ class DbWriter:
     ):
         self.source_schema_single = source_schema_single
         self.result = result_by_source
+        self.apply_matching_params(source_schema_single.matching_params)
+
+    def apply_matching_params(self, params: dict[str, Any]) -> None:
+        """照合パラメータでこのインスタンスの設定を上書き（未知のキーは無視）"""
+        for name, value in params.items():
+            attr = name.upper()
+            if attr not in self.TUNABLE_PARAMS:
+                logger.warning(f"未知の照合パラメータを無視します: {self.source_schema_single.name} / {name}")
+                continue
+            setattr(self, attr, value)
+
+    @classmethod
+    def default_matching_params(cls) -> dict[str, Any]:
+        """クラス定数の照合パラメータ（matching_params と同じ形式）"""
+        return {attr.lower(): getattr(cls, attr) for attr in cls.TUNABLE_PARAMS}
+
+    def effective_matching_params(self) -> dict[str, Any]:
+        """このインスタンスで有効な照合パラメータ"""
+        return {attr.lower(): getattr(self, attr) for attr in self.TUNABLE_PARAMS}
+
+    def _apply_source_status(self, source: DataSource) -> None:
+        """巡回結果を情報源モデルに反映（未コミット）"""
+        # サイト巡回日時を更新
+        # ハッシュ取得andLLMスキップ時も success=True
+        source.last_checked_at = timezone.now()
+
+        # コンテンツハッシュとスクレイピング時刻を更新
+        if self.result.content_changed:
+            source.content_hash = self.result.new_hash
+            source.last_scraped_at = timezone.now()
+
+    async def areconcile(
+        self, executor: Executor | None = None
+    ) -> tuple[list[TrailCondition], list[TrailCondition], int]:
+        """
+        既存レコードを取得してAI出力と照合する（保存はしない）
 
-    def save_to_source(self) -> None:
-        """情報源モデルへ保存"""
-        if isinstance(self.result, ResultSingle):
-            source = DataSource.objects.get(id=self.source_schema_single.id)
-            # サイト巡回日時を更新
-            # ハッシュ取得andLLMスキップ時も success=True
-            source.last_checked_at = timezone.now()
-
-            # コンテンツハッシュとスクレイピング時刻を更新
-            if self.result.content_changed:
-                source.content_hash = self.result.new_hash
-                source.last_scraped_at = timezone.now()
-
-            # コミット
-            source.save(update_fields=["content_hash", "last_scraped_at", "last_checked_at"])
-
-    def persist_condition_and_usage(self) -> dict[str, Any]:
-        """登山道状況とLLM使用履歴をDBに保存"""
-
-        # AIの結果をDB比較用のデータに整形
+        Returns:
+            (更新対象レコードリスト, 新規作成レコードリスト, AI出力の件数)
+        """
         internal_data_list = self._convert_to_internal_schema()
 
-        # DBから比較対象を取得
-        existing_records = list(TrailCondition.objects.filter(source_id=self.source_schema_single.id))
+        existing_records = [
+            record async for record in TrailCondition.objects.filter(source_id=self.source_schema_single.id)
+        ]
 
-        # 同期するレコードを照合
-        to_update, to_create = self._reconcile_records(existing_records, internal_data_list)
+        if executor is not None:
+            plan = await asyncio.get_running_loop().run_in_executor(
+                executor,
+                plan_reconcile,
+                self.source_schema_single,
+                internal_data_list,
+                [self.record_to_row(record) for record in existing_records],
+            )
+            to_update, to_create = self.apply_plan(plan, existing_records)
+        else:
+            to_update, to_create = await sync_to_async(self._reconcile_records, thread_sensitive=False)(
+                existing_records, internal_data_list
+            )
+        return to_update, to_create, len(internal_data_list)
 
-        # DB同期とLLM使用履歴記録
-        llm_stats: LlmStats = self.result.stats
+    @staticmethod
+    def record_to_row(record: TrailCondition) -> dict[str, Any]:
+        """TrailConditionをプロセス間で受け渡せるプレーンな辞書に変換（FKはID）"""
+        return {field.attname: getattr(record, field.attname) for field in TrailCondition._meta.concrete_fields}
+
+    def build_plan(self, to_update: list[TrailCondition], to_create: list[TrailCondition]) -> ReconcilePlan:
+        """照合結果をプレーンなデータ（ReconcilePlan）に変換"""
+        return ReconcilePlan(
+            updates={record.id: {f: getattr(record, f) for f in self.PLAN_FIELDS} for record in to_update},
+            creates=[self.record_to_row(record) for record in to_create],
+        )
 
-        # 保存
-        with transaction.atomic():
-            updated_count, created_count = self._commit_trail_condition(to_update, to_create)
-            self._commit_llm_usage(llm_stats, len(internal_data_list))
+    def apply_plan(
+        self, plan: ReconcilePlan, existing_records: list[TrailCondition]
+    ) -> tuple[list[TrailCondition], list[TrailCondition]]:
+        """照合結果を既存レコードのインスタンスに反映し (更新対象, 新規作成) を返す（未保存）"""
+        records_by_id = {record.id: record for record in existing_records}
+        to_update = []
+        for record_id, values in plan.updates.items():
+            record = records_by_id[record_id]
+            for field, value in values.items():
+                setattr(record, field, value)
+            to_update.append(record)
+        to_create = [TrailCondition(**row) for row in plan.creates]
+        return to_update, to_create
 
-        logger.info(
-            f"DB保存完了: {self.source_schema_single.name} - {len(internal_data_list)}件 (コスト: ${llm_stats.total_fee:.4f})"
-        )
+    def _build_persist_result(self, count: int, updated_count: int, created_count: int) -> dict[str, Any]:
+        llm_stats: LlmStats = self.result.stats
+        logger.info(f"DB保存完了: {self.source_schema_single.name} - {count}件 (コスト: ${llm_stats.total_fee:.4f})")
 
         return {
             "name": self.source_schema_single.name,
-            "count": len(internal_data_list),
+            "count": count,
             "cost": llm_stats.total_fee,
             "updated": updated_count,
             "created": created_count,
@@ -151,12 +284,27 @@ class DbWriter:
         return internal_data_list
 
     def _commit_trail_condition(
-        self, to_update: list[TrailCondition], to_create: list[TrailCondition]
+        self,
+        to_update: list[TrailCondition],
+        to_create: list[TrailCondition],
+        resolver: MountainResolver | None = None,
     ) -> tuple[int, int]:
-        """TrailConditionをDBに保存"""
+        """
+        TrailConditionをDBに保存
+
+        Args:
+            resolver: 山グループの解決に使うリゾルバ（実行単位で共有。省略時はDBから読み込む）
+        """
 
         now = timezone.now()
 
+        # 山グループ未設定のレコードを山名から紐付け（手動設定済みは変更しない）
+        unlinked = [record for record in to_update + to_create if record.mountain_group_id is None]
+        if unlinked:
+            resolver = resolver or MountainResolver.load()
+            for record in unlinked:
+                record.mountain_group_id = resolver.resolve(record.mountain_name_raw, record.area)
+
         if to_update:
             # bulk_updateではauto_now=Trueが機能しないため手動でセット
             for record in to_update:
@@ -178,12 +326,17 @@ class DbWriter:
             TrailCondition.objects.bulk_create(to_create)
             logger.info(f"新規作成完了: {len(to_create)}件")
 
+        if to_update or to_create:
+            # 情報源の更新状況を再集計し、表示用キャッシュ（サイドバー等）はコミット後に無効化
+            refresh_source_activity([self.source_schema_single.id])
+            transaction.on_commit(site_cache.bump_content_version)
+
         return len(to_update), len(to_create)
 
-    def _commit_llm_usage(self, llm_stats: LlmStats, extracted_record_count: int) -> None:
-        """LLM使用履歴をDBに保存"""
+    def build_llm_usage(self, llm_stats: LlmStats, extracted_record_count: int) -> LlmUsage:
+        """LLM使用履歴のインスタンスを作成（未保存）"""
         stats = llm_stats.to_dict()
-        LlmUsage.objects.create(
+        return LlmUsage(
             source_id=self.source_schema_single.id,
             model=stats["model"],
             prompt_tokens=stats["input_tokens"],
@@ -201,10 +354,13 @@ class DbWriter:
         """
         AIの抽出データ(Pydantic)を既存レコードと照合する。
         3段階のアルゴリズムで同定を行う:
-        1. 完全一致チェック（高速パス）
+        1. 照合キーの完全一致チェック（辞書引きによる高速パス）
         2. RapidFuzzによる類似度計算（フォールバック）
         3. 新規作成
 
+        類似度の対応付けは情報源の照合方式（matching_mode）により、
+        スコア順の貪欲法か、スコア総和が最大となる最適割当を用いる
+
         Args:
             ai_data_list: AI抽出データリスト
 
@@ -215,7 +371,6 @@ class DbWriter:
         to_create: list[TrailCondition] = []
 
         logger.info(f"\n--- データ照合開始: {self.source_schema_single.name}")
-        matches = []
 
         # 新規情報源の初回実行判定
         is_first_sync = len(existing_record_list) == 0
@@ -223,31 +378,22 @@ class DbWriter:
         # ステップ1: 候補レコードを取得（disabled==Falseのみで絞る）
         candidates = list(record for record in existing_record_list if not record.disabled)
 
-        # ステップ2: 候補レコード×AI出力レコードを総当りで類似度計算
-        for ai_idx, ai_record in enumerate(ai_record_list):
-            for candidate in candidates:
-                score = self._calculate_similarity(candidate, ai_record)
-                if score >= self.SIMILARITY_THRESHOLD:
-                    matches.append((score, candidate, ai_idx))
+        # ステップ2〜4: 完全一致・類似度による対応付け
+        match_result = self._match_records(candidates, ai_record_list)
+        scores, rest_ai, rest_candidates = match_result.scores, match_result.rest_ai, match_result.rest_candidates
 
-        # 類似度順にソート
-        matches.sort(key=lambda x: x[0], reverse=True)
-
-        used_model_records = set()
         used_ai_records = set()
-        for score, db_record, ai_idx in matches:
-            if db_record.id in used_model_records or ai_idx in used_ai_records:
-                continue
+        for ai_idx, candidate_idx, score, method in match_result.matches:
+            db_record = candidates[candidate_idx]
 
-            # ピックアップ済みのDB,AI出力をそれぞれ登録
-            used_model_records.add(db_record.id)
+            # ピックアップ済みのAI出力を登録
             used_ai_records.add(ai_idx)
 
             matched_ai_record: ConditionSchemaAiInternal = ai_record_list[ai_idx]
 
             matched_m_name = matched_ai_record.mountain_name_raw
             matched_t_name = matched_ai_record.trail_name
-            logger.info(f"類似度同定 - AI出力: {matched_m_name}/{matched_t_name}")
+            logger.info(f"{method} - AI出力: {matched_m_name}/{matched_t_name}")
             logger.info(
                 f"スコア: {score:.2f} - DB_ID: {db_record.id} / {db_record.mountain_name_raw}/{db_record.trail_name} "
             )
@@ -275,11 +421,13 @@ class DbWriter:
                 to_update.append(db_record)
                 logger.info("==> 変更あり/更新リストに追加")
 
-        for ai_idx, ai_record in enumerate(ai_record_list):
+        for row, ai_idx in enumerate(rest_ai):
             if ai_idx in used_ai_records:
                 # すでにピックアップされていたらスキップ
                 continue
 
+            ai_record = ai_record_list[ai_idx]
+
             # 新規作成
             generated_record_dict = ai_record.model_dump(exclude={"mountain_name_raw", "trail_name"})
             new_record = TrailCondition(
@@ -293,19 +441,146 @@ class DbWriter:
             to_create.append(new_record)
             logger.info(f"新規作成リストに追加 - AI出力名: {ai_record.mountain_name_raw}/{ai_record.trail_name}")
             if settings.DEBUG:
-                for loser_score, loser_db_record, loser_idx in matches:
-                    if ai_idx == loser_idx:
-                        d_i = loser_db_record.id
-                        d_m = loser_db_record.mountain_name_raw
-                        d_t = loser_db_record.trail_name
-                        logger.info(f"最高スコア: {loser_score:.2f} - 対象既存レコード: {d_i} / {d_m}/{d_t}")
-                        break
+                best_col = int(np.argmax(scores[row])) if rest_candidates else None
+                if best_col is not None and scores[row, best_col] >= self.SIMILARITY_THRESHOLD:
+                    loser_db_record = candidates[rest_candidates[best_col]]
+                    d_i = loser_db_record.id
+                    d_m = loser_db_record.mountain_name_raw
+                    d_t = loser_db_record.trail_name
+                    logger.info(f"最高スコア: {scores[row, best_col]:.2f} - 対象既存レコード: {d_i} / {d_m}/{d_t}")
                 else:
                     logger.info(f"所定の閾値{self.SIMILARITY_THRESHOLD}を超えるレコードは見つかりません")
 
-        logger.info(f"--- データ照合終了: {self.source_schema_single.name}")
+        # 保存する内容で照合キーを生成（CPU処理のため照合と同じスレッド・プロセスで行う）
+        for record in to_update + to_create:
+            self.fill_match_keys(record)
+
+        logger.info(
+            f"--- データ照合終了: {self.source_schema_single.name} "
+            f"(完全一致 {match_result.exact_count}件 / 類似度同定 {match_result.fuzzy_count}件)"
+        )
         return to_update, to_create
 
+    def _match_records(
+        self, candidates: list[TrailCondition], ai_record_list: list[ConditionSchemaAiInternal]
+    ) -> MatchResult:
+        """
+        候補レコードとAI出力を1対1で対応付ける（レコードの変更はしない）
+
+        ステップ2: 照合キーの完全一致を辞書引きで対応付け（高速パス）
+        ステップ3: 残りの候補レコード×AI出力レコードの類似度を行列で一括計算（候補が多い場合はブロッキング）
+        ステップ4: 閾値以上の組み合わせから1対1の対応付けを決定（情報源ごとに方式を選択）
+        """
+        exact_pairs = self._exact_match_pairs(candidates, ai_record_list)
+        exact_ai = {ai_idx for ai_idx, _ in exact_pairs}
+        exact_candidates = {candidate_idx for _, candidate_idx in exact_pairs}
+
+        rest_ai = [i for i in range(len(ai_record_list)) if i not in exact_ai]
+        rest_candidates = [j for j in range(len(candidates)) if j not in exact_candidates]
+        scores = self._blocked_similarity_matrix(
+            [candidates[j] for j in rest_candidates], [ai_record_list[i] for i in rest_ai]
+        )
+
+        if self.source_schema_single.matching_mode == MatchingMode.OPTIMAL:
+            fuzzy_pairs = optimal_assignment(scores, self.SIMILARITY_THRESHOLD)
+        else:
+            fuzzy_pairs = greedy_assignment(scores, self.SIMILARITY_THRESHOLD)
+
+        matches = [(ai_idx, candidate_idx, 1.0, "完全一致") for ai_idx, candidate_idx in exact_pairs] + [
+            (rest_ai[row], rest_candidates[col], float(scores[row, col]), "類似度同定") for row, col in fuzzy_pairs
+        ]
+        return MatchResult(matches, scores, rest_ai, rest_candidates, len(exact_pairs), len(fuzzy_pairs))
+
+    def _exact_match_pairs(
+        self, candidates: list[TrailCondition], ai_record_list: list[ConditionSchemaAiInternal]
+    ) -> list[tuple[int, int]]:
+        """
+        照合キー（正規化した山名・登山道名・タイトルと詳細説明ダイジェスト）が完全一致する組を対応付ける
+
+        完全一致の組は類似度1.0となるため、類似度計算の結果と同じ対応付けを辞書引きだけで得られる。
+        同じキーが複数ある場合は若い順に1対1で割り当てる
+
+        Returns:
+            (AI出力の添字, 候補レコードの添字) のリスト
+        """
+        index: dict[tuple[str, str, str, str], list[int]] = {}
+        for candidate_idx, record in enumerate(candidates):
+            index.setdefault(self._exact_key(record), []).append(candidate_idx)
+
+        pairs = []
+        for ai_idx, ai_record in enumerate(ai_record_list):
+            matched = index.get(self._exact_key(ai_record))
+            if matched:
+                pairs.append((ai_idx, matched.pop(0)))
+        return pairs
+
+    def _exact_key(self, record: TrailCondition | ConditionSchemaAiInternal) -> tuple[str, str, str, str]:
+        """完全一致判定のキー（既存レコードは保存済みの照合キーを使用）"""
+        if isinstance(record, TrailCondition) and record.has_match_keys:
+            mountain_name, trail_name = record.mountain_name_norm, record.trail_name_norm
+            description_digest = record.description_digest
+        else:
+            mountain_name = self.normalize_text(record.mountain_name_raw)
+            trail_name = self.normalize_text(record.trail_name)
+            description_digest = self.description_digest(record.description)
+        return mountain_name, trail_name, self.normalize_text(record.title), description_digest
+
+    @classmethod
+    def fill_match_keys(cls, record: TrailCondition) -> None:
+        """照合キー（正規化名・分かち書き・詳細説明ダイジェスト）を生成してレコードにセット（未保存）"""
+        description = (record.description or "")[: cls.DESC_COMPARE_LENGTH]
+        record.mountain_name_norm = cls.normalize_text(record.mountain_name_raw)
+        record.trail_name_norm = cls.normalize_text(record.trail_name)
+        record.mountain_name_tokens = cls.decompose_text(record.mountain_name_raw or "", noun_only=True)
+        record.trail_name_tokens = cls.decompose_text(record.trail_name or "")
+        record.title_tokens = cls.decompose_text(record.title or "")
+        record.description_tokens = cls.decompose_text(description)
+        record.description_digest = cls.description_digest(record.description)
+
+    @classmethod
+    def description_digest(cls, description: str | None) -> str:
+        """比較対象範囲の詳細説明（正規化後）のダイジェスト。空なら空文字"""
+        normalized = cls.normalize_text((description or "")[: cls.DESC_COMPARE_LENGTH])
+        if not normalized:
+            return ""
+        return hashlib.sha1(normalized.encode()).hexdigest()[: cls.DESC_DIGEST_LENGTH]
+
+    def _blocked_similarity_matrix(
+        self, existing_list: list[TrailCondition], new_list: list[ConditionSchemaAiInternal]
+    ) -> np.ndarray:
+        """
+        ブロッキングで絞り込んだ組み合わせのみ類似度を計算した行列（行: AI出力, 列: 既存レコード）
+
+        候補レコードが BLOCKING_MIN_CANDIDATES 件未満なら総当り（_similarity_matrix）と同じ。
+        それ以上の場合は、ブロックキーを共有する上位 BLOCKING_TOP_K 件の候補とのみ比較し、
+        それ以外の組み合わせは0（対応付けなし）とする
+        """
+        if len(existing_list) < self.BLOCKING_MIN_CANDIDATES or not new_list:
+            return self._similarity_matrix(existing_list, new_list)
+
+        index = CandidateIndex([self._block_keys(r) for r in existing_list])
+        allowed = np.zeros((len(new_list), len(existing_list)), dtype=bool)
+        for row, ai_record in enumerate(new_list):
+            allowed[row, index.top_candidates(self._block_keys(ai_record), self.BLOCKING_TOP_K)] = True
+
+        # いずれかのAI出力の候補になった既存レコードのみで行列を計算
+        columns = np.nonzero(allowed.any(axis=0))[0]
+        scores = np.zeros(allowed.shape)
+        if len(columns):
+            scores[:, columns] = self._similarity_matrix([existing_list[j] for j in columns], new_list)
+        logger.debug(f"ブロッキング: {allowed.sum()}/{allowed.size}組を類似度計算（候補 {len(columns)}件）")
+        return np.where(allowed, scores, 0.0)
+
+    def _block_keys(self, record: TrailCondition | ConditionSchemaAiInternal) -> set[BlockKey]:
+        """ブロッキング用のキー（既存レコードは保存済みの照合キーを使用）"""
+        if isinstance(record, TrailCondition) and record.has_match_keys:
+            mountain_name = record.mountain_name_norm
+            token_fields = [record.trail_name_tokens, record.title_tokens]
+        else:
+            mountain_name = self.normalize_text(record.mountain_name_raw)
+            token_fields = [self.decompose_text(record.trail_name or ""), self.decompose_text(record.title or "")]
+        return block_keys(record.area, mountain_name, token_fields)
+
     def _calculate_similarity(self, existing: TrailCondition, new_data: ConditionSchemaAiInternal) -> float:
         """
         複数フィールドを組み合わせた類似度スコア（0.0 ~ 1.0）
@@ -356,7 +631,7 @@ class DbWriter:
             _existing_des = existing.description[: self.DESC_COMPARE_LENGTH]
             _new_des = new_data.description[: self.DESC_COMPARE_LENGTH]
             # 詳細説明の長さで場合分け
-            if len(_existing_des) <= 20 and len(_new_des) <= 20:
+            if len(_existing_des) <= self.DESC_SHORT_LENGTH and len(_new_des) <= self.DESC_SHORT_LENGTH:
                 desc_score = (
                     fuzz.token_set_ratio(
                         _existing_des,
@@ -403,32 +678,115 @@ class DbWriter:
 
         return base_score
 
-    @lru_cache
-    def decompose_text(self, text: str, noun_only: bool = False) -> str:
-        """テキストの形態素解析をしトークンごとに分かち書きした文字列を返却
+    def _similarity_matrix(
+        self, existing_list: list[TrailCondition], new_list: list[ConditionSchemaAiInternal]
+    ) -> np.ndarray:
+        """
+        複数フィールドを組み合わせた類似度スコアの行列（行: AI出力, 列: 既存レコード）
 
-        - token_set_ratio, token_sort_ratio用
+        _calculate_similarity と同じ重み・カットオフ・ボーナスを、
+        各文字列を1回だけ分かち書きしたうえでフィールドごとに rapidfuzz.process.cdist で一括計算する
         """
-        # 形態素解析器の初期化
-        if self._analyzer is None:
-            self._analyzer = Dictionary(dict="core").create()
-
-        normalized = self.normalize_text(text)
-        tokens = []
-        for m in self._analyzer.tokenize(normalized, self.SPLIT_MODE):
-            pos = m.part_of_speech()
-            if noun_only and pos[0] != "名詞":
-                continue
-            tokens.append(m.surface())
+        shape = (len(existing_list), len(new_list))
+        if not all(shape):
+            return np.zeros(shape[::-1])
+        return self._combine_field_scores(self._field_score_matrices(existing_list, new_list)).T
+
+    def _field_score_matrices(
+        self, existing_list: list[TrailCondition], new_list: list[ConditionSchemaAiInternal]
+    ) -> FieldScores:
+        """フィールドごとの類似度・判定の行列（行: 既存レコード, 列: AI出力）。重み・閾値には依存しない"""
+        # 保存済みの詳細説明の分かち書きは既定の比較文字数で作成したもの
+        stored_desc_usable = self.DESC_COMPARE_LENGTH == type(self).DESC_COMPARE_LENGTH
+
+        def tokens(records, field: str, noun_only: bool = False, length: int | None = None) -> list[str]:
+            # 既存レコードは保存済みの分かち書き（照合キー）を使い、再解析しない
+            stored_field = self.MATCH_TOKEN_FIELDS[field]
+            use_stored = field != "description" or stored_desc_usable
+            return [
+                getattr(r, stored_field)
+                if use_stored and isinstance(r, TrailCondition) and r.has_match_keys
+                else self.decompose_text((getattr(r, field) or "")[:length], noun_only=noun_only)
+                for r in records
+            ]
+
+        def cdist(scorer, field: str, score_cutoff: float, **kwargs) -> np.ndarray:
+            # 引数の順序は _calculate_similarity と同じ（既存レコード, AI出力）
+            matrix = process.cdist(
+                tokens(existing_list, field, **kwargs),
+                tokens(new_list, field, **kwargs),
+                scorer=scorer,
+                score_cutoff=score_cutoff,
+                dtype=np.float64,
+                workers=self.CDIST_WORKERS,
+            )
+            return matrix / 100.0
+
+        # 1〜3. 山名・登山道名・タイトルの類似度
+        mountain_score = cdist(fuzz.token_set_ratio, "mountain_name_raw", 0.6, noun_only=True)
+        trail_score = cdist(fuzz.WRatio, "trail_name", 0.5)
+        title_score = cdist(fuzz.WRatio, "title", 0.5)
+
+        # 4. 詳細説明の類似度（両方の長さで場合分け）
+        desc_length = self.DESC_COMPARE_LENGTH
+        existing_des = [(r.description or "")[:desc_length] for r in existing_list]
+        new_des = [(r.description or "")[:desc_length] for r in new_list]
+        has_desc = np.outer([bool(d) for d in existing_des], [bool(d) for d in new_des])
+        is_short = np.outer(
+            [len(d) <= self.DESC_SHORT_LENGTH for d in existing_des],
+            [len(d) <= self.DESC_SHORT_LENGTH for d in new_des],
+        )
+        desc_score = np.where(
+            is_short,
+            cdist(fuzz.token_set_ratio, "description", 0.8, length=desc_length),
+            cdist(fuzz.partial_token_set_ratio, "description", 0.6, length=desc_length),
+        )
+
+        # ボーナス1: statusが一致
+        status_match = np.equal.outer(
+            np.array([r.status for r in existing_list], dtype=object),
+            np.array([r.status for r in new_list], dtype=object),
+        )
 
-        if not tokens:
-            logger.warning("トークンが空です。原文を返却します。")
-            return normalized
-        return " ".join(tokens)
+        # ボーナス2: 登録日が近い（日付が無い組み合わせはNaNで比較対象外）
+        created_days = np.array([r.created_at.date().toordinal() if r.created_at else np.nan for r in existing_list])
+        reported_days = np.array([r.reported_at.toordinal() if r.reported_at else np.nan for r in new_list])
+        with np.errstate(invalid="ignore"):
+            date_proximity = np.abs(np.subtract.outer(created_days, reported_days)) <= self.DATE_PROXIMITY_DAYS
+
+        return FieldScores(mountain_score, trail_score, title_score, desc_score, has_desc, status_match, date_proximity)
+
+    def _combine_field_scores(self, fields: FieldScores) -> np.ndarray:
+        """フィールドごとの類似度を重み付けして合計し、ボーナスを加算（形状は入力と同じ）"""
+        base_score = np.where(
+            fields.has_desc,
+            fields.mountain * self.FIELD_WEIGHT_MOUNTAIN
+            + fields.trail * self.FIELD_WEIGHT_TRAIL
+            + fields.title * self.FIELD_WEIGHT_TITLE
+            + fields.desc * self.FIELD_WEIGHT_DESC,
+            fields.mountain * self.FIELD_WEIGHT_MOUNTAIN_NO_DESC
+            + fields.trail * self.FIELD_WEIGHT_TRAIL_NO_DESC
+            + fields.title * self.FIELD_WEIGHT_TITLE_NO_DESC,
+        )
+        if self.BONUS_STATUS_MATCH:
+            base_score = np.where(
+                fields.status_match, np.minimum(1.0, base_score + self.BONUS_STATUS_MATCH), base_score
+            )
+        if self.BONUS_DATE_PROXIMITY:
+            base_score = np.where(
+                fields.date_proximity, np.minimum(1.0, base_score + self.BONUS_DATE_PROXIMITY), base_score
+            )
+        return base_score
+
+    @staticmethod
+    def decompose_text(text: str, noun_only: bool = False) -> str:
+        """テキストの形態素解析をしトークンごとに分かち書きした文字列を返却
+
+        - 形態素解析器とキャッシュは全情報源で共有（services.tokenizer）
+        """
+        return tokenizer.decompose_text(text, noun_only=noun_only)
 
     @staticmethod
     def normalize_text(text: str) -> str:
         """全角半角・空白を揃えて比較の精度を上げる"""
-        if not text:
-            return ""
-        return unicodedata.normalize("NFKC", text).strip().replace(" ", "").replace("　", "")
+        return tokenizer.normalize_text(text)
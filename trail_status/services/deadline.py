@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+
+class DeadlineExceeded(Exception):
+    """実行期限を超過した（リトライ待機が期限を越える場合など）"""
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """
+    処理の期限（time.monotonic基準）
+
+    trail_sync → AiPipeline → DataFetcher / ConversationalAi へ受け渡し、
+    各層のタイムアウトやリトライ待機を残り時間に収める。
+    expires_at=None は期限なし。
+    """
+
+    expires_at: float | None = None
+
+    @classmethod
+    def after(cls, seconds: float | None) -> Deadline:
+        """現在から指定秒数後の期限（Noneなら期限なし）"""
+        if seconds is None:
+            return cls()
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float | None:
+        """残り秒数（期限なしならNone、超過済みなら0）"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() == 0.0
+
+    def earliest(self, seconds: float | None) -> Deadline:
+        """この期限と「現在から指定秒数後」のうち早い方"""
+        other = Deadline.after(seconds)
+        if self.expires_at is None:
+            return other
+        if other.expires_at is None:
+            return self
+        return Deadline(min(self.expires_at, other.expires_at))
+
+    def clamp(self, seconds: float) -> float:
+        """タイムアウト値を残り時間以下に丸める"""
+        remaining = self.remaining()
+        return seconds if remaining is None else min(seconds, remaining)
+
+    def check_sleep(self, seconds: float) -> None:
+        """指定秒数の待機後に期限を越える場合は DeadlineExceeded を送出"""
+        remaining = self.remaining()
+        if remaining is not None and seconds >= remaining:
+            raise DeadlineExceeded(f"残り{remaining:.1f}秒のため{seconds}秒の待機をせずに中断します")
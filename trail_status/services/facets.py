@@ -0,0 +1,73 @@
+"""
+絞り込み項目（山域・状況・情報源）ごとの件数を1回のクエリで集計する
+
+PostgreSQL は GROUPING SETS で項目ごとの GROUP BY を1回の走査で行い、
+それ以外（開発用のSQLite等）は項目の組み合わせで GROUP BY した結果をPythonで合算する
+"""
+
+from collections import Counter
+from typing import Any
+
+from django.db import connections
+from django.db.models import Count, QuerySet
+
+# 登山道状況の絞り込み項目（モデルのフィールド名）
+FACET_FIELDS = ("area", "status", "source")
+
+
+def facet_counts(queryset: QuerySet, fields: tuple[str, ...] = FACET_FIELDS) -> dict[str, dict[Any, int]]:
+    """
+    絞り込み項目ごとの値と件数（クエリ1回）
+
+    Args:
+        queryset: 集計対象（絞り込み済みでよい）
+        fields: 項目のフィールド名（FKはIDで集計）
+
+    Returns:
+        {フィールド名: {値: 件数}}
+    """
+    columns = [queryset.model._meta.get_field(name).attname for name in fields]
+    if connections[queryset.db].vendor == "postgresql":
+        rows = _grouping_sets(queryset, columns)
+    else:
+        rows = _combined_group_by(queryset, columns)
+
+    counts: dict[str, dict[Any, int]] = {name: {} for name in fields}
+    for index, value, count in rows:
+        counts[fields[index]][value] = count
+    return counts
+
+
+def _grouping_sets(queryset: QuerySet, columns: list[str]) -> list[tuple[int, Any, int]]:
+    """GROUPING SETS による集計（PostgreSQL）。(項目の添字, 値, 件数) のリスト"""
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    subquery, params = queryset.order_by().values(*columns).query.sql_with_params()
+    quoted = [quote(column) for column in columns]
+    # GROUPING(列) は、その列で集計した行なら0
+    sql = (
+        f"SELECT {', '.join(quoted)}, {', '.join(f'GROUPING({c})' for c in quoted)}, COUNT(*) "
+        f"FROM ({subquery}) AS facet GROUP BY GROUPING SETS ({', '.join(f'({c})' for c in quoted)})"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        result = cursor.fetchall()
+
+    size = len(columns)
+    rows = []
+    for row in result:
+        values, grouping, count = row[:size], row[size : size * 2], row[-1]
+        index = grouping.index(0)
+        rows.append((index, values[index], count))
+    return rows
+
+
+def _combined_group_by(queryset: QuerySet, columns: list[str]) -> list[tuple[int, Any, int]]:
+    """全項目の組み合わせで GROUP BY し、項目ごとに合算（データベース非依存）"""
+    counters = [Counter() for _ in columns]
+    for row in queryset.order_by().values_list(*columns).annotate(count=Count("pk")):
+        *values, count = row
+        for counter, value in zip(counters, values):
+            counter[value] += count
+
+    return [(index, value, count) for index, counter in enumerate(counters) for value, count in counter.items()]
@@ -6,10 +6,15 @@ import httpx
 import trafilatura
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
+from .deadline import Deadline
+
 logger = logging.getLogger(__name__)
 
 
 class DataFetcher:
+    # 1リクエストあたりのタイムアウト（秒）
+    REQUEST_TIMEOUT = 30.0
+
     def __init__(self, url: str):
         self.url = url
         self.headers = {
@@ -22,10 +27,11 @@ class DataFetcher:
         retry=retry_if_exception_type((httpx.HTTPError, httpx.ConnectError)),
         reraise=True,  # 3回失敗したら最後のエラーを投げる
     )
-    async def fetch_html(self, client: httpx.AsyncClient) -> str:
-        """生HTMLのスクレイピング"""
+    async def fetch_html(self, client: httpx.AsyncClient, deadline: Deadline | None = None) -> str:
+        """生HTMLのスクレイピング（deadline指定時はリクエストのタイムアウトを残り時間に収める）"""
+        kwargs = {"timeout": deadline.clamp(self.REQUEST_TIMEOUT)} if deadline else {}
         try:
-            response = await client.get(self.url, headers=self.headers)
+            response = await client.get(self.url, headers=self.headers, **kwargs)
             response.raise_for_status()
             return response.text
 
@@ -85,7 +91,16 @@ class DataFetcher:
             tuple[bool, str]: (変更フラグ, 新しいハッシュ値)
         """
         current_hash = self.calculate_content_hash(html)
+        return self.compare_hash(current_hash, previous_hash)
+
+    @staticmethod
+    def compare_hash(current_hash: str, previous_hash: Optional[str]) -> tuple[bool, str]:
+        """
+        計算済みのハッシュ値を前回のハッシュ値と比較
 
+        Returns:
+            tuple[bool, str]: (変更フラグ, 新しいハッシュ値)
+        """
         # 初回スクレイピングまたはハッシュが異なる場合は変更あり
         has_changed = not previous_hash or current_hash != previous_hash
 
@@ -121,3 +136,31 @@ class DataFetcher:
             include_comments=include_comments,
         )
         return content or ""
+
+
+def combine_content_hashes(hashes: list[str]) -> str:
+    """
+    複数ページのハッシュ値を1つにまとめる（情報源単位の変更検知用）
+
+    ページが1つの場合はそのまま返す（url2未設定の情報源は従来のハッシュ値を維持）
+    """
+    if len(hashes) == 1:
+        return hashes[0]
+    return hashlib.sha256("\n".join(hashes).encode("utf-8")).hexdigest()
+
+
+def join_page_texts(pages: list[tuple[str, str]]) -> str:
+    """
+    複数ページの抽出テキストを区切り付きで連結する（LLMへの1リクエスト用）
+
+    Args:
+        pages: (URL, 抽出テキスト) のリスト
+
+    Returns:
+        str: 連結したテキスト（ページが1つの場合はそのまま）
+    """
+    if len(pages) == 1:
+        return pages[0][1]
+    return "\n\n".join(
+        f"===== ページ{i}/{len(pages)}: {url} =====\n{text}" for i, (url, text) in enumerate(pages, start=1)
+    )
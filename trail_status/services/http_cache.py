@@ -0,0 +1,126 @@
+"""
+公開ページのHTTPキャッシュ（ETag / Last-Modified と共有キャッシュ向けの Cache-Control）
+
+公開ページの内容が変わるのは同期・管理画面での保存時と日付の変化（「1週間以内」等の表示）のみのため、
+各テーブルの最終更新日時と有効件数・日付から検証子を作り、変化がなければ 304 を返す。
+Cloudflare 等の共有キャッシュには s-maxage / stale-while-revalidate でHTMLを保持させ、
+同期後は purge_cdn() で削除する（Cloudflare 側でHTMLをキャッシュするルールの設定が必要）
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+
+from ..models import BlogFeed, DataSource, TrailCondition
+from . import site_cache
+
+logger = logging.getLogger(__name__)
+
+VALIDATOR_CACHE_KEY = "trail_status:http_validator"
+
+# 検証子のキャッシュの有効期限（秒）
+# 同期を実行したプロセスではバージョン更新で即座に再計算し、他のプロセス・インスタンスでもこの時間で反映する
+# （サイドバー等の表示用データのキャッシュも検証子をキーに含むため、同時に再計算される）
+VALIDATOR_CACHE_TIMEOUT = 60
+
+CLOUDFLARE_PURGE_URL = "https://api.cloudflare.com/client/v4/zones/{zone_id}/purge_cache"
+
+
+@dataclass(frozen=True)
+class Validator:
+    """公開ページ共通の検証子"""
+
+    etag: str
+    last_modified: datetime
+
+
+def compute_validator() -> Validator:
+    """各テーブルの最終更新日時・有効件数と今日の日付から検証子を計算（クエリ3回）"""
+    conditions = TrailCondition.objects.aggregate(
+        updated=Max("updated_at"), synced=Max("synced_at"), active=Count("pk", filter=Q(disabled=False))
+    )
+    sources = DataSource.objects.aggregate(updated=Max("updated_at"), checked=Max("last_checked_at"))
+    feeds = BlogFeed.objects.aggregate(created=Max("created_at"), active=Count("pk", filter=Q(disabled=False)))
+
+    today = timezone.localdate()
+    # 日付で変わる表示があるため、今日の0時より前にはしない
+    timestamps = [
+        conditions["updated"],
+        conditions["synced"],
+        sources["updated"],
+        sources["checked"],
+        feeds["created"],
+        timezone.make_aware(datetime.combine(today, time.min)),
+    ]
+    last_modified = max(timestamp for timestamp in timestamps if timestamp is not None)
+
+    key = "|".join(str(value) for value in (*timestamps, conditions["active"], feeds["active"]))
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return Validator(etag=f'"{digest}"', last_modified=last_modified)
+
+
+def get_validator() -> Validator:
+    """現在の検証子（内容のバージョンごとにキャッシュ）"""
+    return site_cache.get_or_build(
+        VALIDATOR_CACHE_KEY, compute_validator, timeout=VALIDATOR_CACHE_TIMEOUT, with_validator=False
+    )
+
+
+def patch_shared_cache_headers(response: HttpResponse) -> HttpResponse:
+    """
+    共有キャッシュ（CDN）向けの Cache-Control を設定
+
+    ブラウザは毎回再検証（max-age=0）し、CDNは s-maxage の間保持する。
+    期限切れ後も stale-while-revalidate の間は古い内容を返しつつ裏で更新する
+    """
+    if response.status_code not in (200, 304):
+        return response
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=0,
+        s_maxage=settings.HTTP_CACHE_S_MAXAGE,
+        stale_while_revalidate=settings.HTTP_CACHE_STALE_WHILE_REVALIDATE,
+    )
+    return response
+
+
+def purge_cdn() -> bool:
+    """
+    Cloudflare のキャッシュを全て削除（同期後に実行）
+
+    CLOUDFLARE_ZONE_ID / CLOUDFLARE_API_TOKEN が未設定なら何もしない
+
+    Returns:
+        削除成功時 True
+    """
+    zone_id = settings.CLOUDFLARE_ZONE_ID
+    api_token = settings.CLOUDFLARE_API_TOKEN
+    if not (zone_id and api_token):
+        logger.debug("Cloudflareの設定がないため、キャッシュ削除をスキップします")
+        return False
+
+    # httpx はバッチ用の依存関係のため、公開ページのサーバーでは読み込まない
+    import httpx
+
+    try:
+        response = httpx.post(
+            CLOUDFLARE_PURGE_URL.format(zone_id=zone_id),
+            headers={"Authorization": f"Bearer {api_token}"},
+            json={"purge_everything": True},
+            timeout=10,
+        )
+        response.raise_for_status()
+        logger.info("Cloudflareのキャッシュを削除しました")
+        return True
+
+    except Exception as e:
+        logger.error(f"Cloudflareのキャッシュ削除に失敗しました: {e}")
+        return False
@@ -0,0 +1,104 @@
+"""
+登山道状況一覧のキーセット（カーソル）ページ送り
+
+(報告日, 登録日時, ID) の降順で並べ、前ページ末尾の値より後ろの行を LIMIT で取得する。
+OFFSET と件数の集計を使わないため、履歴が増えても1ページの取得コストは一定。
+並び順は TrailCondition の部分インデックス（disabled=False）と一致させる
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from django.db.models import F, Q, QuerySet
+
+# 1ページの件数
+PAGE_SIZE = 100
+
+# 並び順（報告日が未設定の行は末尾。インデックスと同じ順序）
+KEYSET_ORDERING = (F("reported_at").desc(nulls_last=True), F("created_at").desc(), F("id").desc())
+
+
+class InvalidCursor(ValueError):
+    """不正なカーソル文字列"""
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """ページ末尾の行の並び替えキー"""
+
+    reported_at: date | None
+    created_at: datetime
+    id: int
+
+    @classmethod
+    def from_object(cls, obj) -> "Cursor":
+        return cls(reported_at=obj.reported_at, created_at=obj.created_at, id=obj.id)
+
+    def encode(self) -> str:
+        """URL用の文字列（URLセーフなBase64）"""
+        reported_at = self.reported_at.isoformat() if self.reported_at else None
+        payload = json.dumps([reported_at, self.created_at.isoformat(), self.id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, value: str) -> "Cursor":
+        try:
+            padded = value + "=" * (-len(value) % 4)
+            reported_at, created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return cls(
+                reported_at=date.fromisoformat(reported_at) if reported_at else None,
+                created_at=datetime.fromisoformat(created_at),
+                id=int(id),
+            )
+        except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+            raise InvalidCursor(f"不正なカーソル: {value!r}") from e
+
+    def after(self) -> Q:
+        """並び順でこの行より後ろの行の条件"""
+        # 登録日時・IDが同じ報告日内で後ろ
+        tie = Q(created_at__lt=self.created_at) | Q(created_at=self.created_at, id__lt=self.id)
+        if self.reported_at is None:
+            # 報告日なしは末尾のため、報告日なしの中でのみ後ろを探す
+            return Q(reported_at__isnull=True) & tie
+        return (
+            Q(reported_at__lt=self.reported_at) | Q(reported_at__isnull=True) | (Q(reported_at=self.reported_at) & tie)
+        )
+
+
+@dataclass
+class KeysetPage:
+    """1ページ分の行と次ページのカーソル"""
+
+    object_list: list
+    next_cursor: Cursor | None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+def keyset_page(queryset: QuerySet, cursor: Cursor | None = None, page_size: int = PAGE_SIZE) -> KeysetPage:
+    """
+    カーソル以降の1ページを取得（クエリ1回）
+
+    Args:
+        queryset: 絞り込み済みの登山道状況
+        cursor: 前ページ末尾のカーソル（Noneなら先頭ページ）
+        page_size: 1ページの件数
+
+    Returns:
+        KeysetPage
+    """
+    queryset = queryset.order_by(*KEYSET_ORDERING)
+    if cursor is not None:
+        queryset = queryset.filter(cursor.after())
+
+    # 1件多く取得して次ページの有無を判定
+    rows = list(queryset[: page_size + 1])
+    if len(rows) <= page_size:
+        return KeysetPage(object_list=rows, next_cursor=None)
+    rows = rows[:page_size]
+    return KeysetPage(object_list=rows, next_cursor=Cursor.from_object(rows[-1]))
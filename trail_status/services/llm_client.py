@@ -12,6 +12,7 @@ from langsmith import traceable
 from pydantic import BaseModel, Field, ValidationError, computed_field
 
 from . import prompt_utils
+from .deadline import Deadline
 from .llm_stats import TokenStats
 from .prompt_utils import PromptFile
 from .types import ConditionSchemaAiList
@@ -121,6 +122,7 @@ class LlmConfig(BaseModel):
 
 class ConversationalAi(ABC):
     MAX_RETRIES = 3
+    REQUEST_TIMEOUT = 120  # 1リクエストあたりのタイムアウト（秒）
 
     def __init__(self, config: LlmConfig):
         self.model: str = config.model
@@ -133,6 +135,7 @@ class ConversationalAi(ABC):
         self.provider: str | None = config.provider
         self.websearch: bool = config.allow_websearch
         self._config: LlmConfig | None = config
+        self.deadline: Deadline = Deadline()  # パイプラインから注入される実行期限
 
     async def generate(self) -> tuple[ConditionSchemaAiList, TokenStats]:
         @traceable(
@@ -194,6 +197,8 @@ class ConversationalAi(ABC):
     # サーバーエラーとバリデーションエラー時のみリトライ
     async def handle_server_error(self, e, i, max_retries):
         if i < max_retries - 1:
+            # 待機後に実行期限を越える場合はリトライせず中断
+            self.deadline.check_sleep(3 ** (i + 1))
             logger.warning(f"{self.model}の計算資源が逼迫しているようです。{3 ** (i + 1)}秒後にリトライします。")
             await asyncio.sleep(3 ** (i + 1))
         else:
@@ -211,6 +216,7 @@ class ConversationalAi(ABC):
                     "Temperature=0は毎回同じ出力（＝構造化失敗）となります。設定を0.1以上にすることを検討してください"
                 )
             logger.warning(f"設定ファイル名:{self.prompt_filename!r}")
+            self.deadline.check_sleep(3)
             logger.warning("3秒後にリトライします")
             await asyncio.sleep(3)
         else:
@@ -268,7 +274,10 @@ class DeepseekClient(ConversationalAi):
         from langsmith.wrappers import wrap_openai
         from openai import AsyncOpenAI
 
-        client = wrap_openai(AsyncOpenAI(api_key=self.api_key, base_url="https://api.deepseek.com"))
+        # タイムアウトはopenaiのデフォルト（10分）。実行期限が近い場合は残り時間まで
+        client = wrap_openai(
+            AsyncOpenAI(api_key=self.api_key, base_url="https://api.deepseek.com", timeout=self.deadline.clamp(600))
+        )
 
         response = await client.chat.completions.create(
             model=self.model,
@@ -345,9 +354,9 @@ class GeminiClient(ConversationalAi):
         from langsmith.wrappers import wrap_gemini
 
         # api_key引数なしでも、環境変数"GEMNI_API_KEY"の値を勝手に参照するが、可読性のため代入
-        client = wrap_gemini(
-            genai.Client(http_options=types.HttpOptions(timeout=120 * 1000))  # 2分
-        )
+        # タイムアウトは2分（実行期限が近い場合は残り時間まで）
+        timeout_ms = int(self.deadline.clamp(self.REQUEST_TIMEOUT) * 1000)
+        client = wrap_gemini(genai.Client(http_options=types.HttpOptions(timeout=timeout_ms)))
 
         # 検索許可設定
         search_tool = types.Tool(google_search=types.GoogleSearch()) if self.websearch else None
@@ -439,7 +448,8 @@ class GptClient(ConversationalAi):
         from langsmith.wrappers import wrap_openai
         from openai import AsyncOpenAI
 
-        client = wrap_openai(AsyncOpenAI())
+        # タイムアウトはopenaiのデフォルト（10分）。実行期限が近い場合は残り時間まで
+        client = wrap_openai(AsyncOpenAI(timeout=self.deadline.clamp(600)))
         # 検索許可設定
         search_tool = (
             {"type": "web_search", "user_location": {"city": "Tokyo", "type": "approximate"}}
@@ -0,0 +1,212 @@
+"""
+レコード照合の閾値・フィールド重みの自動調整
+
+ケースごとにフィールド別の類似度行列（DbWriter._field_score_matrices）を1回だけ計算しておき、
+各パラメータ候補は重み付き和（NumPy演算）と対応付けだけで評価する
+"""
+
+import logging
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from ..models import MatchingMode
+from .assignment import greedy_assignment, optimal_assignment
+from .db_writer import DbWriter, FieldScores
+from .reconcile_dataset import Accuracy, GoldenCase, build_reconcile_inputs, evaluate
+
+logger = logging.getLogger(__name__)
+
+# 合計が1になるように調整する重みの組（詳細説明あり / なし）
+WEIGHT_PARAMS_DESC = ("field_weight_mountain", "field_weight_trail", "field_weight_title", "field_weight_desc")
+WEIGHT_PARAMS_NO_DESC = ("field_weight_mountain_no_desc", "field_weight_trail_no_desc", "field_weight_title_no_desc")
+
+
+def weight_grid(size: int, step: float) -> list[tuple[float, ...]]:
+    """合計が1になる size 個の重みの組（各重みは step 刻み）"""
+
+    def compositions(total: int, parts: int) -> Iterator[tuple[int, ...]]:
+        if parts == 1:
+            yield (total,)
+            return
+        for first in range(total + 1):
+            for rest in compositions(total - first, parts - 1):
+                yield (first, *rest)
+
+    units = round(1 / step)
+    return [tuple(round(u / units, 4) for u in combo) for combo in compositions(units, size)]
+
+
+def boundary_params(params: dict[str, Any], candidates: dict[str, list]) -> list[str]:
+    """
+    探索した候補の端（最小・最大）の値になったパラメータ名
+
+    最良値が端にある場合は範囲外により良い値があるか、ラベルに過学習している可能性がある
+    （自動ラベルでは閾値を最大にして曖昧な組を対応付けないほど F1 が上がる）
+    """
+    return [
+        name
+        for name, values in candidates.items()
+        if len(set(values)) > 1 and params.get(name) in (min(values), max(values))
+    ]
+
+
+@dataclass
+class _PreparedCase:
+    """類似度計算済みのケース（完全一致の組は重み・閾値によらず固定）"""
+
+    labels: dict[int, int | None]
+    exact_pairs: list[tuple[int, int]]
+    rest_ai: list[int]
+    rest_candidates: list[int]
+    offset: int  # 連結したフィールド別スコアでの開始位置
+    shape: tuple[int, int]  # (残りの既存レコード数, 残りのAI出力数)
+
+
+@dataclass
+class TuningResult:
+    """調整結果"""
+
+    params: dict[str, Any]
+    accuracy: Accuracy
+    baseline_params: dict[str, Any]
+    baseline: Accuracy
+    evaluated: int  # 評価したパラメータ候補の数
+    seconds: float
+
+
+class MatchingTuner:
+    """
+    正解ラベル付きのケースから照合パラメータを探索する
+
+    ブロッキングは適用せず総当りの類似度で評価する（候補数の少ない情報源を想定）
+    """
+
+    def __init__(
+        self,
+        cases: list[GoldenCase],
+        matching_mode: str = MatchingMode.GREEDY,
+        base_params: dict[str, Any] | None = None,
+        desc_lengths: tuple[int, ...] = (DbWriter.DESC_COMPARE_LENGTH,),
+    ):
+        self.base_params = DbWriter.default_matching_params() | (base_params or {})
+        self.desc_lengths = tuple(desc_lengths)
+        self.assign = optimal_assignment if matching_mode == MatchingMode.OPTIMAL else greedy_assignment
+        self._cases: list[_PreparedCase] = []
+        self._fields: dict[int, FieldScores] = {}
+        self.writer = self._prepare([case for case in cases if case.labels])
+
+    def _prepare(self, cases: list[GoldenCase]) -> DbWriter:
+        """ケースごとのフィールド別スコアを比較文字数ごとに計算し、1次元に連結して保持"""
+        writer = None
+        rests = []
+        offset = 0
+        for i, case in enumerate(cases, start=1):
+            writer, existing_records, ai_records = build_reconcile_inputs(i, case.previous, case.latest)
+            for record in existing_records:
+                DbWriter.fill_match_keys(record)  # DB保存済みのレコードと同じく照合キーを持たせる
+
+            exact_pairs = writer._exact_match_pairs(existing_records, ai_records)
+            exact_ai = {ai_idx for ai_idx, _ in exact_pairs}
+            exact_candidates = {candidate_idx for _, candidate_idx in exact_pairs}
+            rest_ai = [j for j in range(len(ai_records)) if j not in exact_ai]
+            rest_candidates = [j for j in range(len(existing_records)) if j not in exact_candidates]
+            shape = (len(rest_candidates), len(rest_ai))
+            self._cases.append(_PreparedCase(case.labels, exact_pairs, rest_ai, rest_candidates, offset, shape))
+            rests.append(([existing_records[j] for j in rest_candidates], [ai_records[j] for j in rest_ai]))
+            offset += shape[0] * shape[1]
+
+        if writer is None:
+            writer = build_reconcile_inputs(0, [], [])[0]
+
+        for length in self.desc_lengths:
+            writer.DESC_COMPARE_LENGTH = length
+            per_case = [
+                writer._field_score_matrices(existing_list, new_list)
+                for existing_list, new_list in rests
+                if existing_list and new_list
+            ]
+            self._fields[length] = FieldScores(
+                *(
+                    np.concatenate([getattr(f, name).ravel() for f in per_case]) if per_case else np.zeros(0)
+                    for name in FieldScores.__dataclass_fields__
+                )
+            )
+        return writer
+
+    @property
+    def labelled_count(self) -> int:
+        return sum(len(case.labels) for case in self._cases)
+
+    def evaluate(self, params: dict[str, Any]) -> Accuracy:
+        """パラメータ候補の精度（params は base_params との差分でもよい）"""
+        writer = self.writer
+        writer.apply_matching_params(self.base_params | params)
+        combined = writer._combine_field_scores(self._fields[writer.DESC_COMPARE_LENGTH])
+
+        accuracy = Accuracy()
+        for case in self._cases:
+            size = case.shape[0] * case.shape[1]
+            pairs = []
+            if size:
+                scores = combined[case.offset : case.offset + size].reshape(case.shape).T
+                pairs = self.assign(scores, writer.SIMILARITY_THRESHOLD)
+            matches = [(ai_idx, candidate_idx, 1.0, "完全一致") for ai_idx, candidate_idx in case.exact_pairs] + [
+                (case.rest_ai[row], case.rest_candidates[col], 0.0, "類似度同定") for row, col in pairs
+            ]
+            accuracy.add(evaluate(matches, case.labels))
+        return accuracy
+
+    def _rank(self, accuracy: Accuracy, params: dict[str, Any]) -> tuple[float, float]:
+        """F1が高く、同点なら現在の設定からの変化が小さい候補を優先"""
+        distance = sum(
+            abs(value - self.base_params[name]) / (self.base_params[name] or 1)
+            if name == "desc_compare_length"
+            else abs(value - self.base_params[name])
+            for name, value in params.items()
+        )
+        return accuracy.f1, -distance
+
+    def search(self, thresholds: list[float], weight_step: float = 0.1, rounds: int = 2) -> TuningResult:
+        """
+        比較文字数ごとに、重みの組（詳細説明あり / なし）を交互に閾値と合わせて総当りする座標探索
+
+        Args:
+            thresholds: 類似度の閾値の候補
+            weight_step: 重みの刻み幅
+            rounds: 詳細説明あり / なしの重みを交互に探索する回数
+        """
+        started = time.perf_counter()
+        baseline = self.evaluate(self.base_params)
+        best_params, best_accuracy = dict(self.base_params), baseline
+        best_rank = self._rank(baseline, best_params)
+        evaluated = 1
+
+        grids = {
+            fields: weight_grid(len(fields), weight_step) for fields in (WEIGHT_PARAMS_DESC, WEIGHT_PARAMS_NO_DESC)
+        }
+        for length in self.desc_lengths:
+            params = self.base_params | {"desc_compare_length": length}
+            for _ in range(rounds):
+                for fields, grid in grids.items():
+                    for weights in grid:
+                        for threshold in thresholds:
+                            candidate = params | dict(zip(fields, weights)) | {"similarity_threshold": threshold}
+                            accuracy = self.evaluate(candidate)
+                            evaluated += 1
+                            rank = self._rank(accuracy, candidate)
+                            if rank > best_rank:
+                                best_params, best_accuracy, best_rank = candidate, accuracy, rank
+                    # 次の座標の探索は、これまでの最良値から始める（他の比較文字数の最良値は除く）
+                    if best_params["desc_compare_length"] == length:
+                        params = dict(best_params)
+
+        self.writer.apply_matching_params(self.base_params)
+        seconds = time.perf_counter() - started
+        logger.debug(
+            f"照合パラメータの探索: {evaluated}候補 / {seconds:.2f}秒 / F1 {baseline.f1:.4f}→{best_accuracy.f1:.4f}"
+        )
+        return TuningResult(best_params, best_accuracy, dict(self.base_params), baseline, evaluated, seconds)
@@ -0,0 +1,129 @@
+import logging
+from collections import deque
+from dataclasses import dataclass
+
+from ..models import MountainAlias, MountainGroup
+from . import tokenizer
+
+logger = logging.getLogger(__name__)
+
+# 部分一致に使うキーの最小文字数（「山」「岳」など1文字の別名による誤リンクを防ぐ）
+MIN_KEY_LENGTH = 2
+
+
+@dataclass(frozen=True)
+class MountainKey:
+    """照合キー（正規化済みの山名・別名）が指す山グループ"""
+
+    group_id: int
+    area: str
+
+
+class AhoCorasick:
+    """
+    複数キーの部分一致を1回の走査で探すオートマトン（文字単位のトライ + 失敗リンク）
+
+    キー数は山名・別名の件数（数百程度）のため純Pythonで実装
+    """
+
+    def __init__(self, keys: dict[str, MountainKey]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[str]] = [[]]
+        self._values = keys
+
+        # トライの構築
+        for key in keys:
+            node = 0
+            for char in key:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._output[node].append(key)
+
+        # 失敗リンクを幅優先で構築
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text: str) -> list[tuple[int, str, MountainKey]]:
+        """テキストに含まれるキー（重複・入れ子を含む）の (開始位置, キー, 値) のリスト"""
+        found = []
+        node = 0
+        for end, char in enumerate(text, start=1):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            found.extend((end - len(key), key, self._values[key]) for key in self._output[node])
+        return found
+
+
+class MountainResolver:
+    """
+    山名（原文）から山グループを解決する
+
+    山グループ名と別名を正規化したキーで保持し、
+    1. 正規化後の完全一致
+    2. 部分一致（例:「大岳山（鋸尾根）」）。他の一致に含まれるキーは除き、
+       複数の山グループに一致する場合（例:「大岳山・鋸山」）は山域が同じものを優先し、それでも絞れなければ解決しない
+    の順に照合する。1回の同期実行（またはバックフィル）ごとに load() で1回だけDBから読み込む
+    """
+
+    def __init__(self, keys: dict[str, MountainKey]):
+        self.keys = keys
+        self._automaton = AhoCorasick({k: v for k, v in keys.items() if len(k) >= MIN_KEY_LENGTH})
+
+    @classmethod
+    def load(cls) -> "MountainResolver":
+        """山グループ・別名をDBから読み込む（クエリ2回）"""
+        keys: dict[str, MountainKey] = {}
+        for group_id, name, area in MountainGroup.objects.values_list("id", "name", "area"):
+            keys[tokenizer.normalize_text(name)] = MountainKey(group_id, area)
+        for group_id, alias_name, area in MountainAlias.objects.values_list(
+            "mountain_group_id", "alias_name", "mountain_group__area"
+        ):
+            # 山グループ名と別名が正規化後に衝突した場合は山グループ名を優先
+            keys.setdefault(tokenizer.normalize_text(alias_name), MountainKey(group_id, area))
+        logger.debug(f"山グループ照合キーを読み込み: {len(keys)}件")
+        return cls(keys)
+
+    def resolve(self, mountain_name: str, area: str = "") -> int | None:
+        """
+        山名から山グループIDを返す（解決できなければNone）
+
+        Args:
+            mountain_name: 山名（原文または正規化済み）
+            area: レコードの山域（部分一致が複数の山グループにまたがる場合の優先に使用）
+        """
+        normalized = tokenizer.normalize_text(mountain_name)
+        if not normalized:
+            return None
+
+        if normalized in self.keys:
+            return self.keys[normalized].group_id
+
+        matches = self._automaton.find_all(normalized)
+        if not matches:
+            return None
+
+        # 他の一致の範囲に含まれる短いキー（例:「御岳山」中の「岳山」）を除く
+        spans = [(start, start + len(key)) for start, key, _ in matches]
+        candidates = {
+            value
+            for (start, end), (_, _, value) in zip(spans, matches)
+            if not any(s <= start and end <= e and (s, e) != (start, end) for s, e in spans)
+        }
+        if len({value.group_id for value in candidates}) > 1:
+            candidates = {value for value in candidates if value.area == area}
+        group_ids = {value.group_id for value in candidates}
+        return group_ids.pop() if len(group_ids) == 1 else None
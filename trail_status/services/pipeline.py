@@ -1,9 +1,12 @@
 import asyncio
 import logging
-from typing import Callable
+import time
+from typing import AsyncIterator, Callable
 
 import httpx
-from .fetcher import DataFetcher
+
+from .deadline import Deadline, DeadlineExceeded
+from .fetcher import DataFetcher, combine_content_hashes, join_page_texts
 from .llm_client import ConversationalAi, LlmConfig
 from .llm_stats import LlmStats
 from .types import ConditionSchemaAiList, ResultSingle, SourceSchemaSingle
@@ -15,53 +18,126 @@ UpdatedDataList = list[tuple[SourceSchemaSingle, ResultSingle | BaseException]]
 
 
 class AiPipeline:
-    """登山道状況のスクレイピング・AI出力パイプライン（純粋async処理）"""
+    """登山道状況のスクレイピング・AI出力パイプライン（純粋async処理）
+
+    - 情報源は優先度（SourceSchemaSingle.priority）の高い順にスクレイピング・LLMの待ち行列へ入る
+    - time_budget（秒）を超えた後は新たな処理を開始せず、残りの情報源は次回実行へ持ち越す
+    - deadline（秒）/ source_timeout（秒）を超えた処理は取り消し、同じく次回実行へ持ち越す
+    """
+
+    # 同時実行数の上限（待ち行列は優先度順に処理される）
+    FETCH_CONCURRENCY = 8
+    LLM_CONCURRENCY = 4
 
     def __init__(self, source_data_list: list[SourceSchemaSingle], client_factory: ClientFactory, **kwargs):
-        self.source_data_list = source_data_list
+        # 優先度の高い順に並べ替え（同点は元の順序を維持）
+        self.source_data_list = sorted(source_data_list, key=lambda s: s.priority, reverse=True)
         self.ai_model = kwargs.get("ai_model")
         self.new_hash_mode = kwargs.get("new_hash_mode")
+        self.time_budget: float | None = kwargs.get("time_budget")
+        self.deadline_seconds: float | None = kwargs.get("deadline")
+        self.source_timeout: float | None = kwargs.get("source_timeout")
+        self.deadline = Deadline.after(self.deadline_seconds)
         self.client_factory = client_factory
+        self._started_at = time.monotonic()
+        self._fetch_semaphore = asyncio.Semaphore(self.FETCH_CONCURRENCY)
+        self._llm_semaphore = asyncio.Semaphore(self.LLM_CONCURRENCY)
 
     async def __call__(self) -> UpdatedDataList:
         return await self.run()
 
     async def run(self) -> UpdatedDataList:
         """ソースデータリストを並行処理（Django ORM一切なし）"""
+        results = [item async for item in self.iter_results()]
+
+        # 完了順から優先度順（入力順）に並べ直す
+        order = {id(source_data): i for i, source_data in enumerate(self.source_data_list)}
+        results.sort(key=lambda item: order[id(item[0])])
+        return results
+
+    async def iter_results(self) -> AsyncIterator[tuple[SourceSchemaSingle, ResultSingle | BaseException]]:
+        """
+        ソースデータリストを並行処理し、完了した情報源から順に結果を返す
+
+        呼び出し側は残りの情報源のスクレイピング・LLM解析と並行してDB保存などを行える
+        """
         logger.info(
             f"パイプライン処理開始 - 対象: {len(self.source_data_list)}件, モデル: {self.ai_model or 'デフォルト'}"
         )
 
-        async with httpx.AsyncClient() as client:
-            tasks = []
-            for source_data in self.source_data_list:
-                # コア処理
-                task = self.process_single_source_data(client, source_data)
-                tasks.append(task)
-
-            results: list[ResultSingle | BaseException] = await asyncio.gather(*tasks, return_exceptions=True)
+        self._started_at = time.monotonic()
+        self.deadline = Deadline.after(self.deadline_seconds)
 
-        logger.info(f"パイプライン処理完了 - 処理件数: {len(results)}")
-        return list(zip(self.source_data_list, results))
+        async with httpx.AsyncClient() as client:
+            tasks = {
+                asyncio.create_task(self.process_single_source_data(client, source_data)): source_data
+                for source_data in self.source_data_list
+            }
+            pending = set(tasks)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        result: ResultSingle | BaseException = task.exception() or task.result()
+                        yield tasks[task], result
+            finally:
+                # 呼び出し側が途中で中断した場合は残りの処理を取り消す
+                for task in pending:
+                    task.cancel()
+
+        logger.info(f"パイプライン処理完了 - 処理件数: {len(tasks)}")
 
     # コア処理
     async def process_single_source_data(
         self, client: httpx.AsyncClient, source_data: SourceSchemaSingle
     ) -> ResultSingle:
-        """単一ソースデータの処理パイプライン（純粋async）"""
-        logger.debug(f"処理開始: {source_data.name} (ID: {source_data.id})")
+        """単一ソースデータの処理パイプライン（純粋async）
+
+        実行全体・情報源ごとの期限を超えた場合は処理を取り消し、持ち越しとして返却する
+        """
+        logger.debug(f"処理開始: {source_data.name} (ID: {source_data.id}, 優先度: {source_data.priority:.2f})")
 
         try:
-            fetcher = DataFetcher(source_data.url1)
+            async with asyncio.timeout(self.deadline.remaining()):
+                return await self._process_single_source_data(client, source_data)
+        except (TimeoutError, DeadlineExceeded):
+            return self._deferred_result(source_data, "実行期限超過のため次回に持ち越し")
 
-            # 1. 生HTMLのスクレイピング: HTMLボディを格納
-            scraped_html = await fetcher.fetch_html(client)
-            if not scraped_html.strip():
+    async def _process_single_source_data(
+        self, client: httpx.AsyncClient, source_data: SourceSchemaSingle
+    ) -> ResultSingle:
+        try:
+            fetchers = [DataFetcher(url) for url in source_data.urls]
+
+            # 1. 生HTMLのスクレイピング: 情報源の全URLを共有クライアントで並行取得
+            async with self._fetch_semaphore:
+                if self.budget_exhausted:
+                    return self._deferred_result(source_data, "時間予算超過のため次回に持ち越し")
+                # 情報源ごとの期限はスクレイピング・AI解析それぞれの開始時点から計測（待ち行列の待ち時間は含めない）
+                fetch_deadline = self.deadline.earliest(self.source_timeout)
+                async with asyncio.timeout(fetch_deadline.remaining()):
+                    results = await asyncio.gather(
+                        *(fetcher.fetch_html(client, deadline=fetch_deadline) for fetcher in fetchers),
+                        return_exceptions=True,
+                    )
+            # url1の取得失敗は情報源の失敗、url2以降は取得できたページのみで続行
+            if isinstance(results[0], BaseException):
+                raise results[0]
+            scraped = []
+            for fetcher, result in zip(fetchers, results):
+                if isinstance(result, BaseException):
+                    logger.warning(f"取得失敗のためスキップ: {source_data.name} - {fetcher.url} ({result!r})")
+                else:
+                    scraped.append((fetcher, result))
+
+            scraped_length = sum(len(html) for _, html in scraped)
+            if not any(html.strip() for _, html in scraped):
                 logger.warning(f"スクレイピング結果が空: {source_data.name}")
                 return ResultSingle(success=False, message="スクレイピング結果が空でした")
 
-            # 2. ハッシュベース変更検知
-            content_changed, new_hash = fetcher.has_content_changed(scraped_html, source_data.content_hash)
+            # 2. ハッシュベース変更検知（取得できた全ページをまとめて1つのハッシュ値に）
+            new_hash = combine_content_hashes([fetcher.calculate_content_hash(html) for fetcher, html in scraped])
+            content_changed, new_hash = DataFetcher.compare_hash(new_hash, source_data.content_hash)
 
             if not content_changed:
                 if self.new_hash_mode:
@@ -72,19 +148,26 @@ class AiPipeline:
                         success=True,
                         content_changed=False,
                         new_hash=new_hash,
-                        scraped_length=len(scraped_html),
+                        scraped_length=scraped_length,
                         message=f"コンテンツ変更なし（ソースID: {source_data.id}）- LLM処理をスキップ",
                     )
 
-            # 3. trafilaturaでテキスト抽出
-            parsed_text = fetcher.fetch_parsed_text(scraped_html)
-            if not parsed_text.strip():
+            # 3. trafilaturaでテキスト抽出（複数ページは区切り付きで連結し、LLMへは1回で渡す）
+            pages = [(fetcher.url, fetcher.fetch_parsed_text(html)) for fetcher, html in scraped]
+            pages = [(url, text) for url, text in pages if text.strip()]
+            if not pages:
                 logger.warning(f"テキスト抽出結果が空: {source_data.name}")
                 return ResultSingle(success=False, message="テキスト抽出結果が空でした")
+            parsed_text = join_page_texts(pages)
 
             # 4. AI解析（コンテンツ変更時 or new_hash_mode=Trueのみ）
-            logger.info(f"AI解析開始: {source_data.name} - モデル: {self.ai_model or 'デフォルト'}")
-            config, ai_result, stats = await self._analyze_with_ai(source_data, parsed_text)
+            async with self._llm_semaphore:
+                if self.budget_exhausted:
+                    return self._deferred_result(source_data, "時間予算超過のため次回に持ち越し")
+                logger.info(f"AI解析開始: {source_data.name} - モデル: {self.ai_model or 'デフォルト'}")
+                llm_deadline = self.deadline.earliest(self.source_timeout)
+                async with asyncio.timeout(llm_deadline.remaining()):
+                    config, ai_result, stats = await self._analyze_with_ai(source_data, parsed_text, llm_deadline)
             logger.info(
                 f"AI解析完了: {source_data.name} - コスト: ${stats.total_fee:.4f}, 実行時間: {stats.execution_time:.2f}秒"
             )
@@ -93,23 +176,36 @@ class AiPipeline:
                 success=True,
                 content_changed=True,
                 new_hash=new_hash,
-                scraped_length=len(scraped_html),
+                scraped_length=scraped_length,
                 extracted_trail_conditions=ai_result,  # TrailConditionSchemaListのまま
                 stats=stats,  # LlmStatsオブジェクト
                 config=config,  # LlmConfigオブジェクト
                 message="AIでの解析に成功",
             )
 
+        except (TimeoutError, DeadlineExceeded):
+            raise
         except Exception as e:
             logger.error(f"処理エラー: {source_data.name} - {str(e)}")
             return ResultSingle(success=False, message=f"処理エラー：{str(e)}")
 
+    @property
+    def budget_exhausted(self) -> bool:
+        """時間予算を使い切ったか（予算未設定なら常にFalse）"""
+        if self.time_budget is None:
+            return False
+        return time.monotonic() - self._started_at >= self.time_budget
+
+    @staticmethod
+    def _deferred_result(source_data: SourceSchemaSingle, message: str) -> ResultSingle:
+        """時間予算・期限超過で未処理の情報源（ハッシュは更新せず次回実行で再処理）"""
+        logger.warning(f"{message}: {source_data.name} (ID: {source_data.id})")
+        return ResultSingle(success=False, deferred=True, message=message)
+
     async def _analyze_with_ai(
-        self, source_data: SourceSchemaSingle, scraped_text: str
+        self, source_data: SourceSchemaSingle, scraped_text: str, deadline: Deadline | None = None
     ) -> tuple[LlmConfig, ConditionSchemaAiList, LlmStats]:
         """AI解析処理"""
-        import time
-
         prompt_file = source_data.prompt_file
         try:
             config = LlmConfig.from_file(prompt_file, data=scraped_text, model=self.ai_model)
@@ -119,6 +215,8 @@ class AiPipeline:
 
         # AIクライアントの注入
         ai_client = self.client_factory(config)
+        if deadline is not None:
+            ai_client.deadline = deadline
 
         # 実行時間測定
         try:
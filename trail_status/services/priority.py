@@ -0,0 +1,92 @@
+import logging
+import math
+from datetime import timedelta
+from typing import Iterable
+
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from ..models import DataSource, LlmUsage, StatusType, TrailCondition
+
+logger = logging.getLogger(__name__)
+
+# === 優先度スコアの設定 ===
+
+# 有効な通行止め1件あたりの加点
+WEIGHT_ACTIVE_CLOSURE = 3.0
+
+# 直近の内容変更（= LLM呼び出し）1回あたりの加点
+WEIGHT_RECENT_CHANGE = 1.0
+
+# 最終巡回からの経過日数1日あたりの加点（持ち越された情報源が後回しにされ続けないように）
+WEIGHT_STALENESS_PER_DAY = 1.0
+
+# 変更頻度を数える期間（日数）
+RECENT_CHANGE_DAYS = 30
+
+# ページサイズの基準（入力トークン数）。この倍数だけスコアを割り引く
+PAGE_SIZE_UNIT_TOKENS = 20000
+
+# ========================================
+
+
+def compute_source_priorities(sources: Iterable[DataSource]) -> dict[int, float]:
+    """
+    情報源ごとの処理優先度を計算する（大きいほど先に処理）
+
+    score = (有効な通行止め件数 * WEIGHT_ACTIVE_CLOSURE
+             + 直近の変更回数 * WEIGHT_RECENT_CHANGE
+             + 最終巡回からの経過日数 * WEIGHT_STALENESS_PER_DAY)
+            / (1 + 直近の平均入力トークン数 / PAGE_SIZE_UNIT_TOKENS)
+
+    一度も巡回していない情報源（新規・持ち越され続けた情報源）は最も古いものとして最優先（math.inf）
+
+    Args:
+        sources: 対象の情報源
+
+    Returns:
+        {情報源ID: 優先度スコア}
+    """
+    sources = list(sources)
+    source_ids = [s.id for s in sources]
+    now = timezone.now()
+
+    # 有効な通行止め件数（未解消 or 解消予定日が未来）
+    closure_counts = dict(
+        TrailCondition.objects.filter(source_id__in=source_ids, disabled=False, status=StatusType.CLOSURE)
+        .filter(Q(resolved_at__isnull=True) | Q(resolved_at__gte=timezone.localdate()))
+        .values("source_id")
+        .annotate(count=Count("id"))
+        .values_list("source_id", "count")
+    )
+
+    # 直近の変更回数とページサイズ（LlmUsageはコンテンツ変更時のみ記録される）
+    usage_stats = {
+        row["source_id"]: row
+        for row in LlmUsage.objects.filter(
+            source_id__in=source_ids, success=True, executed_at__gte=now - timedelta(days=RECENT_CHANGE_DAYS)
+        )
+        .values("source_id")
+        .annotate(changes=Count("id"), avg_tokens=Avg("prompt_tokens"))
+    }
+
+    priorities = {}
+    for source in sources:
+        if source.last_checked_at is None:
+            priorities[source.id] = math.inf
+            logger.debug(f"優先度: {source.name} - 未巡回のため最優先")
+            continue
+
+        stats = usage_stats.get(source.id, {})
+        stale_days = (now - source.last_checked_at).total_seconds() / 86400
+
+        score = (
+            closure_counts.get(source.id, 0) * WEIGHT_ACTIVE_CLOSURE
+            + stats.get("changes", 0) * WEIGHT_RECENT_CHANGE
+            + stale_days * WEIGHT_STALENESS_PER_DAY
+        )
+        size_factor = 1 + (stats.get("avg_tokens") or 0) / PAGE_SIZE_UNIT_TOKENS
+        priorities[source.id] = score / size_factor
+        logger.debug(f"優先度: {source.name} - {priorities[source.id]:.2f}")
+
+    return priorities
@@ -0,0 +1,300 @@
+"""
+レコード照合の評価用データセット（正解ラベル付きの既存レコード・AI出力の組）
+
+サンプルJSON（trail_status/services/sample/*）の連続する出力の組、またはDB・フィクスチャの既存レコードと
+情報源の最新のサンプル出力の組から自動で作るほか、JSONファイルに書き出して手作業でラベルを修正・追加したものを読み込める
+"""
+
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import TrailCondition
+from . import tokenizer
+from .db_writer import DbWriter
+from .prompt_utils import PromptFile
+from .types import ConditionSchemaAi, ConditionSchemaAiInternal, ResultSingle, SourceSchemaSingle
+
+SAMPLE_BASE_DIR: Path = settings.BASE_DIR / "trail_status/services/sample"
+
+# 既存レコード（DB・フィクスチャ）からAI出力と同じ形式のレコードを作る際のフィールド
+RECORD_FIELDS = tuple(ConditionSchemaAi.model_fields)
+
+FIXTURE_MODEL = "trail_status.trailcondition"
+
+
+@dataclass
+class GoldenCase:
+    """
+    評価用の1ケース（1情報源の前回出力と今回出力の組）
+
+    labels: {AI出力の添字: 対応する既存レコードの添字}。値がNoneなら新規レコードが正解。
+    ラベルのないAI出力は評価対象外
+    source_id: 情報源ID（情報源ごとの照合パラメータの調整に使用。不明ならNone）
+    """
+
+    name: str
+    previous: list[dict]
+    latest: list[dict]
+    labels: dict[int, int | None] = field(default_factory=dict)
+    source_id: int | None = None
+
+
+@dataclass
+class Accuracy:
+    """ラベル付きAI出力に対する対応付けの正誤"""
+
+    tp: int = 0  # 正しい既存レコードに対応付け
+    fp: int = 0  # 誤った既存レコードに対応付け、または新規が正解なのに対応付け
+    fn: int = 0  # 正解の既存レコードに対応付けられなかった
+
+    def add(self, other: "Accuracy") -> None:
+        self.tp += other.tp
+        self.fp += other.fp
+        self.fn += other.fn
+
+    @property
+    def precision(self) -> float:
+        return self.tp / (self.tp + self.fp) if self.tp + self.fp else 0.0
+
+    @property
+    def recall(self) -> float:
+        return self.tp / (self.tp + self.fn) if self.tp + self.fn else 0.0
+
+    @property
+    def f1(self) -> float:
+        total = self.precision + self.recall
+        return 2 * self.precision * self.recall / total if total else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "tp": self.tp,
+            "fp": self.fp,
+            "fn": self.fn,
+            "precision": round(self.precision, 4),
+            "recall": round(self.recall, 4),
+            "f1": round(self.f1, 4),
+        }
+
+
+def _sorted_outputs(sample_dir: Path) -> list[Path]:
+    """サンプルディレクトリのJSONを出力日時順に並べる（ファイル名: <モデル名>_<日付>_<時刻>.json）"""
+    return sorted(sample_dir.glob("*.json"), key=lambda p: p.name.rsplit("_", 2)[-2:])
+
+
+def _load_records(path: Path) -> list[dict]:
+    return json.loads(path.read_text(encoding="utf-8"))["trail_condition_records"]
+
+
+def load_sample_pairs(sample_base_dir: Path = SAMPLE_BASE_DIR) -> list[tuple[str, list[dict], list[dict]]]:
+    """
+    サンプルJSONから (情報源ディレクトリ名, 既存レコード, AI出力) の組を作る
+
+    情報源ごとに2番目に新しい出力を既存レコード、最新の出力をAI出力とみなす（DBアクセスなし）
+    """
+    pairs = []
+    for sample_dir in sorted(d for d in sample_base_dir.iterdir() if d.is_dir()):
+        json_files = _sorted_outputs(sample_dir)
+        if len(json_files) < 2:
+            continue
+        previous, latest = (_load_records(f) for f in json_files[-2:])
+        pairs.append((sample_dir.name, previous, latest))
+    return pairs
+
+
+def build_reconcile_inputs(
+    source_id: int, previous: list[dict], latest: list[dict]
+) -> tuple[DbWriter, list[TrailCondition], list[ConditionSchemaAiInternal]]:
+    """サンプルレコードから照合処理の入力を作る（TrailConditionは未保存のインスタンス）"""
+    created_at = timezone.now() - timedelta(days=7)
+    existing_records = [
+        TrailCondition(id=source_id * 10000 + i, source_id=source_id, created_at=created_at, url1="", **record)
+        for i, record in enumerate(previous, start=1)
+    ]
+    ai_records = [ConditionSchemaAiInternal(**record, url1="", ai_config={}) for record in latest]
+    source = SourceSchemaSingle(id=source_id, name=f"bench-{source_id}", url1="", prompt_file=PromptFile())
+    writer = DbWriter(source, ResultSingle(success=True, message="bench"))
+    return writer, existing_records, ai_records
+
+
+def _name_keys(records) -> dict[tuple[str, str], list[int]]:
+    """正規化した (山名, 登山道名) ごとのレコードの添字"""
+    index: dict[tuple[str, str], list[int]] = {}
+    for i, r in enumerate(records):
+        key = (tokenizer.normalize_text(r.mountain_name_raw), tokenizer.normalize_text(r.trail_name))
+        index.setdefault(key, []).append(i)
+    return index
+
+
+def exact_key_labels(
+    existing_records: list[TrailCondition], ai_records: list[ConditionSchemaAiInternal]
+) -> dict[int, int]:
+    """正規化した (山名, 登山道名) が両側で一意に一致する組を正解ラベルとする {AI出力の添字: 既存レコードの添字}"""
+    existing_keys, ai_keys = _name_keys(existing_records), _name_keys(ai_records)
+    return {
+        ai_idx[0]: existing_keys[key][0]
+        for key, ai_idx in ai_keys.items()
+        if len(ai_idx) == 1 and len(existing_keys.get(key, [])) == 1
+    }
+
+
+def auto_labels(
+    existing_records: list[TrailCondition], ai_records: list[ConditionSchemaAiInternal]
+) -> dict[int, int | None]:
+    """
+    自動ラベル（手作業の確認前の仮ラベル）
+
+    - (山名, 登山道名) が両側で一意に一致: その既存レコード
+    - 山名・登山道名のどちらも他方を含む既存レコードが1件もない: 新規
+      （情報源ごとに山名の粒度が「雲取山」「酉谷山／雲取山」のように揺れるため部分一致で判定）
+    - それ以外（名称の表記揺れ・重複）: ラベルなし
+    """
+    labels: dict[int, int | None] = dict(exact_key_labels(existing_records, ai_records))
+    existing_keys = list(_name_keys(existing_records))
+
+    def overlaps(a: str, b: str) -> bool:
+        return bool(a and b) and (a in b or b in a)
+
+    for (mountain, trail), ai_idx in _name_keys(ai_records).items():
+        if not any(overlaps(mountain, m) or overlaps(trail, t) for m, t in existing_keys):
+            labels.update(dict.fromkeys(ai_idx))
+    return labels
+
+
+def _sample_source_id(sample_dir: Path) -> int | None:
+    """サンプルディレクトリ名の先頭の番号（例: 001_okutama_vc → 1）を情報源IDとする"""
+    prefix = sample_dir.name.split("_")[0]
+    return int(prefix) if prefix.isdigit() else None
+
+
+def _labelled_case(name: str, previous: list[dict], latest: list[dict], source_id: int | None) -> GoldenCase:
+    _, existing_records, ai_records = build_reconcile_inputs(1, previous, latest)
+    return GoldenCase(
+        name=name,
+        previous=previous,
+        latest=latest,
+        labels=auto_labels(existing_records, ai_records),
+        source_id=source_id,
+    )
+
+
+def build_sample_dataset(sample_base_dir: Path = SAMPLE_BASE_DIR) -> list[GoldenCase]:
+    """サンプルJSONの出力日時が連続する全ての組から自動ラベル付きのケースを作る"""
+    cases = []
+    for sample_dir in sorted(d for d in sample_base_dir.iterdir() if d.is_dir()):
+        json_files = _sorted_outputs(sample_dir)
+        for previous_file, latest_file in zip(json_files, json_files[1:]):
+            cases.append(
+                _labelled_case(
+                    f"{sample_dir.name}/{latest_file.stem}",
+                    _load_records(previous_file),
+                    _load_records(latest_file),
+                    _sample_source_id(sample_dir),
+                )
+            )
+    return cases
+
+
+def _to_record(values: dict) -> dict:
+    """既存レコードの値をAI出力と同じ形式（JSONに書き出せる値）にする"""
+    return {
+        name: value.isoformat() if isinstance(value, date) else value
+        for name, value in values.items()
+        if name in RECORD_FIELDS
+    }
+
+
+def load_db_records(source_ids: list[int] | None = None) -> dict[int, list[dict]]:
+    """DBの有効な登山道状況を情報源ごとのレコードにする {情報源ID: レコード}"""
+    queryset = TrailCondition.objects.filter(disabled=False).order_by("source_id", "id")
+    if source_ids:
+        queryset = queryset.filter(source_id__in=source_ids)
+
+    records: dict[int, list[dict]] = {}
+    for values in queryset.values("source_id", *RECORD_FIELDS):
+        records.setdefault(values["source_id"], []).append(_to_record(values))
+    return records
+
+
+def load_fixture_records(path: Path) -> dict[int, list[dict]]:
+    """Djangoのフィクスチャ（dumpdata のJSON）の有効な登山道状況を情報源ごとのレコードにする（DBアクセスなし）"""
+    records: dict[int, list[dict]] = {}
+    for item in json.loads(path.read_text(encoding="utf-8")):
+        fields = item.get("fields", {})
+        if item.get("model") != FIXTURE_MODEL or fields.get("disabled"):
+            continue
+        records.setdefault(fields["source"], []).append(_to_record(fields))
+    return records
+
+
+def build_existing_dataset(
+    records_by_source: dict[int, list[dict]], name: str, sample_base_dir: Path = SAMPLE_BASE_DIR
+) -> list[GoldenCase]:
+    """
+    既存レコード（DB・フィクスチャ）と情報源の最新のサンプル出力の組から自動ラベル付きのケースを作る
+
+    同期時と同じく、保存済みのレコードを既存レコード、最新の出力をAI出力とする。
+    サンプル出力のない情報源は対象外
+
+    Args:
+        records_by_source: {情報源ID: 既存レコード}（load_db_records / load_fixture_records）
+        name: ケース名の接頭辞（例: "db"）
+    """
+    latest_outputs = {}
+    for sample_dir in sorted(d for d in sample_base_dir.iterdir() if d.is_dir()):
+        json_files = _sorted_outputs(sample_dir)
+        source_id = _sample_source_id(sample_dir)
+        if json_files and source_id is not None:
+            latest_outputs[source_id] = (sample_dir, json_files[-1])
+
+    cases = []
+    for source_id, previous in sorted(records_by_source.items()):
+        if not previous or source_id not in latest_outputs:
+            continue
+        sample_dir, latest_file = latest_outputs[source_id]
+        cases.append(
+            _labelled_case(
+                f"{name}/{sample_dir.name}/{latest_file.stem}", previous, _load_records(latest_file), source_id
+            )
+        )
+    return cases
+
+
+def save_dataset(cases: list[GoldenCase], path: Path) -> None:
+    """データセットをJSONに書き出す（手作業でラベルを修正するため）"""
+    path.write_text(json.dumps([asdict(case) for case in cases], ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def load_dataset(path: Path) -> list[GoldenCase]:
+    """JSONのデータセットを読み込む（JSONのキーは文字列のため添字を整数に戻す）"""
+    cases = []
+    for item in json.loads(path.read_text(encoding="utf-8")):
+        labels = {int(ai_idx): label for ai_idx, label in item.pop("labels", {}).items()}
+        cases.append(GoldenCase(**item, labels=labels))
+    return cases
+
+
+def evaluate(matches: list[tuple[int, int, float, str]], labels: dict[int, int | None]) -> Accuracy:
+    """
+    対応付けの結果をラベルと比較
+
+    Args:
+        matches: (AI出力の添字, 既存レコードの添字, スコア, 同定方法) のリスト（MatchResult.matches）
+        labels: GoldenCase.labels
+    """
+    predicted = {ai_idx: candidate_idx for ai_idx, candidate_idx, _, _ in matches}
+    accuracy = Accuracy()
+    for ai_idx, expected in labels.items():
+        actual = predicted.get(ai_idx)
+        if actual is not None and actual == expected:
+            accuracy.tp += 1
+            continue
+        if actual is not None:
+            accuracy.fp += 1
+        if expected is not None:
+            accuracy.fn += 1
+    return accuracy
@@ -0,0 +1,48 @@
+"""
+レコード照合のプロセスプール用ワーカー関数
+
+spawnで起動したワーカーはDjango未初期化のため、このモジュールはトップレベルでモデルをimportしない
+（initializerの読み込み時にモデルを参照するとAppRegistryNotReadyになる）
+"""
+
+from __future__ import annotations
+
+import typing
+from typing import Any
+
+if typing.TYPE_CHECKING:
+    from .types import ConditionSchemaAiInternal, ReconcilePlan, SourceSchemaSingle
+
+
+def init_reconcile_worker() -> None:
+    """ワーカーの初期化（Django設定の読み込みと形態素解析器の事前ロード）"""
+    import django
+
+    django.setup()
+
+    from . import tokenizer
+
+    tokenizer.get_analyzer()
+
+
+def plan_reconcile(
+    source_schema_single: SourceSchemaSingle,
+    internal_data_list: list[ConditionSchemaAiInternal],
+    existing_rows: list[dict[str, Any]],
+) -> ReconcilePlan:
+    """
+    ワーカーで照合を実行する（DBアクセスなし）
+
+    既存レコードはプレーンな辞書で受け取り、未保存のTrailConditionに戻して照合する
+
+    Returns:
+        更新・新規作成の内容（プレーンなデータ）
+    """
+    from ..models import TrailCondition
+    from .db_writer import DbWriter
+    from .types import ResultSingle
+
+    writer = DbWriter(source_schema_single, ResultSingle(success=True, message="照合のみ"))
+    existing_records = [TrailCondition(**row) for row in existing_rows]
+    to_update, to_create = writer._reconcile_records(existing_records, internal_data_list)
+    return writer.build_plan(to_update, to_create)
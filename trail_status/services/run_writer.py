@@ -0,0 +1,123 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, transaction
+
+from ..models import DataSource, LlmUsage, TrailCondition
+from .db_writer import DbWriter
+from .mountain_resolver import MountainResolver
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingSource:
+    """実行単位の保存を待つ情報源ごとの内容"""
+
+    writer: DbWriter
+    to_update: list[TrailCondition] = field(default_factory=list)
+    to_create: list[TrailCondition] = field(default_factory=list)
+    extracted_record_count: int | None = None  # Noneは照合なし（コンテンツ変更なし）で巡回記録のみ
+
+    @property
+    def has_conditions(self) -> bool:
+        return self.extracted_record_count is not None
+
+
+class RunWriter:
+    """
+    1回の同期実行の保存内容をまとめて1トランザクションでDBに保存するクラス
+
+    情報源ごとの保存（DataSourceの取得・保存、TrailConditionの一括更新・作成、LlmUsageの作成）を
+    実行の最後にまとめ、DBとの往復回数を減らす:
+    - 登山道状況: 情報源ごとのセーブポイント内で bulk_update / bulk_create（失敗はその情報源のみ取り消し）。
+      山グループの紐付けに使う山名・別名は実行ごとに1回だけ読み込む
+    - 情報源の巡回記録: DataSource を1回で取得し bulk_update
+    - LLM使用履歴: bulk_create 1回
+
+    登山道状況の保存に失敗した情報源は巡回記録（ハッシュ）も更新せず、次回実行で再処理する
+    """
+
+    def __init__(self):
+        self.pending: list[PendingSource] = []
+
+    def add(
+        self,
+        writer: DbWriter,
+        to_update: list[TrailCondition] | None = None,
+        to_create: list[TrailCondition] | None = None,
+        extracted_record_count: int | None = None,
+    ) -> None:
+        """
+        保存内容を追加（未保存）
+
+        Args:
+            writer: 情報源のDbWriter（巡回結果とLLM使用量を持つ）
+            to_update, to_create: 照合結果（DbWriter.areconcile の戻り値）
+            extracted_record_count: AI出力の件数（Noneなら巡回記録のみ保存）
+        """
+        self.pending.append(PendingSource(writer, to_update or [], to_create or [], extracted_record_count))
+
+    def commit(self) -> list[dict[str, Any]]:
+        """
+        保存内容を1トランザクションでDBに保存
+
+        Returns:
+            登山道状況を保存した情報源ごとの結果（DbWriter._build_persist_result）。
+            保存に失敗した情報源は "error" にメッセージを持つ
+        """
+        if not self.pending:
+            return []
+
+        results = []
+        with transaction.atomic():
+            sources = DataSource.objects.in_bulk([p.writer.source_schema_single.id for p in self.pending])
+            sources_to_update: list[DataSource] = []
+            usages: list[LlmUsage] = []
+            resolver = MountainResolver.load() if any(p.has_conditions for p in self.pending) else None
+
+            for pending in self.pending:
+                writer = pending.writer
+                if pending.has_conditions:
+                    try:
+                        # 情報源ごとのセーブポイント
+                        with transaction.atomic():
+                            updated_count, created_count = writer._commit_trail_condition(
+                                pending.to_update, pending.to_create, resolver
+                            )
+                    except DatabaseError as e:
+                        logger.exception(f"DB保存失敗: {writer.source_schema_single.name}")
+                        results.append({"name": writer.source_schema_single.name, "error": str(e)})
+                        continue
+
+                    usages.append(writer.build_llm_usage(writer.result.stats, pending.extracted_record_count))
+                    results.append(
+                        writer._build_persist_result(pending.extracted_record_count, updated_count, created_count)
+                    )
+
+                source = sources.get(writer.source_schema_single.id)
+                if source is None:
+                    logger.warning(f"情報源が削除されています: {writer.source_schema_single.name}")
+                    continue
+                writer._apply_source_status(source)
+                sources_to_update.append(source)
+
+            DataSource.objects.bulk_update(sources_to_update, DbWriter.SOURCE_FIELDS_TO_UPDATE)
+            LlmUsage.objects.bulk_create(usages)
+
+        logger.info(
+            f"実行単位のDB保存完了: 情報源 {len(sources_to_update)}件 / 登山道状況 {len(results)}件 / "
+            f"LLM使用履歴 {len(usages)}件"
+        )
+        self.pending.clear()
+        return results
+
+    async def acommit(self) -> list[dict[str, Any]]:
+        """
+        保存内容を1トランザクションでDBに保存（async版）
+
+        transaction.atomicはasync ORMと併用できないため、同一スレッド・同一接続で実行
+        """
+        return await sync_to_async(self.commit, thread_sensitive=True)()
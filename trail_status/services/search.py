@@ -0,0 +1,76 @@
+"""
+登山道状況のキーワード検索（一覧の q パラメータ）
+
+検索語（空白区切り）ごとに、次のいずれかに一致する行に絞り込む（全ての語に一致する行を返す）
+- 山名・登山道名・タイトル・詳細説明の部分一致（icontains）
+- 照合キーの分かち書き（DbWriterが保存時に Sudachi で生成）の全文検索（PostgreSQLのみ）。
+  全角半角・空白の表記揺れを正規化した語で一致する
+
+PostgreSQL は 0014 のマイグレーションで作成する GIN インデックスを使う
+- 部分一致: UPPER(列) の pg_trgm インデックス（管理画面の search_fields の icontains も同じインデックスを使う）
+- 全文検索: to_tsvector('simple', 分かち書きの列) のインデックス
+それ以外（開発用のSQLite等）と Sudachi のない環境（batch を含まないサーバー用の依存関係）は部分一致のみ
+
+LC_CTYPE が C のデータベースでは pg_trgm・全文検索とも日本語を語として扱えない（部分一致のみで検索される）。
+pg_trgm がない環境では逐次走査になり、全文検索の式を行ごとに計算するため遅くなる（bench_search コマンドで計測）
+"""
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connections
+from django.db.models import Q, QuerySet
+
+from ..models import TrailCondition
+
+try:
+    from .tokenizer import decompose_text
+except ImportError:  # sudachipy未導入の環境では全文検索を使わない
+    decompose_text = None
+
+# 部分一致の対象（照合キーの生成元と同じ）
+SEARCH_FIELDS = TrailCondition.MATCH_KEY_SOURCE_FIELDS
+
+# 全文検索の対象（分かち書きの照合キー）
+TOKEN_FIELDS = ("mountain_name_tokens", "trail_name_tokens", "title_tokens", "description_tokens")
+
+# 全文検索の設定（分かち書き済みのため語の分割・語幹処理をしない）
+SEARCH_CONFIG = "simple"
+
+# 検索語の上限（長い入力によるクエリの肥大化を防ぐ）
+MAX_QUERY_LENGTH = 100
+MAX_TERMS = 5
+
+
+def search_terms(query: str | None) -> list[str]:
+    """入力を検索語に分割（全角空白も区切り）"""
+    if not query:
+        return []
+    return query[:MAX_QUERY_LENGTH].split()[:MAX_TERMS]
+
+
+def token_vector() -> SearchVector:
+    """分かち書きの列の tsvector（インデックスの式と同じ）"""
+    return SearchVector(*TOKEN_FIELDS, config=SEARCH_CONFIG)
+
+
+def search_conditions(queryset: QuerySet, query: str | None) -> QuerySet:
+    """
+    キーワードで登山道状況を絞り込む
+
+    Args:
+        queryset: 登山道状況（絞り込み済みでよい）
+        query: 入力された検索語（空なら絞り込まない）
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+
+    use_fulltext = decompose_text is not None and connections[queryset.db].vendor == "postgresql"
+    if use_fulltext:
+        queryset = queryset.alias(search_tokens=token_vector())
+
+    for term in terms:
+        match = Q.create([(f"{field}__icontains", term) for field in SEARCH_FIELDS], connector=Q.OR)
+        if use_fulltext:
+            match |= Q(search_tokens=SearchQuery(decompose_text(term), config=SEARCH_CONFIG))
+        queryset = queryset.filter(match)
+    return queryset
@@ -0,0 +1,68 @@
+"""
+表示用データのキャッシュ（内容のバージョン付き）
+
+登山道状況・情報源・巡視ブログが変わるのは trail_sync / blog_sync と管理画面での保存時のみのため、
+書き込み後に bump_content_version() でバージョンを上げ、古いバージョンのキャッシュを読まなくする。
+バージョンは既定のキャッシュ（ローカルメモリならプロセスごと）に保存するため、別プロセスのバッチで同期した場合は
+公開ページのプロセスでは上がらない。そのためDBから求めた検証子（http_cache.get_validator()）もキーに含め、
+検証子の変化（VALIDATOR_CACHE_TIMEOUT 以内）で再計算する。古いエントリは有効期限で消える
+"""
+
+import logging
+import time
+from collections.abc import Callable
+from typing import TypeVar
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CONTENT_VERSION_KEY = "trail_status:content_version"
+SIDEBAR_CACHE_KEY = "trail_status:sidebar"
+
+# キャッシュの有効期限（秒）
+CONTENT_CACHE_TIMEOUT = 60 * 60
+
+
+def get_content_version() -> int:
+    """現在の内容のバージョン（未設定なら初期化）"""
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        # キャッシュの消去・追い出し後に、以前のバージョンのエントリと衝突しないよう時刻から始める
+        cache.add(CONTENT_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CONTENT_VERSION_KEY)
+    return version
+
+
+def bump_content_version() -> int:
+    """内容のバージョンを上げる（以降はキャッシュを再計算）"""
+    try:
+        version = cache.incr(CONTENT_VERSION_KEY)
+    except ValueError:  # 未設定
+        version = get_content_version()
+    logger.debug(f"表示用キャッシュのバージョン更新: {version}")
+    return version
+
+
+def get_or_build(
+    key: str, builder: Callable[[], T], timeout: int = CONTENT_CACHE_TIMEOUT, *, with_validator: bool = True
+) -> T:
+    """
+    現在のバージョンのキャッシュを返す。なければ builder で作成して保存
+
+    Args:
+        with_validator: DBから求めた検証子もキーに含める（検証子自体のキャッシュでは False）
+    """
+    version = get_content_version()
+    if with_validator:
+        # http_cache は site_cache を読み込むため、ここで読み込む
+        from .http_cache import get_validator
+
+        key = f"{key}:{get_validator().etag}"
+    value = cache.get(key, version=version)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout, version=version)
+    return value
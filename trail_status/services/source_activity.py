@@ -0,0 +1,122 @@
+"""
+情報源ごとの更新状況の集計（SourceActivity）の更新
+
+登山道状況・巡視ブログを保存した情報源の行のみ再集計する（集計は情報源の件数分のみ）
+"""
+
+import logging
+from collections import Counter
+from collections.abc import Iterable
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from ..models import BlogFeed, DataSource, SourceActivity, TrailCondition
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_FIELDS = (
+    "latest_synced_at",
+    "latest_changed_at",
+    "latest_feed_at",
+    "condition_count",
+    "status_counts",
+    "area_counts",
+    "refreshed_at",
+)
+
+# deferred_refresh のブロック内で再集計を待つ情報源のID（ブロック外は None）
+_deferred_source_ids: ContextVar[set[int] | None] = ContextVar("deferred_source_ids", default=None)
+
+
+def refresh_source_activity(source_ids: Iterable[int] | None = None) -> int:
+    """
+    情報源の更新状況を再集計して保存（集計クエリ2回 + 保存）
+
+    Args:
+        source_ids: 再集計する情報源のID（保存済みの情報源。Noneなら全情報源）
+
+    Returns:
+        更新した行数
+    """
+    if source_ids is None:
+        ids = list(DataSource.objects.values_list("id", flat=True))
+    else:
+        ids = sorted(set(source_ids))
+    if not ids:
+        return 0
+
+    now = timezone.now()
+    activities = {id: SourceActivity(source_id=id, refreshed_at=now) for id in ids}
+    status_counts = {id: Counter() for id in ids}
+    area_counts = {id: Counter() for id in ids}
+
+    # 有効な登山道状況の件数・最新日時（情報源・状況種別・山域ごと）
+    rows = (
+        TrailCondition.objects.filter(disabled=False, source_id__in=ids)
+        .values("source_id", "status", "area")
+        .annotate(count=Count("pk"), synced=Max("synced_at"), changed=Max("updated_at"))
+        .order_by()
+    )
+    for row in rows:
+        activity = activities[row["source_id"]]
+        activity.condition_count += row["count"]
+        status_counts[row["source_id"]][row["status"]] += row["count"]
+        area_counts[row["source_id"]][row["area"]] += row["count"]
+        activity.latest_synced_at = _latest(activity.latest_synced_at, row["synced"])
+        activity.latest_changed_at = _latest(activity.latest_changed_at, row["changed"])
+
+    # 巡視ブログの最新取得日時
+    feeds = (
+        BlogFeed.objects.filter(disabled=False, source_id__in=ids)
+        .values("source_id")
+        .annotate(latest=Max("created_at"))
+        .order_by()
+    )
+    for row in feeds:
+        activities[row["source_id"]].latest_feed_at = row["latest"]
+
+    for id, activity in activities.items():
+        activity.status_counts = dict(status_counts[id])
+        activity.area_counts = dict(area_counts[id])
+
+    SourceActivity.objects.bulk_create(
+        activities.values(), update_conflicts=True, unique_fields=["source"], update_fields=ACTIVITY_FIELDS
+    )
+    logger.debug(f"情報源の更新状況を再集計: {len(activities)}件")
+    return len(activities)
+
+
+def request_refresh(source_id: int) -> None:
+    """1件の保存・削除による再集計（deferred_refresh のブロック内ならブロックの終了時にまとめて実行）"""
+    deferred = _deferred_source_ids.get()
+    if deferred is None:
+        refresh_source_activity([source_id])
+    else:
+        deferred.add(source_id)
+
+
+@contextmanager
+def deferred_refresh():
+    """ブロック内の保存・削除による再集計を、ブロックの終了時に情報源ごと1回にまとめる（管理画面の一括削除等）"""
+    if _deferred_source_ids.get() is not None:  # 外側のブロックでまとめて実行
+        yield
+        return
+
+    source_ids: set[int] = set()
+    token = _deferred_source_ids.set(source_ids)
+    try:
+        yield
+    finally:
+        _deferred_source_ids.reset(token)
+    refresh_source_activity(source_ids)
+
+
+def _latest(current, value):
+    if current is None:
+        return value
+    if value is None:
+        return current
+    return max(current, value)
@@ -0,0 +1,209 @@
+"""
+公開ページの事前レンダリング（同期後に静的HTMLとして出力）
+
+一覧（絞り込みごと）・詳細・情報源一覧・巡視ブログ一覧をHTMLと圧縮版（brotli / gzip）で STATIC_PAGES_DIR に出力し、
+StaticPageMiddleware が Django のビューより先に返す。
+各ページの内容の元になる行の状態をキーとして manifest.json に記録し、キーが変わったページのみ再出力する。
+manifest の検証子（http_cache.Validator）が現在の内容と一致しない間（管理画面での編集後など）は、
+事前レンダリングしたページを使わず Django が表示する
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from ..models import TrailCondition
+from . import compression, http_cache
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+# 事前レンダリングする一覧の絞り込み（1項目のみ指定したページ）
+FILTER_PARAMS = ("area", "status", "source")
+
+
+@dataclass
+class RenderResult:
+    """事前レンダリングの結果（ページのURL）"""
+
+    rendered: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+
+def page_url(path: str, params: dict[str, Any] | None = None) -> str:
+    """manifest のページのキー（パス + 並べ替えたクエリ文字列）"""
+    query = urlencode(sorted((params or {}).items()))
+    return f"{path}?{query}" if query else path
+
+
+def page_file_name(url: str) -> str:
+    """ページのURLから出力ファイル名（例: "/?area=OKUTAMA" → "index@area-OKUTAMA.html"）"""
+    path, _, query = url.partition("?")
+    name = path.strip("/").replace("/", "_") or "index"
+    if query:
+        name += "@" + query.replace("=", "-").replace("&", "@")
+    return f"{name}.html"
+
+
+@cache
+def build_key() -> str:
+    """テンプレート・静的ファイル・リビジョンのキー（デプロイで変わったら全ページを再出力）"""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(os.environ.get("K_REVISION", "").encode())
+    for template in sorted(Path(settings.BASE_DIR, "templates").rglob("*.html")):
+        digest.update(template.read_bytes())
+    staticfiles_manifest = Path(settings.STATIC_ROOT, "staticfiles.json")
+    if staticfiles_manifest.exists():
+        digest.update(staticfiles_manifest.read_bytes())
+    return digest.hexdigest()
+
+
+def load_manifest(output_dir: Path) -> dict[str, Any]:
+    """出力済みページの manifest（なければ空）"""
+    try:
+        return json.loads((output_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    """一時ファイルに書き込んでから置き換え（配信中のファイルが途中の状態にならないように）"""
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=".tmp-", delete=False) as tmp:
+        tmp.write(content)
+    os.replace(tmp.name, path)
+
+
+def server_host() -> str:
+    """ビューを直接呼ぶリクエストの Host（ALLOWED_HOSTS の最初の具体的なホスト）"""
+    return next((host.lstrip(".") for host in settings.ALLOWED_HOSTS if host.strip(".*")), "localhost")
+
+
+def _row_key(*values: Any) -> str:
+    return hashlib.blake2b("|".join(str(value) for value in values).encode(), digest_size=8).hexdigest()
+
+
+class StaticPageRenderer:
+    """公開ページを事前レンダリングして出力"""
+
+    def __init__(self, output_dir: str | Path, force: bool = False):
+        """
+        Args:
+            output_dir: 出力先（複数インスタンスで共有する場合はストレージのマウント先）
+            force: キーが変わっていないページも再出力
+        """
+        self.output_dir = Path(output_dir)
+        self.force = force
+        self.request_factory = RequestFactory(headers={"host": server_host()})
+
+    def pages(self, validator: http_cache.Validator) -> dict[str, str]:
+        """
+        事前レンダリングするページとキー
+
+        一覧・情報源一覧・巡視ブログ一覧は全体の件数や最終更新日を表示するため検証子をキーとし、
+        詳細ページは該当行・情報源・山グループとサイドバーの状態をキーとする
+        """
+        from ..views import _get_sidebar_context
+
+        sidebar = _get_sidebar_context()
+        sidebar_key = _row_key(repr(sidebar))
+        list_url = reverse("trail_status:trail-list")
+
+        pages = {list_url: validator.etag}
+        for name in FILTER_PARAMS:
+            for value, _, _ in sidebar[f"{name}_choices"]:
+                pages[page_url(list_url, {name: value})] = validator.etag
+        pages[reverse("trail_status:source-list")] = validator.etag
+        pages[reverse("trail_status:blog-list")] = validator.etag
+
+        rows = TrailCondition.objects.filter(disabled=False).values_list(
+            "id", "updated_at", "source__updated_at", "mountain_group_id"
+        )
+        for id, updated_at, source_updated_at, mountain_group_id in rows:
+            url = reverse("trail_status:trail-detail", args=[id])
+            pages[url] = _row_key(sidebar_key, updated_at, source_updated_at, mountain_group_id)
+        return pages
+
+    def render(self, url: str) -> bytes:
+        """Djangoのビューでページをレンダリング"""
+        path = url.partition("?")[0]
+        request = self.request_factory.get(url, secure=True)
+        match = resolve(path)
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        if response.status_code != 200:
+            raise RuntimeError(f"{url}: ステータスコード {response.status_code}")
+        return response.content
+
+    def write_compressed(self, path: Path, content: bytes) -> None:
+        """圧縮版を最大の圧縮レベルで出力"""
+        for encoding, suffix in compression.FILE_SUFFIXES.items():
+            _write_atomic(path.with_name(f"{path.name}{suffix}"), compression.compress(content, encoding, best=True))
+
+    def run(self) -> RenderResult:
+        """キーが変わったページを再出力し、不要になったページを削除して manifest を更新"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        validator = http_cache.compute_validator()
+        build = build_key()
+        old_manifest = load_manifest(self.output_dir)
+        old_pages = old_manifest.get("pages", {}) if old_manifest.get("build") == build else {}
+
+        result = RenderResult()
+        pages = {}
+        for url, key in self.pages(validator).items():
+            file_name = page_file_name(url)
+            path = self.output_dir / file_name
+            if not self.force and old_pages.get(url, {}).get("key") == key and path.exists():
+                result.skipped.append(url)
+            else:
+                content = self.render(url)
+                _write_atomic(path, content)
+                self.write_compressed(path, content)
+                result.rendered.append(url)
+            pages[url] = {"file": file_name, "key": key}
+
+        # 公開されなくなったページ（無効化された登山道状況等）を削除
+        for url, page in old_manifest.get("pages", {}).items():
+            if url not in pages:
+                for suffix in ("", *compression.FILE_SUFFIXES.values()):
+                    (self.output_dir / f"{page['file']}{suffix}").unlink(missing_ok=True)
+                result.removed.append(url)
+
+        manifest = {
+            "build": build,
+            "etag": validator.etag,
+            "last_modified": validator.last_modified.isoformat(),
+            "pages": pages,
+        }
+        _write_atomic(self.output_dir / MANIFEST_FILE, json.dumps(manifest, ensure_ascii=False).encode())
+        logger.info(
+            f"事前レンダリング完了: 出力{len(result.rendered)}件, 変更なし{len(result.skipped)}件, "
+            f"削除{len(result.removed)}件"
+        )
+        return result
+
+
+def render_static_pages(force: bool = False) -> RenderResult | None:
+    """STATIC_PAGES_DIR が設定されていれば公開ページを事前レンダリング（同期後に実行）"""
+    if not settings.STATIC_PAGES_DIR:
+        logger.debug("STATIC_PAGES_DIRが設定されていないため、事前レンダリングをスキップします")
+        return None
+    try:
+        return StaticPageRenderer(settings.STATIC_PAGES_DIR, force=force).run()
+    except Exception as e:
+        # 事前レンダリングに失敗しても Django が表示するため、同期処理は継続
+        logger.error(f"事前レンダリングに失敗しました: {e}")
+        return None
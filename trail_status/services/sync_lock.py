@@ -0,0 +1,137 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# advisory lockの名前空間（"trail_sync"から導出した32bit整数）
+LOCK_NAMESPACE = int.from_bytes(hashlib.sha256(b"trail_sync").digest()[:4], "big", signed=True)
+
+# 実行単位のロックに使うキー（情報源IDは1以上なので衝突しない）
+RUN_LOCK_KEY = 0
+
+
+class SyncLock:
+    """
+    trail_syncの多重実行を防ぐプロセス間ロック
+
+    - PostgreSQL: セッション単位の advisory lock（pg_try_advisory_lock）
+    - その他（SQLite等の開発環境）: 一時ディレクトリのファイルロック
+
+    Notes:
+        - advisory lockは取得したDB接続に紐づくため、取得と解放は同じスレッドで行うこと
+        - プロセスが異常終了した場合もDBセッション切断/ファイルクローズでロックは解放される
+    """
+
+    POLL_INTERVAL = 1.0  # 待機時の再試行間隔（秒）
+
+    def __init__(self, key: int, lock_dir: Path | None = None):
+        self.key = key
+        self.lock_dir = lock_dir or Path(tempfile.gettempdir())
+        self.acquired = False
+        self._fd: int | None = None
+
+    @classmethod
+    def for_run(cls, **kwargs) -> "SyncLock":
+        """実行全体のロック"""
+        return cls(RUN_LOCK_KEY, **kwargs)
+
+    @classmethod
+    def for_source(cls, source_id: int, **kwargs) -> "SyncLock":
+        """情報源単位のロック"""
+        return cls(source_id, **kwargs)
+
+    @property
+    def use_advisory_lock(self) -> bool:
+        return connection.vendor == "postgresql"
+
+    def acquire(self, timeout: float = 0) -> bool:
+        """
+        ロックを取得する
+
+        Args:
+            timeout: 取得できない場合に待機する最大秒数（0なら即座に諦める）
+
+        Returns:
+            取得できた場合 True
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            self.acquired = self._try_acquire()
+            if self.acquired or time.monotonic() >= deadline:
+                break
+            time.sleep(min(self.POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+
+        if not self.acquired:
+            logger.debug(f"ロック取得失敗 - key: {self.key}")
+        return self.acquired
+
+    def release(self) -> None:
+        """ロックを解放する（未取得の場合は何もしない）"""
+        if not self.acquired:
+            return
+
+        if self.use_advisory_lock:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [LOCK_NAMESPACE, self.key])
+        elif self._fd is not None:
+            _unlock_file(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+        self.acquired = False
+
+    def _try_acquire(self) -> bool:
+        if self.use_advisory_lock:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [LOCK_NAMESPACE, self.key])
+                return bool(cursor.fetchone()[0])
+
+        path = self.lock_dir / f"trail_sync_{self.key}.lock"
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if _lock_file(fd):
+            self._fd = fd
+            return True
+        os.close(fd)
+        return False
+
+    def __enter__(self) -> "SyncLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def _lock_file(fd: int) -> bool:
+    """ファイルディスクリプタに非ブロッキングの排他ロックをかける"""
+    try:
+        import fcntl
+
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except ImportError:
+        import msvcrt  # Windows
+
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+    except OSError:
+        return False
+    return True
+
+
+def _unlock_file(fd: int) -> None:
+    try:
+        import fcntl
+
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    except ImportError:
+        import msvcrt  # Windows
+
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,78 @@
+import logging
+import threading
+import unicodedata
+from functools import lru_cache
+
+from sudachipy import Dictionary, SplitMode
+
+logger = logging.getLogger(__name__)
+
+# sudachipyのトークン分割モード (A | B | C)
+SPLIT_MODE = SplitMode.C
+
+# 分かち書き結果のキャッシュ上限（(正規化テキスト, noun_only) 単位、全情報源で共有）
+CACHE_SIZE = 8192
+
+# 形態素解析器（プロセス内で1つだけ遅延ロード）
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+def get_analyzer():
+    """
+    形態素解析器を取得する（初回のみ辞書をロード）
+
+    辞書のロードは数百ミリ秒かかるため、情報源ごとのDbWriterではなくプロセス全体で共有する
+    """
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                logger.debug("Sudachi辞書をロードします")
+                _analyzer = Dictionary(dict="core").create()
+    return _analyzer
+
+
+def normalize_text(text: str) -> str:
+    """全角半角・空白を揃えて比較の精度を上げる"""
+    if not text:
+        return ""
+    return unicodedata.normalize("NFKC", text).strip().replace(" ", "").replace("　", "")
+
+
+def decompose_text(text: str, noun_only: bool = False) -> str:
+    """テキストの形態素解析をしトークンごとに分かち書きした文字列を返却
+
+    - token_set_ratio, token_sort_ratio用
+    - 正規化後のテキストをキーにキャッシュするため、表記揺れ（全角半角・空白）も同じ結果を共有する
+    """
+    return _decompose_normalized(normalize_text(text), noun_only)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _decompose_normalized(normalized: str, noun_only: bool) -> str:
+    analyzer = get_analyzer()
+
+    tokens = []
+    # Tokenizerはスレッドセーフではないため解析中はロック
+    with _analyzer_lock:
+        morphemes = analyzer.tokenize(normalized, SPLIT_MODE)
+        for m in morphemes:
+            pos = m.part_of_speech()
+            if noun_only and pos[0] != "名詞":
+                continue
+            tokens.append(m.surface())
+
+    if not tokens:
+        logger.warning("トークンが空です。原文を返却します。")
+        return normalized
+    return " ".join(tokens)
+
+
+def cache_info():
+    """分かち書きキャッシュの統計（ベンチマーク・デバッグ用）"""
+    return _decompose_normalized.cache_info()
+
+
+def cache_clear() -> None:
+    _decompose_normalized.cache_clear()
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import typing
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date
 from enum import StrEnum
+from typing import Any
 
 from pydantic import BaseModel, Field
 
-from ..models import AreaName, StatusType
+from ..models import AreaName, MatchingMode, StatusType
 
 if typing.TYPE_CHECKING:
     from .llm_client import LlmConfig
@@ -97,6 +98,15 @@ class SourceSchemaSingle:
     url1: str
     prompt_file: PromptFile
     content_hash: str | None = None
+    priority: float = 0.0
+    url2: str = ""
+    matching_mode: str = MatchingMode.GREEDY
+    matching_params: dict[str, Any] = field(default_factory=dict)  # DbWriterの照合設定の上書き
+
+    @property
+    def urls(self) -> list[str]:
+        """スクレイピング対象のURL（url2は設定されている場合のみ）"""
+        return [url for url in (self.url1, self.url2) if url]
 
 
 @dataclass
@@ -111,3 +121,12 @@ class ResultSingle:
     extracted_trail_conditions: ConditionSchemaAiList | None = None
     stats: LlmStats | None = None
     config: LlmConfig | None = None
+    deferred: bool = False  # 時間切れ等で未処理のまま次回実行に持ち越し
+
+
+@dataclass
+class ReconcilePlan:
+    """照合結果（プロセス間で受け渡すプレーンなデータ）"""
+
+    updates: dict[int, dict[str, Any]]  # {既存レコードID: 更新するカラムと値}
+    creates: list[dict[str, Any]]  # 新規作成するレコードのカラムと値
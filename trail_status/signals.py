@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import MountainAlias, TrailCondition
+from .models import BlogFeed, MountainAlias, TrailCondition
+from .services.source_activity import request_refresh
 
 
 @receiver(post_save, sender=MountainAlias)
@@ -14,3 +15,16 @@ def update_existing_conditions(sender, instance, created, **kwargs):
         TrailCondition.objects.filter(mountain_name_raw=instance.alias_name, mountain_group_id__isnull=True).update(
             mountain_group=instance.mountain_group,
         )
+
+
+@receiver(post_save, sender=TrailCondition)
+@receiver(post_delete, sender=TrailCondition)
+@receiver(post_save, sender=BlogFeed)
+@receiver(post_delete, sender=BlogFeed)
+def update_source_activity(sender, instance, **kwargs):
+    """
+    登山道状況・巡視ブログを1件ずつ保存・削除したとき（管理画面等）、情報源の更新状況を再集計
+    （一括保存の DbWriter・blog_sync では保存後に明示的に再集計する。
+    管理画面の一括削除は deferred_refresh で情報源ごとに1回にまとめる）
+    """
+    request_refresh(instance.source_id)
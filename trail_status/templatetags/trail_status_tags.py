@@ -0,0 +1,16 @@
+from django import template
+
+from ..models import StatusType
+from ..models.condition import StatusPresentation
+
+register = template.Library()
+
+
+@register.simple_tag
+def status_presentation(status_code: str) -> StatusPresentation:
+    """
+    状況種別の表示用の情報
+
+    使用例: {% status_presentation item.status as status %}{{ status.badge_class }} {{ status.label }}
+    """
+    return StatusType.get_presentation(status_code)
@@ -1,10 +1,12 @@
 from django.urls import path
 from . import views
 
-app_name = 'trail_status'
+app_name = "trail_status"
 urlpatterns = [
     # 一覧画面: /
     path("", views.TrailListView.as_view(), name="trail-list"),
+    # 一覧の続きの行（追加読み込み用の断片HTML）: /trails/rows/?cursor=...
+    path("trails/rows/", views.TrailRowsView.as_view(), name="trail-rows"),
     # 詳細画面: /trail/1/ や /trail/2/ など
     path("trails/<int:pk>/", views.TrailDetailView.as_view(), name="trail-detail"),
     # 情報源一覧
@@ -1,34 +1,56 @@
 import logging
 import urllib.parse
-from collections import OrderedDict, defaultdict
+from collections import Counter, OrderedDict, defaultdict
 from datetime import timedelta
 from typing import override
 
-from django.db.models import Count, F, Max, Prefetch
+from django.db.models import Prefetch
+from django.http import Http404
 from django.utils import timezone
+from django.views.decorators.http import condition
 from django.views.generic import DetailView, ListView
 
-from .models import AreaName, BlogFeed, DataSource, StatusType, TrailCondition
+from .models import AreaName, BlogFeed, DataSource, SourceActivity, StatusType, TrailCondition
+from .services import http_cache, site_cache
+from .services.facets import FACET_FIELDS, facet_counts
+from .services.keyset import PAGE_SIZE, Cursor, InvalidCursor, KeysetPage, keyset_page
+from .services.search import search_conditions
 
 logger = logging.getLogger(__name__)
 
 
+class HttpCacheMixin:
+    """公開ページのHTTPキャッシュ（ETag / Last-Modified による 304 応答と共有キャッシュ向けの Cache-Control）"""
+
+    @override
+    def dispatch(self, request, *args, **kwargs):
+        validator = http_cache.get_validator()
+        conditional_dispatch = condition(
+            etag_func=lambda *args, **kwargs: validator.etag,
+            last_modified_func=lambda *args, **kwargs: validator.last_modified,
+        )(super().dispatch)
+        return http_cache.patch_shared_cache_headers(conditional_dispatch(request, *args, **kwargs))
+
+
 class SideBarMixin:
-    """サイドバー用のフィルター選択肢を取得（データがある項目のみ表示）"""
+    """サイドバー用のフィルター選択肢を取得（データがある項目のみ表示）
+
+    内容は同期・管理画面での保存時にのみ変わるため、バージョン付きキャッシュから取得する
+    """
 
     @override
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context.update(**_get_sidebar_context())
+        context.update(**site_cache.get_or_build(site_cache.SIDEBAR_CACHE_KEY, _get_sidebar_context))
         return context
 
 
-class TrailListView(SideBarMixin, ListView):
-    """登山道状況一覧ページ（トップページ）のビュー"""
+class TrailFilterMixin:
+    """登山道状況のクエリパラメータによる絞り込みとキーセットページ送り"""
 
     model = TrailCondition
-    queryset = TrailCondition.objects.filter(disabled=False).prefetch_related("source")
-    template_name = "trail_status/trail_list.html"
+    queryset = TrailCondition.objects.filter(disabled=False).select_related("source")
+    page_size = PAGE_SIZE
 
     @override
     def setup(self, request, *args, **kwargs):
@@ -36,68 +58,109 @@ class TrailListView(SideBarMixin, ListView):
         self.source_filter = request.GET.get("source")
         self.area_filter = request.GET.get("area")
         self.status_filter = request.GET.get("status")
+        self.search_query = request.GET.get("q", "").strip()
+        self.cursor_param = request.GET.get("cursor")
+
+    def get_filtered_queryset(self):
+        """クエリパラメータで絞り込んだ登山道状況"""
+        conditions = self.get_queryset()
+        if self.source_filter:
+            conditions = conditions.filter(source=self.source_filter)
+        if self.area_filter:
+            conditions = conditions.filter(area=self.area_filter)
+        if self.status_filter:
+            conditions = conditions.filter(status=self.status_filter)
+        if self.search_query:
+            conditions = search_conditions(conditions, self.search_query)
+        return conditions
+
+    def get_filter_query(self) -> str:
+        """現在の絞り込み条件のクエリ文字列（ページ送りのリンク用）"""
+        params = {
+            "source": self.source_filter,
+            "area": self.area_filter,
+            "status": self.status_filter,
+            "q": self.search_query,
+        }
+        return urllib.parse.urlencode({key: value for key, value in params.items() if value})
+
+    def get_page(self, conditions) -> KeysetPage:
+        """カーソル以降の1ページ（報告日の降順）"""
+        try:
+            cursor = Cursor.decode(self.cursor_param) if self.cursor_param else None
+        except InvalidCursor:
+            raise Http404("ページが見つかりません")
+        return keyset_page(conditions, cursor, self.page_size)
+
+    def get_page_context(self, conditions) -> dict:
+        """1ページ分の行と続きのリンク用の値"""
+        page = self.get_page(conditions)
+        return {
+            "conditions": page.object_list,
+            "current_cursor": self.cursor_param,
+            "next_cursor": page.next_cursor.encode() if page.has_next else "",
+            "filter_query": self.get_filter_query(),
+        }
+
+
+class TrailListView(HttpCacheMixin, TrailFilterMixin, SideBarMixin, ListView):
+    """登山道状況一覧ページ（トップページ）のビュー
+
+    一覧はキーセットページ送りで PAGE_SIZE 件ずつ表示し、続きは TrailRowsView で追加読み込みする
+    """
+
+    template_name = "trail_status/trail_list.html"
 
     @override
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        base_conditions = self.get_queryset()
-
         # クエリパラメータによる絞り込み
-        if self.source_filter:
-            base_conditions = base_conditions.filter(source=self.source_filter)
-        if self.area_filter:
-            base_conditions = base_conditions.filter(area=self.area_filter)
-        if self.status_filter:
-            base_conditions = base_conditions.filter(status=self.status_filter)
-        # 報告日の降順で並べ替え
-        filtered_conditions = base_conditions.order_by("-reported_at", "-created_at")
+        base_conditions = self.get_filtered_queryset()
 
         current_source = self.source_filter
         current_area = self.area_filter
         current_status = self.status_filter
+        current_query = self.search_query
 
-        # 最新の内容更新日（全情報源含む）
-        latest_sync_date = self.get_queryset().aggregate(Max("synced_at"))["synced_at__max"]
-
-        # 1週間以内の更新リスト（新規追加情報源は除外）
-        # 新規追加情報源 = DataSource.created_atとTrailCondition.updated_atの差が1日以内
-        seven_days_ago = timezone.now().date() - timedelta(days=7)
-        # @formatter:off
-        recent_updated_sources = (
-            self.get_queryset()
-            .values("source__name", "source__url1")
-            .annotate(
-                latest_date=Max("synced_at"),
-                source_created_at=F("source__created_at"),
-                # DataSourceの作成日とTrailConditionの最新更新日の差が1日以内のものを除外
-            )
-            .filter(latest_date__gt=F("source_created_at") + timedelta(days=1))
-            .filter(latest_date__date__gte=seven_days_ago)
-            .order_by("-latest_date")
-        )
-        # @formatter:on
-
-        last_checked_at = DataSource.web.aggregate(Max("last_checked_at"))["last_checked_at__max"]
+        # 絞り込み中（検索中）は、サイドバーの件数を現在の絞り込み結果の件数にする（クエリ1回）
+        if current_source or current_area or current_status or current_query:
+            counts = facet_counts(base_conditions)
+            for name in FACET_FIELDS:
+                context[f"{name}_choices"] = [
+                    (id, label, counts[name].get(id, 0)) for id, label, _ in context[f"{name}_choices"]
+                ]
 
         context.update(
             {
-                "conditions": filtered_conditions,
+                **self.get_page_context(base_conditions),
                 "current_source": current_source,
                 "current_area": current_area,
                 "current_status": current_status,
-                "latest_sync_date": latest_sync_date,
-                "recent_updated_sources": recent_updated_sources,
-                "last_checked_at": last_checked_at,
+                "current_query": current_query,
+                **_get_list_header_context(),
             }
         )
         return context
 
 
-class TrailDetailView(SideBarMixin, DetailView):
+class TrailRowsView(HttpCacheMixin, TrailFilterMixin, ListView):
+    """登山道状況一覧の続きの行（追加読み込み用の断片HTML）"""
+
+    template_name = "trail_status/trail_rows.html"
+
+    @override
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_page_context(self.get_filtered_queryset()))
+        return context
+
+
+class TrailDetailView(HttpCacheMixin, SideBarMixin, DetailView):
     """登山道状況個別詳細ページのビュー"""
 
     model = TrailCondition
+    queryset = TrailCondition.objects.select_related("source", "mountain_group")
     template_name = "trail_status/detail.html"
     context_object_name = "item"
 
@@ -120,7 +183,7 @@ class TrailDetailView(SideBarMixin, DetailView):
         return context
 
 
-class SourceListView(SideBarMixin, ListView):
+class SourceListView(HttpCacheMixin, SideBarMixin, ListView):
     """情報源一覧ページのビュー"""
 
     model = DataSource
@@ -132,14 +195,14 @@ class SourceListView(SideBarMixin, ListView):
         context = super().get_context_data(**kwargs)
         sources_by_type = defaultdict(list)
 
-        for source in self.get_queryset():
+        for source in self.object_list:
             sources_by_type[source.organization_type].append(source)
 
         context["sources_by_type"] = dict(sources_by_type)  # Not work in template if defaultdict
         return context
 
 
-class BlogListView(SideBarMixin, ListView):
+class BlogListView(HttpCacheMixin, SideBarMixin, ListView):
     """巡視ブログ一覧ページのビュー"""
 
     model = DataSource
@@ -193,33 +256,83 @@ class BlogListView(SideBarMixin, ListView):
         return context
 
 
-def _get_sidebar_context() -> dict:
-    """サイドバー用のフィルター選択肢を取得する（データがある項目のみ表示）"""
-    base_conditions = TrailCondition.objects.filter(disabled=False).select_related("source")
+def _get_list_header_context() -> dict:
+    """
+    一覧ページ上部の更新情報を情報源ごとの更新状況（SourceActivity）から取得（クエリ1回）
 
-    # 最近追加された情報源（1週間以内、最新5件）
-    seven_days_ago = timezone.now() - timedelta(days=7)
-    recent_sources = (
-        DataSource.objects.filter(data_format="WEB", created_at__gte=seven_days_ago)
-        .order_by("-created_at")[:5]
-        .values("id", "name", "created_at")
-    )
+    - latest_sync_date: 最新の内容更新日（全情報源含む）
+    - recent_updated_sources: 1週間以内の更新リスト（新規追加情報源は除外）
+    - last_checked_at: 各サイト最終チェック日
+    """
+    sources = DataSource.objects.select_related("activity")
+    activities = [(source, source.activity) for source in sources if _has_activity(source)]
 
-    # 山域フィルター選択肢（データがある山域のみ）
-    area_counts = dict(base_conditions.values("area").annotate(count=Count("id")).values_list("area", "count"))
-    area_choices = [(id, name) for id, name in AreaName.choices if area_counts.get(id, 0) > 0]
+    synced = [(source, activity.latest_synced_at) for source, activity in activities if activity.latest_synced_at]
+    latest_sync_date = max((latest_date for _, latest_date in synced), default=None)
 
-    # 状況フィルター選択肢（データがある状況タイプのみ）
-    status_counts = dict(base_conditions.values("status").annotate(count=Count("id")).values_list("status", "count"))
-    status_choices = [(id, name) for id, name in StatusType.choices if status_counts.get(id, 0) > 0]
+    # 新規追加情報源 = DataSource.created_atとTrailCondition.updated_atの差が1日以内
+    seven_days_ago = timezone.now().date() - timedelta(days=7)
+    recent_updated_sources = [
+        {"name": source.name, "url1": source.url1, "latest_date": latest_date}
+        for source, latest_date in sorted(synced, key=lambda item: item[1], reverse=True)
+        if latest_date > source.created_at + timedelta(days=1)
+        and timezone.localtime(latest_date).date() >= seven_days_ago
+    ]
 
-    # 情報源フィルター選択肢（データがある情報源のみ）
-    source_counts = dict(base_conditions.values("source").annotate(count=Count("id")).values_list("source", "count"))
-    source_choices = [(id, name) for id, name in DataSource.web.get_labels() if source_counts.get(id, 0) > 0]
+    web_checked = [source.last_checked_at for source in sources if source.data_format == "WEB"]
+    last_checked_at = max((checked for checked in web_checked if checked), default=None)
+
+    return {
+        "latest_sync_date": latest_sync_date,
+        "recent_updated_sources": recent_updated_sources,
+        "last_checked_at": last_checked_at,
+    }
+
+
+def _get_sidebar_context() -> dict:
+    """サイドバー用のフィルター選択肢を情報源ごとの更新状況（SourceActivity）から取得する（クエリ1回）"""
+    sources = list(DataSource.objects.select_related("activity").order_by("id"))
+
+    # 最近追加された情報源（1週間以内、最新5件）
+    seven_days_ago = timezone.now() - timedelta(days=7)
+    recent_sources = sorted(
+        (
+            {"id": source.id, "name": source.name, "created_at": source.created_at}
+            for source in sources
+            if source.data_format == "WEB" and source.created_at >= seven_days_ago
+        ),
+        key=lambda source: source["created_at"],
+        reverse=True,
+    )[:5]
+
+    # 山域・状況・情報源ごとの件数
+    area_counts, status_counts, source_counts = Counter(), Counter(), {}
+    for source in sources:
+        if _has_activity(source):
+            area_counts.update(source.activity.area_counts)
+            status_counts.update(source.activity.status_counts)
+            source_counts[source.id] = source.activity.condition_count
+
+    # フィルター選択肢 (値, 表示名, 件数)（データがある項目のみ）
+    area_choices = [(id, name, area_counts[id]) for id, name in AreaName.choices if area_counts[id]]
+    status_choices = [(id, name, status_counts[id]) for id, name in StatusType.choices if status_counts[id]]
+    source_choices = [
+        (source.id, source.name, source_counts[source.id])
+        for source in sources
+        if source.data_format == "WEB" and source_counts.get(source.id)
+    ]
 
     return {
         "source_choices": source_choices,
         "area_choices": area_choices,
         "status_choices": status_choices,
-        "recent_sources": list(recent_sources),
+        "recent_sources": recent_sources,
     }
+
+
+def _has_activity(source: DataSource) -> bool:
+    """更新状況が集計済みか（select_related 済みのためクエリは発生しない）"""
+    try:
+        return source.activity is not None
+    except SourceActivity.DoesNotExist:
+        return False